@@ -0,0 +1,41 @@
+"""Vehicle-steps per second of `QuadcopterBatch` at several vehicle counts.
+
+usage: python -m benchmarks.batch [--steps N] [--sizes 1 10 100 1000]
+"""
+import time
+import argparse
+import numpy as np
+
+from quadcopter import QuadcopterBatch, QuadConfig, MotorConfig
+
+
+def measure(n: int, steps: int, dt: float = 1e-3) -> float:
+    config: QuadConfig = QuadConfig(
+        weight=1.0,
+        length=0.5,
+        radius=0.2,
+        states=[[0, 0, 1], [0, 0, 0]],
+        motors=MotorConfig(10, 2),
+        lift_const=0.1,
+    )
+    batch: QuadcopterBatch = QuadcopterBatch([config] * n)
+    batch.set_motor_speeds(np.full((n, 4), 3200.0))
+
+    start: float = time.perf_counter()
+    for _ in range(steps):
+        batch.step(dt)
+    return n * steps / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--steps", type=int, default=2000)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 100, 1000])
+    args = parser.parse_args()
+
+    for n in args.sizes:
+        print(f"{n:>6} vehicles: {measure(n, args.steps):12.0f} vehicle-steps/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""Steps per second of each `Quadcopter` integrator on a hovering vehicle.
+
+usage: python -m benchmarks.integrators [--steps N] [--dt DT]
+"""
+import time
+import argparse
+import numpy as np
+
+from quadcopter import Quadcopter, QuadConfig, MotorConfig
+from quadcopter.quad.integrators import INTEGRATORS
+
+
+def measure(integrator: str, steps: int, dt: float) -> float:
+    config: QuadConfig = QuadConfig(
+        weight=1.0,
+        length=0.5,
+        radius=0.2,
+        states=[[0, 0, 1], [0, 0, 0]],
+        motors=MotorConfig(10, 2),
+        lift_const=0.1,
+    )
+    quad: Quadcopter = Quadcopter(config, integrator)
+    quad.set_motor_speeds(np.array([3200.0, 3190.0, 3200.0, 3210.0]))
+
+    start: float = time.perf_counter()
+    for _ in range(steps):
+        quad.step(dt)
+    return steps / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--steps", type=int, default=20000)
+    parser.add_argument("--dt", type=float, default=1e-3)
+    args = parser.parse_args()
+
+    baseline: float = measure("vode", args.steps, args.dt)
+    for name in INTEGRATORS:
+        rate: float = baseline if name == "vode" else measure(name, args.steps, args.dt)
+        print(f"{name:>6}: {rate:12.0f} steps/s  ({rate / baseline:5.2f}x vode)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Right-hand side evaluations and steps per second of the stiff `bdf`
+integrator with the analytical Jacobian against finite differences.
+
+usage: python -m benchmarks.jacobian [--steps N] [--dt DT]
+"""
+import time
+import argparse
+import numpy as np
+
+from quadcopter import Quadcopter, QuadConfig, MotorConfig
+from quadcopter.quad.integrators import VODE
+from quadcopter.profiling import Profiler
+
+
+def measure(analytical: bool, steps: int, dt: float) -> tuple[float, float]:
+    config: QuadConfig = QuadConfig(
+        weight=1.0,
+        length=0.5,
+        radius=0.2,
+        states=[[0, 0, 1], [0, 0, 0]],
+        motors=MotorConfig(10, 2),
+        lift_const=0.1,
+    )
+    quad: Quadcopter = Quadcopter(config, VODE(method="bdf", with_jacobian=True))
+    if not analytical:
+        quad.solver.jacobian = None
+    quad.set_motor_speeds(np.array([3200.0, 3190.0, 3200.0, 3210.0]))
+    profiler: Profiler = Profiler().attach(quad)
+
+    start: float = time.perf_counter()
+    for _ in range(steps):
+        quad.step(dt)
+    rate: float = steps / (time.perf_counter() - start)
+    return rate, profiler.counters["quadcopter._fetch_state"] / steps
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--steps", type=int, default=5000)
+    parser.add_argument("--dt", type=float, default=1e-3)
+    args = parser.parse_args()
+
+    for name, analytical in (("finite", False), ("analytical", True)):
+        rate, evaluations = measure(analytical, args.steps, args.dt)
+        print(f"{name:>10}: {rate:10.0f} steps/s  {evaluations:6.2f} evaluations/step")
+
+
+if __name__ == "__main__":
+    main()
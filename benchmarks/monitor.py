@@ -0,0 +1,77 @@
+"""Simulation slowdown and rendering rate with the monitor attached.
+
+Runs the same lockstep episode headless, with the blitted monitor hook
+limited to the display rate, and with a full `Monitor.update` redraw on
+every controller tick (the previous behaviour).
+
+usage: python -m benchmarks.monitor [--steps N] [--fps FPS]
+"""
+import time
+import argparse
+import matplotlib
+
+matplotlib.use("Agg")
+
+from quadcopter import Lockstep, Quadcopter, QuadConfig, MotorConfig
+from quadcopter.control import CPID, PID, ControlConfig
+from monitor.plot import Monitor
+
+
+def episode() -> Lockstep:
+    config: QuadConfig = QuadConfig(
+        weight=1.0,
+        length=0.5,
+        radius=0.2,
+        states=[[0, 0, 0], [0, 0, 0]],
+        motors=MotorConfig(10, 2),
+        lift_const=0.1,
+    )
+    quad: Quadcopter = Quadcopter(config, "rk4")
+    ctrl: CPID = CPID(
+        ControlConfig(
+            position=PID(Kp=[300, 300, 7000], Ki=[0.04, 0.04, 4.5], Kd=[450, 450, 5000]),
+            attitude=PID(Kp=[22000, 22000, 1500], Ki=[0, 0, 1.2], Kd=[12000, 12000, 0]),
+        ),
+        quad,
+    )
+    ctrl.update_target((1, 1, 1, 0))
+    return Lockstep(quad, ctrl)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--steps", type=int, default=5000)
+    parser.add_argument("--fps", type=float, default=30.0)
+    args = parser.parse_args()
+
+    sim: Lockstep = episode()
+    start: float = time.perf_counter()
+    sim.run(args.steps)
+    headless: float = args.steps / (time.perf_counter() - start)
+    print(f"headless        : {headless:10.0f} steps/s")
+
+    sim = episode()
+    monitor: Monitor = Monitor(sim.quad, args.fps)
+    sim.hooks.append(monitor)
+    start = time.perf_counter()
+    sim.run(args.steps)
+    blitted: float = args.steps / (time.perf_counter() - start)
+    print(
+        f"blitted {args.fps:4.0f} Hz : {blitted:10.0f} steps/s  "
+        f"({headless / blitted:5.2f}x slower, {monitor.fps:5.1f} fps, "
+        f"{monitor.dropped} frames dropped)"
+    )
+
+    sim = episode()
+    monitor = Monitor(sim.quad)
+    steps: int = args.steps // 10
+    start = time.perf_counter()
+    for _ in range(steps // 5):
+        sim.run(5)
+        monitor.update()
+    redraw: float = steps / (time.perf_counter() - start)
+    print(f"full redraw     : {redraw:10.0f} steps/s  ({headless / redraw:5.2f}x slower)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Scaling of the parallel swarm with the number of shards.
+
+Each shard count runs the same swarm for the same number of controller
+ticks. The efficiency is the speedup over a single shard divided by the
+number of shards, 1 for perfect scaling.
+
+usage: python -m benchmarks.swarm [--n 10000] [--ticks 100] [--shards 1 2 4 8]
+"""
+import os
+import time
+import argparse
+
+from quadcopter import QuadConfig, MotorConfig
+from quadcopter.control import PID, ControlConfig
+from quadcopter.swarm import Swarm
+
+
+def measure(n: int, shards: int, ticks: int) -> float:
+    config: QuadConfig = QuadConfig(
+        weight=1.0,
+        length=0.5,
+        radius=0.2,
+        states=[[0, 0, 1], [0, 0, 0]],
+        motors=MotorConfig(10, 2),
+        lift_const=0.1,
+    )
+    control: ControlConfig = ControlConfig(
+        position=PID(Kp=[300, 300, 7000], Ki=[0.04, 0.04, 4.5], Kd=[450, 450, 5000]),
+        attitude=PID(Kp=[22000, 22000, 1500], Ki=[0, 0, 1.2], Kd=[12000, 12000, 0]),
+    )
+    with Swarm(config, control, n, workers=shards) as swarm:
+        swarm.update_target((1, 1, 1, 0))
+        swarm.run(1)
+        start: float = time.perf_counter()
+        swarm.run(ticks)
+        return n * ticks / (time.perf_counter() - start)
+
+
+def main() -> None:
+    cores: int = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--n", type=int, default=10000)
+    parser.add_argument("--ticks", type=int, default=100)
+    parser.add_argument(
+        "--shards", type=int, nargs="+",
+        default=sorted({1, *[2**k for k in range(cores.bit_length()) if 2**k <= cores], cores}),
+    )
+    args = parser.parse_args()
+
+    print(f"{args.n} vehicles, {cores} cores")
+    single: float = 0.0
+    for shards in sorted({1, *args.shards}):
+        rate: float = measure(args.n, shards, args.ticks)
+        single = single or rate
+        print(
+            f"{shards:>4} shards: {rate:12.0f} vehicle-ticks/s"
+            f"  speedup {rate / single:5.2f}  efficiency {rate / single / shards:5.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
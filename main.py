@@ -1,43 +1,8 @@
-import argparse
-import numpy as np
+import sys
 
-from quadcopter import MotorConfig, QuadConfig, load_config
-from quadcopter.quad import Quadcopter
-from quadcopter.control import PID, CPID, ControlConfig
-
-
-def main() -> None:
-    quad_config: QuadConfig = load_config("./cfg/quad.json")
-    quad: Quadcopter = Quadcopter(quad_config)
-
-    ctrl_config: ControlConfig = ControlConfig(
-        position=PID(
-            Kp=[300,300,7000],
-            Ki=[0.04,0.04,4.5],
-            Kd=[450,450,5000]
-        ),
-        attitude=PID(
-            Kp=[22000,22000,1500],
-            Ki=[0,0,1.2],
-            Kd=[12000,12000,0]
-        )
-    )
-    ctrl: CPID = CPID(ctrl_config, quad)
-
-    target: tuple = (1, 1, 1, 0)
-
-    quad.start()
-    ctrl.start()
-
-    try:
-        while True:
-            ctrl.update_target(target)
-
-    except KeyboardInterrupt:
-        quad.stop()
-        ctrl.stop()
-        print("Simulation Stopped")
+from quadcopter.cli import main
 
 
 if __name__ == '__main__':
-    main()
+    ## paced run of the example config, see `python -m quadcopter` for more
+    sys.exit(main(["run", "./cfg/run.json", "--realtime", "1"] + sys.argv[1:]))
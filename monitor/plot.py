@@ -1,9 +1,11 @@
+import time
 import numpy as np
 import matplotlib.pyplot as plt
 
+from typing import Union
 from dataclasses import dataclass
 
-from mpl_toolkits.mplot3d import Axes3D
+from matplotlib.animation import FuncAnimation
 from mpl_toolkits.mplot3d.art3d import Line3D
 
 from quadcopter import rotation_matrix
@@ -19,9 +21,13 @@ class Model(object):
 
 
 class Monitor(object):
-    def __init__(self, quad: Quadcopter) -> None:
+    def __init__(self, quad: Quadcopter, fps: float = 30.0) -> None:
+        """3d view of a quadcopter
+        @param quad: quadcopter to be monitored
+        @param fps: display rate of the blitted rendering modes
+        """
         self.fig = plt.figure()
-        self.ax = Axes3D(self.fig)
+        self.ax = self.fig.add_subplot(projection="3d")
         self.ax.set_xlim3d([-2.0, 2.0])
         self.ax.set_xlabel("X")
         self.ax.set_ylim3d([-2.0, 2.0])
@@ -33,30 +39,125 @@ class Monitor(object):
         self.quad: Quadcopter = quad
         self.load_model()
 
+        ## rendering rate and statistics
+        self.period: float = 1.0 / fps
+        self.frames: int = 0
+        self.dropped: int = 0
+        self._last: float = -np.inf
+        self._started: Union[float, None] = None
+        self._background = None
+        self._blitting: bool = False
+        self._animation: Union[FuncAnimation, None] = None
+        self.fig.canvas.mpl_connect("draw_event", self._on_draw)
+
     def load_model(self) -> None:
         line1 = Line3D([], [], [], color="b", linewidth=3, antialiased=False)
         line2 = Line3D([], [], [], color="r", linewidth=3, antialiased=False)
-        line3 = Line3D([], [], [], color="r", linewidth=3, antialiased=False)
-        
+        line3 = Line3D(
+            [], [], [], marker="o", color="k", markersize=3, antialiased=False
+        )
+        for line in (line1, line2, line3):
+            self.ax.add_line(line)
+
         L: float = self.quad.l
         point: np.ndarray = np.array([
-            [-L, 0, 0], [ L, 0, 0], [ 0,-L, 0], 
+            [-L, 0, 0], [ L, 0, 0], [ 0,-L, 0],
             [ 0, L, 0], [ 0, 0, 0], [ 0, 0, 0]
         ]).T
-        
+
         self.model: Model = Model(line1, line2, line3, point)
 
-    def update(self) -> None:
-        position, _, attitude, _ = self.quad.state
-        R: np.ndarray = rotation_matrix(attitude)
-        points = R @ self.model.points
-        points += position[:, np.newaxis]
-
-        self.model.l1.set_data(points[0, 0:2], points[1:0, 2])
-        self.model.l1.set_3d_properties(points[2, 0:2])
-        self.model.l2.set_data(points[0, 2:4], points[1, 2:4])
-        self.model.l2.set_3d_properties(points[2, 2:4])
-        self.model.node.set_data(points[0, 5], points[1, 5])
-        self.model.node.set_3d_properties(points[2, 5])
+    @property
+    def artists(self) -> tuple[Line3D, Line3D, Line3D]:
+        return self.model.l1, self.model.l2, self.model.node
+
+    @property
+    def fps(self) -> float:
+        """measured rendering rate since the first frame"""
+        if self._started is None or self.frames < 2:
+            return 0.0
+        return (self.frames - 1) / max(self._last - self._started, 1e-9)
 
+    def _set_geometry(self, state: np.ndarray) -> None:
+        R: np.ndarray = rotation_matrix(state[6:9])
+        points: np.ndarray = R @ self.model.points
+        points += state[0:3, np.newaxis]
+
+        self.model.l1.set_data_3d(points[0, 0:2], points[1, 0:2], points[2, 0:2])
+        self.model.l2.set_data_3d(points[0, 2:4], points[1, 2:4], points[2, 2:4])
+        self.model.node.set_data_3d(points[0, 5:6], points[1, 5:6], points[2, 5:6])
+
+    def update(self) -> None:
+        """full redraw of the current state, blocks for the gui event loop"""
+        self._set_geometry(self.quad.snapshot().state)
+        self._set_blitting(False)
         plt.pause(1e-5)
+
+    def _set_blitting(self, blitting: bool) -> None:
+        ## animated artists are left out of full draws, so the cached
+        ## background only holds while they are, and is rebuilt otherwise
+        if blitting == self._blitting:
+            return
+        for artist in self.artists:
+            artist.set_animated(blitting)
+        self._blitting = blitting
+        self._background = None
+
+    def _on_draw(self, event) -> None:
+        ## full draws invalidate the cached background, e.g. on resizing
+        self._background = None
+
+    def _count_frame(self, now: float) -> None:
+        if self._started is None:
+            self._started = now
+        self._last = now
+        self.frames += 1
+
+    def render(self) -> bool:
+        """blit the latest state if a frame is due, otherwise drop it and
+        return at once, so that the caller is never slowed to display rate
+        @return: whether a frame has been rendered
+        """
+        now: float = time.perf_counter()
+        if now - self._last < self.period:
+            self.dropped += 1
+            return False
+
+        canvas = self.fig.canvas
+        self._set_blitting(True)
+        if self._background is None:
+            canvas.draw()
+            self._background = canvas.copy_from_bbox(self.fig.bbox)
+
+        self._set_geometry(self.quad.snapshot().state)
+        canvas.restore_region(self._background)
+        for artist in self.artists:
+            self.ax.draw_artist(artist)
+        canvas.blit(self.fig.bbox)
+        canvas.flush_events()
+        self._count_frame(now)
+        return True
+
+    def __call__(self, sim) -> None:
+        """lockstep hook, rendering at the display rate at most"""
+        self.render()
+
+    def animate(self) -> FuncAnimation:
+        """render at the display rate from the gui timer with blitting, for
+        simulations running in their own threads
+        @return: the running animation, which must be kept referenced
+        """
+        def draw(frame: int) -> tuple[Line3D, Line3D, Line3D]:
+            self._set_geometry(self.quad.snapshot().state)
+            self._count_frame(time.perf_counter())
+            return self.artists
+
+        self._set_blitting(True)
+        self._animation = FuncAnimation(
+            self.fig,
+            draw,
+            interval=1000 * self.period,
+            blit=True,
+            cache_frame_data=False,
+        )
+        return self._animation
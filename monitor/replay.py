@@ -0,0 +1,215 @@
+"""Replay of recorded telemetry, scrubbed or played back at any speed.
+
+The recording stays memory-mapped: a frame reads the record under the
+cursor and a decimated trail, whose level of detail is chosen from the
+time window shown and the playback speed, so that the number of points
+drawn stays bounded whatever the length of the log. All vehicles are
+drawn through one collection for the bodies and one for the trails.
+
+keys: space play/pause, left/right seek, up/down speed, [/] trail window
+"""
+import math
+import time
+import bisect
+import numpy as np
+import matplotlib.pyplot as plt
+
+from typing import Union
+
+from matplotlib.widgets import Slider
+from matplotlib.animation import FuncAnimation
+from mpl_toolkits.mplot3d.art3d import Line3DCollection
+
+from quadcopter import rotation_matrix
+
+
+class Levels(object):
+    def __init__(self, records: np.ndarray, budget: int = 2000, cache: int = 1 << 20) -> None:
+        """level-of-detail decimation of the positions of a recording, level
+        `k` keeps the records whose index is a multiple of `2**k`. Coarse
+        levels are read once and cached, finer ones are read from the
+        recording for the requested window only
+        @param records: telemetry records, usually memory-mapped
+        @param budget: number of points per vehicle drawn for a window
+        @param cache: number of positions a cached level may hold
+        """
+        self.records: np.ndarray = records
+        self.budget: int = budget
+        self.cache: int = cache
+        self.times: np.ndarray = records["time"]
+        self._positions: np.ndarray = records["state"][..., 0:3]
+        self._levels: dict[int, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def index(self, t: float) -> int:
+        """latest record at or before `t`, by bisection so that only a few
+        records of the mapping are read"""
+        return max(0, bisect.bisect_right(self.times, t) - 1)
+
+    def level(self, span: int, stride: float = 1.0) -> int:
+        """coarsest level needed for a window of records
+        @param span: number of records in the window
+        @param stride: records skipped between frames at the playback speed,
+        finer details would not be seen
+        @return: level of detail
+        """
+        k: int = math.ceil(math.log2(max(1.0, span / self.budget, stride)))
+        return min(k, max(0, (len(self) - 1).bit_length()))
+
+    def positions(self, lo: int, hi: int, level: int) -> np.ndarray:
+        """decimated positions of the records `lo:hi`, aligned on the level so
+        that trails do not shimmer while the window moves
+        @return: `(M, n, 3)` positions
+        """
+        step: int = 1 << level
+        start: int = -(-lo // step)
+        if level in self._levels:
+            return self._levels[level][start : -(-hi // step)]
+
+        n: int = self._positions.shape[1]
+        if -(-len(self) // step) * n <= self.cache:
+            self._levels[level] = np.array(self._positions[::step])
+            return self._levels[level][start : -(-hi // step)]
+        return np.array(self._positions[start * step : hi : step])
+
+    def bounds(self) -> tuple[np.ndarray, np.ndarray]:
+        """lower and upper corners of the recorded positions, from a coarse
+        level of detail"""
+        points: np.ndarray = self.positions(0, len(self), self.level(len(self)))
+        points = points.reshape(-1, 3)
+        return points.min(axis=0), points.max(axis=0)
+
+
+class Replay(object):
+    def __init__(
+        self,
+        records: np.ndarray,
+        length: Union[float, np.ndarray] = 0.5,
+        fps: float = 30.0,
+        speed: float = 1.0,
+        trail: float = 10.0,
+        budget: int = 20000,
+    ) -> None:
+        """3d replay of the vehicles of a recording
+        @param records: telemetry records, see `quadcopter.telemetry.load`
+        @param length: arm length of the vehicles, one for all or one each
+        @param fps: display rate of the playback
+        @param speed: playback speed factor
+        @param trail: duration of the trails behind the vehicles, in seconds
+        @param budget: number of trail points of all vehicles together
+        """
+        if not len(records):
+            raise ValueError("Cannot replay an empty recording")
+
+        self.n: int = records["state"].shape[1]
+        self.levels: Levels = Levels(records, max(16, budget // self.n))
+        self.period: float = 1.0 / fps
+        self.speed: float = speed
+        self.trail: float = trail
+        self.playing: bool = False
+
+        self.start: float = float(self.levels.times[0])
+        self.end: float = float(self.levels.times[-1])
+        self.time: float = self.start
+        ## mean time between records, to convert durations to records
+        self._dt: float = (self.end - self.start) / max(1, len(records) - 1) or 1.0
+
+        ## arms of each vehicle in its body frame, `(N, 3, 4)`
+        L: np.ndarray = np.broadcast_to(np.asarray(length, dtype=float), (self.n,))
+        arms: np.ndarray = np.array([[-1, 1, 0, 0], [0, 0, -1, 1], [0, 0, 0, 0]], dtype=float)
+        self._arms: np.ndarray = arms[np.newaxis] * L[:, np.newaxis, np.newaxis]
+        self._rotations: np.ndarray = np.empty((self.n, 3, 3))
+
+        self.fig = plt.figure()
+        self.ax = self.fig.add_subplot(projection="3d")
+        self.ax.set_xlabel("X")
+        self.ax.set_ylabel("Y")
+        self.ax.set_zlabel("Z")
+        self.ax.set_title("Quadcopter Replay")
+        low, high = self.levels.bounds()
+        margin: float = float(np.max(L)) + 0.5
+        self.ax.set_xlim3d([low[0] - margin, high[0] + margin])
+        self.ax.set_ylim3d([low[1] - margin, high[1] + margin])
+        self.ax.set_zlim3d([low[2] - margin, high[2] + margin])
+
+        colors: np.ndarray = plt.get_cmap("tab10")(np.arange(self.n) % 10)
+        self.bodies: Line3DCollection = Line3DCollection(
+            [], colors=np.repeat(colors, 2, axis=0), linewidths=2
+        )
+        self.trails: Line3DCollection = Line3DCollection(
+            [], colors=colors, linewidths=1, alpha=0.5
+        )
+        self.ax.add_collection3d(self.bodies)
+        self.ax.add_collection3d(self.trails)
+
+        self.slider: Slider = Slider(
+            self.fig.add_axes([0.15, 0.02, 0.7, 0.03]),
+            "t", self.start, max(self.end, self.start + 1e-9), valinit=self.start,
+        )
+        self.slider.on_changed(self.seek)
+        self.fig.canvas.mpl_connect("key_press_event", self._on_key)
+        self._animation: Union[FuncAnimation, None] = None
+        self._clock: float = time.perf_counter()
+        self.show(self.start)
+
+    def show(self, t: float) -> None:
+        """draw the vehicles at `t` and their trails"""
+        self.time = min(max(t, self.start), self.end)
+        i: int = self.levels.index(self.time)
+        state: np.ndarray = np.array(self.levels.records[i]["state"])
+        position: np.ndarray = state[:, 0:3]
+
+        ## two arms per vehicle, `(2N, 2, 3)` segments
+        points: np.ndarray = rotation_matrix(state[:, 6:9], out=self._rotations) @ self._arms
+        points += position[:, :, np.newaxis]
+        self.bodies.set_segments(points.transpose(0, 2, 1).reshape(2 * self.n, 2, 3))
+
+        lo: int = self.levels.index(self.time - self.trail)
+        stride: float = self.speed * self.period / self._dt if self.playing else 1.0
+        trail: np.ndarray = self.levels.positions(lo, i + 1, self.levels.level(i + 1 - lo, stride))
+        trail = np.concatenate([trail, position[np.newaxis]]).transpose(1, 0, 2)
+        self.trails.set_segments(trail)
+
+    def seek(self, t: float) -> None:
+        self.show(t)
+        self._clock = time.perf_counter()
+        self.fig.canvas.draw_idle()
+
+    def _advance(self, frame: int) -> tuple:
+        now: float = time.perf_counter()
+        if self.playing:
+            self.show(self.time + (now - self._clock) * self.speed)
+            if self.time >= self.end:
+                self.playing = False
+            ## move the slider without seeking again
+            self.slider.eventson = False
+            self.slider.set_val(self.time)
+            self.slider.eventson = True
+        self._clock = now
+        return self.bodies, self.trails
+
+    def _on_key(self, event) -> None:
+        if event.key == " ":
+            self.playing = not self.playing
+            if self.playing and self.time >= self.end:
+                self.show(self.start)
+        elif event.key in ("left", "right"):
+            self.seek(self.time + (1 if event.key == "right" else -1) * max(1.0, self.speed))
+        elif event.key in ("up", "down"):
+            self.speed *= 2.0 if event.key == "up" else 0.5
+        elif event.key in ("[", "]"):
+            self.trail *= 2.0 if event.key == "]" else 0.5
+            self.seek(self.time)
+
+    def play(self) -> FuncAnimation:
+        """play back from the current time at the display rate
+        @return: the running animation, which must be kept referenced
+        """
+        self.playing = True
+        self._clock = time.perf_counter()
+        self._animation = FuncAnimation(
+            self.fig, self._advance, interval=1000 * self.period, cache_frame_data=False
+        )
+        return self._animation
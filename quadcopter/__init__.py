@@ -1,2 +1,4 @@
 from .utils import wrap, rotation_matrix
-from .config import MotorConfig, QuadConfig, load_config
+from .config import MotorConfig, QuadConfig, load_config, load_json_config, quad_config_from_dict
+from .quad import Motors, Quadcopter, QuadcopterBatch
+from .lockstep import Lockstep
@@ -0,0 +1,6 @@
+import sys
+
+from quadcopter.cli import main
+
+
+sys.exit(main())
@@ -0,0 +1,202 @@
+"""Benchmark suite of the simulation hot paths with regression tracking.
+
+Each case is timed as the best per-call time over several repeats and the
+results are written as json. Compared against a stored baseline, any case
+slower than the baseline by more than the threshold is reported and the
+command exits with a non-zero status.
+
+usage: python -m quadcopter.bench [--out FILE] [--baseline FILE]
+                                  [--threshold 0.25] [--update-baseline]
+"""
+import sys
+import json
+import time
+import argparse
+import platform
+import numpy as np
+
+from typing import Callable, Union
+
+from quadcopter import wrap, rotation_matrix
+from quadcopter import Motors, MotorConfig, QuadConfig
+from quadcopter.quad import Quadcopter, QuadcopterBatch
+from quadcopter.lockstep import Lockstep
+from quadcopter.control import CPID, PID, ControlConfig, BatchCPID
+from quadcopter.surrogate import SurrogateBatch
+
+
+BASELINE: str = "./benchmarks/baseline.json"
+
+
+def measure(fn: Callable[[], None], number: int, repeat: int = 5) -> float:
+    """best time per call over several repeats
+    @param fn: function to be timed
+    @param number: calls per repeat
+    @param repeat: number of repeats
+    @return: seconds per call
+    """
+    best: float = np.inf
+    for _ in range(repeat):
+        start: float = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def quad_config(z: float = 0.0) -> QuadConfig:
+    return QuadConfig(
+        weight=1.0,
+        length=0.5,
+        radius=0.2,
+        states=[[0, 0, z], [0, 0, 0]],
+        motors=MotorConfig(10, 2),
+        lift_const=0.1,
+    )
+
+
+def control_config() -> ControlConfig:
+    return ControlConfig(
+        position=PID(Kp=[300, 300, 7000], Ki=[0.04, 0.04, 4.5], Kd=[450, 450, 5000]),
+        attitude=PID(Kp=[22000, 22000, 1500], Ki=[0, 0, 1.2], Kd=[12000, 12000, 0]),
+    )
+
+
+def episode(n: int, horizon: float) -> Callable[[], None]:
+    """closed-loop episode of `n` vehicles, 1 kHz physics, 200 Hz control"""
+    def run() -> None:
+        if n == 1:
+            quad = Quadcopter(quad_config(), "rk4")
+            ctrl = CPID(control_config(), quad)
+        else:
+            quad = QuadcopterBatch([quad_config()] * n)
+            ctrl = BatchCPID(control_config(), quad)
+        ctrl.update_target((1, 1, 1, 0))
+        Lockstep(quad, ctrl).run_until(horizon)
+    return run
+
+
+def surrogate_episode(n: int, horizon: float) -> Callable[[], None]:
+    """closed-loop episode of `n` linear surrogates, stepped at 200 Hz"""
+    def run() -> None:
+        quad = SurrogateBatch(quad_config(), n)
+        ctrl = BatchCPID(control_config(), quad)
+        ctrl.update_target((1, 1, 1, 0))
+        Lockstep(quad, ctrl, dt=5e-3, ctrl_period=5e-3).run_until(horizon)
+    return run
+
+
+def cases(quick: bool = False) -> dict[str, tuple[Callable[[], None], int]]:
+    """benchmark cases, mapping names to a function and its calls per repeat"""
+    scale: int = 10 if quick else 1
+    angles: np.ndarray = np.array([0.1, -0.2, 0.3])
+    speeds: np.ndarray = np.full(4, 3000.0)
+    motors: Motors = Motors(MotorConfig(10, 2))
+
+    ## airborne high enough to keep falling through every repeat, the
+    ## thrust is below the weight and a grounded quad skips the integrator
+    quads: dict[str, Quadcopter] = {
+        name: Quadcopter(quad_config(z=100.0), name) for name in ("vode", "rk4", "rk45")
+    }
+    for quad in quads.values():
+        quad.set_motor_speeds(speeds)
+    quad: Quadcopter = quads["rk4"]
+    out: np.ndarray = np.empty(12)
+    thrust: np.ndarray = quad.motors.thrust
+
+    ctrl: CPID = CPID(control_config(), quad)
+    ctrl.update_target((1, 1, 1, 0))
+
+    def set_speeds() -> None:
+        motors.speeds = speeds
+
+    table: dict[str, tuple[Callable[[], None], int]] = {
+        "rotation_matrix": (lambda: rotation_matrix(angles), 20000 // scale),
+        "wrap": (lambda: wrap(angles), 20000 // scale),
+        "motors.speeds": (set_speeds, 20000 // scale),
+        "quadcopter._fetch_state": (
+            lambda: quad._fetch_state(0.0, quad.state, thrust, out), 20000 // scale
+        ),
+        "cpid._update": (ctrl._update, 5000 // scale),
+    }
+    for name, q in quads.items():
+        table[f"quadcopter._update[{name}]"] = (lambda q=q: q._update(1e-3), 2000 // scale)
+    for n in (1, 10, 100):
+        for horizon in ((0.5,) if quick else (1.0, 5.0)):
+            table[f"episode[n={n},T={horizon:g}]"] = (episode(n, horizon), 1)
+            table[f"surrogate[n={n},T={horizon:g}]"] = (surrogate_episode(n, horizon), 1)
+    return table
+
+
+def run(quick: bool = False, repeat: int = 5) -> dict:
+    results: dict[str, float] = {}
+    for name, (fn, number) in cases(quick).items():
+        results[name] = measure(fn, max(1, number), 1 if quick else repeat)
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+        },
+        "results": results,
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float = 0.25) -> list[tuple[str, float]]:
+    """cases slower than the baseline by more than the threshold
+    @param results: new results
+    @param baseline: baseline results
+    @param threshold: relative slowdown tolerated, e.g. `0.25` for 25%
+    @return: name and relative slowdown of each regression
+    """
+    regressions: list[tuple[str, float]] = []
+    for name, seconds in results["results"].items():
+        reference: Union[float, None] = baseline["results"].get(name)
+        if reference and seconds > reference * (1 + threshold):
+            regressions.append((name, seconds / reference - 1))
+    return regressions
+
+
+def main(argv: Union[list[str], None] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", default=None, help="json file receiving the results")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--threshold", type=float, default=0.25)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--quick", action="store_true", help="fewer calls, for smoke tests")
+    args = parser.parse_args(argv)
+
+    results: dict = run(args.quick)
+    baseline: Union[dict, None] = None
+    if not args.update_baseline:
+        try:
+            with open(args.baseline, "r") as file:
+                baseline = json.load(file)
+        except FileNotFoundError:
+            print(f"no baseline at {args.baseline}, run with --update-baseline")
+
+    for name, seconds in results["results"].items():
+        line: str = f"{name:>32}: {seconds * 1e6:12.2f} us"
+        if baseline is not None and baseline["results"].get(name):
+            line += f"  ({seconds / baseline['results'][name] - 1:+7.1%} vs baseline)"
+        print(line)
+
+    if args.out is not None:
+        with open(args.out, "w") as file:
+            json.dump(results, file, indent=2)
+    if args.update_baseline:
+        with open(args.baseline, "w") as file:
+            json.dump(results, file, indent=2)
+        return 0
+
+    regressions: list[tuple[str, float]] = (
+        [] if baseline is None else compare(results, baseline, args.threshold)
+    )
+    for name, slowdown in regressions:
+        print(f"REGRESSION {name}: {slowdown:+.1%} slower than baseline", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,200 @@
+"""Checkpoints of a simulation, restored or forked into many branches.
+
+A checkpoint is one fixed-size binary record holding everything needed to
+continue a `Quadcopter` driven by a `CPID` exactly where it stopped: the
+sim time, the states, the rotor speeds and their commands, the step size
+of adaptive integrators, the PID integrators, the target, the start time
+of a followed trajectory and the latest errors. The trajectory itself is
+not stored, it is given again to `restore` or `fork`. What-if runs
+simulate the common prefix once and fork the checkpoint into a
+`QuadcopterBatch`, one branch per alternative.
+"""
+import struct
+import numpy as np
+
+from typing import Union
+
+from quadcopter import QuadConfig
+from quadcopter.quad import Quadcopter, QuadcopterBatch
+from quadcopter.quad.integrators import Integrator
+from quadcopter.control import CPID, ControlConfig, BatchCPID, Trajectory
+
+
+## record layout of a checkpoint, 312 bytes, `nan` marks a missing value
+CHECKPOINT: np.dtype = np.dtype([
+    ("time", "<f8"),
+    ("state", "<f8", (12,)),
+    ("speeds", "<f8", (4,)),
+    ("step_size", "<f8"),
+    ("position_ie", "<f8", (3,)),
+    ("attitude_ie", "<f8", (3,)),
+    ("target", "<f8", (4,)),
+    ("error", "<f8", (6,)),
+    ("command", "<f8", (4,)),
+    ("trajectory_t0", "<f8"),
+])
+
+MAGIC: bytes = b"QCKP"
+VERSION: int = 1
+HEADER: struct.Struct = struct.Struct("<4sHHI")
+
+
+def capture(quad: Quadcopter, ctrl: Union[CPID, None] = None) -> np.ndarray:
+    """checkpoint of a quadcopter and its controller, values are copied
+    @param quad: simulated quadcopter
+    @param ctrl: controller of the quadcopter, or `None`
+    @return: checkpoint record, a 0-d array of `CHECKPOINT`
+    """
+    checkpoint: np.ndarray = np.full((), np.nan, dtype=CHECKPOINT)
+    checkpoint["time"] = quad.time
+    checkpoint["state"] = quad.state
+    checkpoint["speeds"] = quad.motors.speeds
+    checkpoint["command"] = quad.motors.command
+    if quad.solver.h is not None:
+        checkpoint["step_size"] = quad.solver.h
+
+    if ctrl is not None:
+        checkpoint["position_ie"] = ctrl.position.Ie
+        checkpoint["attitude_ie"] = ctrl.attitude.Ie
+        checkpoint["error"] = ctrl.error
+        if ctrl.target is not None:
+            t_pos, t_yaw = ctrl.target
+            checkpoint["target"][0:3] = t_pos
+            checkpoint["target"][3] = t_yaw[0]
+        if ctrl.trajectory is not None:
+            checkpoint["trajectory_t0"] = ctrl.trajectory_t0
+    return checkpoint
+
+
+def _restore_solver(solver: Integrator, step_size: float) -> None:
+    solver.h = None if np.isnan(step_size) else float(step_size)
+
+
+def _trajectory_t0(checkpoints: np.ndarray, trajectory: Union[Trajectory, None]) -> float:
+    ## start time of the trajectory followed at the checkpoint, `nan` if none
+    t0: np.ndarray = np.unique(checkpoints["trajectory_t0"])
+    if len(t0) > 1:
+        raise ValueError("Checkpoints must follow their trajectories from the same time")
+
+    if not np.isnan(t0[0]) and trajectory is None:
+        raise ValueError("Checkpoint follows a trajectory, it must be given to continue")
+    return float(t0[0])
+
+
+def restore(
+    checkpoint: np.ndarray,
+    quad: Quadcopter,
+    ctrl: Union[CPID, None] = None,
+    sim=None,
+    trajectory: Union[Trajectory, None] = None,
+) -> None:
+    """continue a simulation from a checkpoint, the quadcopter and the
+    controller must have been built from the configs of the checkpointed run
+    @param checkpoint: checkpoint record
+    @param quad: quadcopter receiving the states
+    @param ctrl: controller receiving the PID integrators and the target
+    @param sim: optional `Lockstep` whose clock is moved to the checkpoint
+    @param trajectory: trajectory followed by the controller when the
+    checkpoint was captured, required if it followed one
+    """
+    quad.time = float(checkpoint["time"])
+    quad.state[:] = checkpoint["state"]
+    quad.motors.reset(np.array(checkpoint["speeds"]), np.array(checkpoint["command"]))
+    _restore_solver(quad.solver, checkpoint["step_size"])
+
+    if ctrl is not None:
+        ctrl.position.Ie[:] = checkpoint["position_ie"]
+        ctrl.attitude.Ie[:] = checkpoint["attitude_ie"]
+        ctrl.error[:] = np.nan_to_num(checkpoint["error"])
+        t0: float = _trajectory_t0(checkpoint, trajectory)
+        if not np.isnan(t0):
+            ctrl.follow(trajectory, t0)
+        elif np.isnan(checkpoint["target"]).any():
+            ctrl.target = None
+        else:
+            ctrl.update_target(tuple(checkpoint["target"]))
+
+    if sim is not None:
+        t0: float = sim.time - sim.steps * sim.dt
+        sim.steps = round((quad.time - t0) / sim.dt)
+    quad.publish()
+
+
+def fork(
+    checkpoint: np.ndarray,
+    n: int,
+    quad_config: QuadConfig,
+    ctrl_config: Union[ControlConfig, list[ControlConfig]],
+    integrator: Union[str, Integrator] = "rk4",
+    trajectory: Union[Trajectory, None] = None,
+) -> tuple[QuadcopterBatch, BatchCPID]:
+    """fork a checkpoint into `n` independent branches simulated in one
+    batch, e.g. before giving each branch its own target. A `Lockstep` of
+    the batch starts at `t0=checkpoint["time"]`, the checkpoint must be
+    captured on a controller tick to keep the controller phase
+    @param checkpoint: one checkpoint shared by all branches, or `n`
+    checkpoints, e.g. of different runs
+    @param n: number of branches
+    @param quad_config: config of the checkpointed quadcopter
+    @param ctrl_config: control config shared by all branches, or one
+    config per branch
+    @param integrator: integrator of the batch
+    @param trajectory: trajectory followed when the checkpoints were
+    captured, shared by all branches or one per branch, required if they
+    followed one
+    @return: batch of quadcopters and its controller
+    """
+    checkpoints: np.ndarray = np.broadcast_to(checkpoint, (n,))
+    if len(np.unique(checkpoints["time"])) > 1:
+        raise ValueError("Forked checkpoints must share the same sim time")
+
+    t0: float = _trajectory_t0(checkpoints, trajectory)
+
+    quad: QuadcopterBatch = QuadcopterBatch([quad_config] * n, integrator)
+    ctrl: BatchCPID = BatchCPID(ctrl_config, quad)
+
+    quad.time = float(checkpoints["time"][0])
+    quad.state[:] = checkpoints["state"]
+    quad.motors.reset(np.array(checkpoints["speeds"]), np.array(checkpoints["command"]))
+    ## a shared adaptive integrator restarts from the smallest step size
+    step_sizes: np.ndarray = checkpoints["step_size"]
+    _restore_solver(quad.solver, np.nan if np.isnan(step_sizes).all() else np.nanmin(step_sizes))
+    ctrl.position.Ie[:] = checkpoints["position_ie"]
+    ctrl.attitude.Ie[:] = checkpoints["attitude_ie"]
+    ctrl.error[:] = np.nan_to_num(checkpoints["error"])
+    if not np.isnan(t0):
+        ctrl.follow(trajectory, t0)
+    elif not np.isnan(checkpoints["target"]).any():
+        ctrl.update_target(checkpoints["target"])
+
+    quad.publish()
+    return quad, ctrl
+
+
+def to_bytes(checkpoints: np.ndarray) -> bytes:
+    """compact binary form of one or many checkpoints, a header of 12 bytes
+    followed by the raw records"""
+    records: np.ndarray = np.ascontiguousarray(np.atleast_1d(checkpoints), dtype=CHECKPOINT)
+    return HEADER.pack(MAGIC, VERSION, CHECKPOINT.itemsize, len(records)) + records.tobytes()
+
+
+def from_bytes(data: bytes) -> np.ndarray:
+    """checkpoints from their binary form
+    @return: `(K,)` array of checkpoint records
+    """
+    magic, version, itemsize, count = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION or itemsize != CHECKPOINT.itemsize:
+        raise ValueError("Data is not a checkpoint of a supported version")
+    if len(data) != HEADER.size + count * itemsize:
+        raise ValueError("Checkpoint data is truncated")
+    return np.frombuffer(data, dtype=CHECKPOINT, count=count, offset=HEADER.size).copy()
+
+
+def save(path: str, checkpoints: np.ndarray) -> None:
+    with open(path, "wb") as file:
+        file.write(to_bytes(checkpoints))
+
+
+def load(path: str) -> np.ndarray:
+    with open(path, "rb") as file:
+        return from_bytes(file.read())
@@ -0,0 +1,175 @@
+"""Command line entry point of the simulator.
+
+usage: python -m quadcopter COMMAND [options]
+
+commands:
+  run         simulate a run config headless, optionally paced or rendered
+  replay      scrub or play a telemetry file back, all vehicles at once
+  sweep       parallel gain sweep, see `quadcopter.sweep`
+  tune        population-based gain tuner, see `quadcopter.tune`
+  montecarlo  robustness under perturbed configs, see `quadcopter.montecarlo`
+  bench       benchmark suite, see `quadcopter.bench`
+  swarm       parallel swarm over shared memory, see `quadcopter.swarm`
+  server      local simulation server and load test, see `quadcopter.server`
+
+A run config is a json file extending a quadcopter config such as
+`cfg/quad.json`, see `cfg/run.json`. Besides the quadcopter it holds a
+`control` section, a `target` `[x, y, z, yaw]` or a `trajectory` with
+`waypoints` and `speed`, and optionally `duration`, `dt`, `ctrl_period`,
+`integrator`, `attitude` and `sensors`, configs of the `gyro`, `accel`,
+`baro` and `gps` and a noise `seed`, to close the loop on an estimate of
+the state. Modules are imported by the chosen command only, scipy by the
+`vode` integrators and matplotlib by the renderers.
+"""
+import sys
+import time
+import argparse
+import importlib
+import numpy as np
+
+from typing import Callable, Union
+
+from quadcopter import load_json_config, quad_config_from_dict
+from quadcopter.scheduler import Scheduler
+
+
+## commands implemented by the `main` of another module
+DELEGATES: dict[str, str] = {
+    "sweep": "quadcopter.sweep",
+    "tune": "quadcopter.tune",
+    "montecarlo": "quadcopter.montecarlo",
+    "bench": "quadcopter.bench",
+    "swarm": "quadcopter.swarm",
+    "server": "quadcopter.server",
+}
+
+
+def build(config: dict):
+    """simulation described by a run config
+    @param config: merged run config
+    @return: lockstep runner of the quadcopter and its controller
+    """
+    from quadcopter.quad import Quadcopter
+    from quadcopter.lockstep import Lockstep
+    from quadcopter.control import CPID, Trajectory, control_config_from_dict
+
+    quad: Quadcopter = Quadcopter(
+        quad_config_from_dict(config), config.get("integrator", "rk4"), config.get("attitude", "euler")
+    )
+    ctrl: CPID = CPID(control_config_from_dict(config["control"]), quad)
+    ## the runner moves the quadcopter onto the simulated clock, which the
+    ## trajectory is then followed from
+    sim: Lockstep = Lockstep(quad, ctrl, config.get("dt", 1e-3), config.get("ctrl_period", 5e-3))
+    if "trajectory" in config:
+        spec: dict = config["trajectory"]
+        ctrl.follow(Trajectory.from_waypoints(
+            spec["waypoints"], spec["speed"], spec.get("rate", 1000.0), spec.get("method", "linear")
+        ))
+    elif "target" in config:
+        ctrl.update_target(tuple(config["target"]))
+    else:
+        raise ValueError("Run config needs a `target` or a `trajectory`")
+
+    if "sensors" in config:
+        from quadcopter.sensors import Sensors, sensors_config_from_dict
+        from quadcopter.estimator import ComplementaryFilter
+
+        spec: dict = config["sensors"]
+        sensors: Sensors = Sensors(quad, sensors_config_from_dict(spec), spec.get("seed"))
+        ctrl.estimator = ComplementaryFilter(sensors)
+        sim.hooks.append(ctrl.estimator)
+    return sim
+
+
+def run(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(prog="quadcopter run", description="simulate a run config")
+    parser.add_argument("config", help="run config, extending a quadcopter config")
+    parser.add_argument("--duration", type=float, default=None, help="overrides the config")
+    parser.add_argument("--out", default=None, help="telemetry `.npy` file")
+    parser.add_argument("--every", type=int, default=1, help="record every n physics steps")
+    parser.add_argument("--realtime", type=float, default=None, metavar="FACTOR",
+                        help="pace the simulated clock against the wall clock")
+    parser.add_argument("--monitor", action="store_true", help="render the quadcopter")
+    args = parser.parse_args(argv)
+
+    config: dict = load_json_config(args.config)
+    duration: float = args.duration if args.duration is not None else config.get("duration", 5.0)
+    sim = build(config)
+
+    recorder = None
+    if args.out is not None:
+        from quadcopter.telemetry import Recorder
+
+        recorder = Recorder(args.out, every=args.every)
+        sim.hooks.append(recorder)
+    if args.monitor:
+        from monitor.plot import Monitor
+
+        sim.hooks.append(Monitor(sim.quad))
+
+    ## physics and controller run as tasks at their own rates, paced against
+    ## the wall clock or as fast as possible
+    scheduler: Scheduler = Scheduler(args.realtime, t0=sim.time)
+    sim.schedule(scheduler)
+    start: float = time.perf_counter()
+    try:
+        scheduler.run(duration)
+    except KeyboardInterrupt:
+        print("Simulation Stopped")
+    finally:
+        if recorder is not None:
+            recorder.close()
+
+    elapsed: float = time.perf_counter() - start
+    state: np.ndarray = sim.quad.state
+    print(f"simulated {sim.time:.3f}s in {elapsed:.3f}s ({sim.time / max(elapsed, 1e-9):.1f}x)")
+    print(f"position  : {np.array2string(state[0:3], precision=4)}")
+    print(f"attitude  : {np.array2string(state[6:9], precision=4)}")
+    if args.realtime:
+        print(scheduler.report())
+    return 0
+
+
+def replay(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(prog="quadcopter replay", description="play telemetry back")
+    parser.add_argument("telemetry", help="telemetry `.npy` file")
+    parser.add_argument("--config", default="./cfg/quad.json", help="quadcopter config")
+    parser.add_argument("--speed", type=float, default=1.0, help="playback speed factor")
+    parser.add_argument("--trail", type=float, default=10.0, help="trail window in seconds")
+    args = parser.parse_args(argv)
+
+    import matplotlib.pyplot as plt
+    from monitor.replay import Replay
+    from quadcopter.telemetry import load
+
+    records = load(args.telemetry)
+    if not len(records):
+        print(f"no records in {args.telemetry}")
+        return 1
+
+    ## the config only carries the geometry of the replayed vehicles
+    length: float = load_json_config(args.config)["length"]
+    viewer: Replay = Replay(records, length, speed=args.speed, trail=args.trail)
+    animation = viewer.play()
+    plt.show()
+    del animation
+    return 0
+
+
+COMMANDS: dict[str, Callable[[list[str]], int]] = {"run": run, "replay": replay}
+
+
+def main(argv: Union[list[str], None] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    names: list[str] = sorted(list(COMMANDS) + list(DELEGATES))
+    if not argv or argv[0] not in names:
+        print(__doc__.strip())
+        return 0 if argv and argv[0] in ("-h", "--help") else 2
+
+    command, rest = argv[0], argv[1:]
+    if command in COMMANDS:
+        return COMMANDS[command](rest)
+
+    ## delegated commands keep their own usage, e.g. `quadcopter sweep -h`
+    status = importlib.import_module(DELEGATES[command]).main(rest)
+    return status or 0
@@ -1,4 +1,6 @@
+import os
 import json
+from typing import Union
 from dataclasses import dataclass, field
 
 
@@ -8,6 +10,8 @@ class MotorConfig(object):
     pitch: float
     speed: float = field(default=0.0)
     force: float = field(default=0.0)
+    tau: float = field(default=0.0)                 # rotor time constant, 0 for no lag
+    curve: Union[str, None] = field(default=None)   # measured thrust curve file
 
 
 @dataclass
@@ -21,10 +25,34 @@ class QuadConfig(object):
     lift_const: float
 
 
-def load_config(file_path: str) -> QuadConfig:
+def load_json_config(file_path: str) -> dict:
+    """read a json config, a config may extend others by naming them in an
+    `extends` entry, a path or a list of paths relative to the config, whose
+    sections are merged recursively and overridden by its own
+    @param file_path: json config file
+    @return: merged config
+    """
     with open(file_path, "r") as file:
-        data = json.load(file)
+        data: dict = json.load(file)
+
+    bases: Union[str, list[str]] = data.pop("extends", [])
+    merged: dict = {}
+    for base in [bases] if isinstance(bases, str) else bases:
+        _merge(merged, load_json_config(os.path.join(os.path.dirname(file_path), base)))
+    _merge(merged, data)
+    return merged
+
+
+def _merge(into: dict, data: dict) -> None:
+    for key, value in data.items():
+        if isinstance(value, dict) and isinstance(into.get(key), dict):
+            _merge(into[key], value)
+        else:
+            into[key] = value
 
+
+def quad_config_from_dict(data: dict) -> QuadConfig:
+    """build a quadcopter config from its json form, see `cfg/quad.json`"""
     return QuadConfig(
         weight=data["weight"],
         length=data["length"],
@@ -35,7 +63,13 @@ def load_config(file_path: str) -> QuadConfig:
         ],
         motors=MotorConfig(
             d=data["motors"]["diameter"],
-            pitch=data["motors"]["pitch"]
+            pitch=data["motors"]["pitch"],
+            tau=data["motors"].get("tau", 0.0),
+            curve=data["motors"].get("curve"),
         ),
         lift_const=data["lift_const"]
     )
+
+
+def load_config(file_path: str) -> QuadConfig:
+    return quad_config_from_dict(load_json_config(file_path))
@@ -1,2 +1,5 @@
+from .trajectory import Trajectory
 from .controller import Controller
 from .cpid import CPID, PID, ControlConfig
+from .cpid import control_config_from_dict, control_config_to_dict, load_control_config
+from .batch import BatchCPID, BatchPID
@@ -0,0 +1,144 @@
+import numpy as np
+
+from typing import Union
+
+from quadcopter import wrap
+from quadcopter.quad import QuadcopterBatch
+from quadcopter.control import Controller
+from quadcopter.control.cpid import PID, ControlConfig
+from quadcopter.control.trajectory import Trajectory
+
+
+class BatchPID(object):
+    def __init__(self, Kp: np.ndarray, Ki: np.ndarray, Kd: np.ndarray) -> None:
+        """PID controllers of many vehicles, gains and integrator are `(N, 3)`"""
+        self.Kp: np.ndarray = np.array(Kp, dtype=float)
+        self.Ki: np.ndarray = np.array(Ki, dtype=float)
+        self.Kd: np.ndarray = np.array(Kd, dtype=float)
+        self.Ie: np.ndarray = np.zeros_like(self.Kp)
+
+    @staticmethod
+    def stack(pids: list[PID]) -> "BatchPID":
+        """stack scalar PID controllers, keeping their integrator state
+        @param pids: PID controller of each vehicle
+        @return: batched PID controller
+        """
+        batch: BatchPID = BatchPID(
+            [pid.Kp for pid in pids], [pid.Ki for pid in pids], [pid.Kd for pid in pids]
+        )
+        batch.Ie[:] = [pid.Ie for pid in pids]
+        return batch
+
+    def update(self, error: np.ndarray, derror: np.ndarray) -> np.ndarray:
+        """update the PID controllers and return the controller outputs
+        @param error: the error terms, `(N, 3)`
+        @param derror: the derivative of error terms, `(N, 3)`
+        @return: control outputs, `(N, 3)`
+        """
+        self.Ie += self.Ki * error
+        return self.Kp * error + self.Ie + self.Kd * derror
+
+
+class BatchCPID(Controller):
+    def __init__(
+        self, config: Union[ControlConfig, list[ControlConfig]], quad: QuadcopterBatch
+    ) -> None:
+        """cascade PID controller of many vehicles, the same control law as
+        `CPID` evaluated for all vehicles in one call
+        @param config: one configuration shared by all vehicles, or one
+        configuration per vehicle, e.g. one gain set per vehicle
+        @param quad: batch of quadcopters to be controlled
+        """
+        super(BatchCPID, self).__init__(quad)
+        configs: list[ControlConfig] = (
+            [config] * len(quad) if isinstance(config, ControlConfig) else config
+        )
+        if len(configs) != len(quad):
+            raise ValueError("Number of control configs must match number of quadcopters")
+
+        self.position: BatchPID = BatchPID.stack([c.position for c in configs])
+        self.attitude: BatchPID = BatchPID.stack([c.attitude for c in configs])
+
+        ## initialize value clipper, `(N, 2)` columns of lower and upper bounds
+        self._yaw_limit: np.ndarray = np.array([c.yaw_limit for c in configs], dtype=float)
+        self.tilt_limit: np.ndarray = np.array([c.tilt_limit for c in configs], dtype=float)
+        self.motor_limit: np.ndarray = np.array([c.motor_limit for c in configs], dtype=float)
+        if np.any(self.motor_limit[:, 0] < 0):
+            raise ValueError("Lower motor limit should be positive or zero")
+
+        ## initialize the mixer matrix
+        self._mixer_matrix: np.ndarray = np.array(
+            [[1, 1, 0, 1], [1, 0, 1, -1], [1, -1, 0, 1], [1, 0, -1, -1]], dtype=float
+        )
+
+        ## latest position and attitude errors, for telemetry
+        self.error: np.ndarray = np.zeros((len(quad), 6))
+
+    def update_target(self, target: np.ndarray) -> None:
+        """set the targets, `(x, y, z, yaw)` shared by all vehicles or one
+        target per vehicle as a `(N, 4)` array"""
+        target = np.broadcast_to(np.asarray(target, dtype=float), (len(self.quad), 4))
+        self.target: tuple[np.ndarray, np.ndarray] = (
+            target[:, :3].copy(),
+            wrap(target[:, 3]),
+        )
+        self.trajectory = None
+
+    def follow(self, trajectory: Trajectory, t0: Union[float, None] = None) -> None:
+        """track a trajectory shared by all vehicles, or one trajectory per
+        vehicle with `(N, 4)` targets, sampled at every controller tick
+        @param trajectory: trajectory of the vehicles
+        @param t0: simulated time at which the trajectory starts
+        """
+        if trajectory.shape == (4,):
+            trajectory = trajectory.broadcast(len(self.quad))
+        if trajectory.shape != (len(self.quad), 4):
+            raise ValueError("Trajectory must have targets of shape (4,) or (N, 4)")
+
+        self.trajectory = trajectory
+        self.trajectory_t0 = self.quad.time if t0 is None else t0
+        self._track()
+
+    def _track(self) -> None:
+        target: np.ndarray = self.trajectory.sample(self.quad.time - self.trajectory_t0)
+        self.target = (target[:, 0:3], target[:, 3])
+
+    def compute(self, state: np.ndarray) -> np.ndarray:
+        """compute the motor commands of all vehicles
+        @param state: states of all vehicles, `(N, 12)`
+        @return: clipped motor commands, `(N, 4)`
+        """
+        t_pos, t_yaw = self.target
+        position, velocity, attitude, angular_rate = (
+            state[:, 0:3],
+            state[:, 3:6],
+            state[:, 6:9],
+            state[:, 9:12],
+        )
+        motor_lo, motor_hi = self.motor_limit[:, 0], self.motor_limit[:, 1]
+        tilt_lo, tilt_hi = self.tilt_limit[:, 0], self.tilt_limit[:, 1]
+
+        ## position controller and clipping
+        error_pos: np.ndarray = t_pos - position
+        ux, uy, uz = self.position.update(error_pos, velocity).T
+        uz = np.clip(uz, motor_lo, motor_hi)
+
+        ## attitude controller and clipping
+        roll, pitch, yaw = attitude.T
+        yaw_rate = angular_rate[:, 2]
+        sin, cos = np.sin(yaw), np.cos(yaw)
+        ax = np.clip(ux * sin - uy * cos, tilt_lo, tilt_hi)
+        ay = np.clip(ux * cos + uy * sin, tilt_lo, tilt_hi)
+
+        error_att: np.ndarray = np.stack(
+            [ax - roll, ay - pitch, 0.18 * (wrap(t_yaw - yaw)) - yaw_rate], axis=1
+        )
+        wx, wy, wz = self.attitude.update(error_att, angular_rate).T
+        wz = np.clip(wz, self._yaw_limit[:, 0], self._yaw_limit[:, 1])
+        self.error[:, 0:3], self.error[:, 3:6] = error_pos, error_att
+
+        m: np.ndarray = np.stack([uz, wx, wy, wz], axis=1) @ self._mixer_matrix.T
+        return np.clip(m, motor_lo[:, np.newaxis], motor_hi[:, np.newaxis])
+
+    def _update(self) -> None:
+        self._set_motors(self.compute(self.feedback()))
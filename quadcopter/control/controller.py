@@ -7,16 +7,26 @@ from abc import ABC, abstractmethod
 
 from quadcopter import wrap
 from quadcopter import Quadcopter
+from quadcopter.control.trajectory import Trajectory
 
 
 class Controller(ABC):
     def __init__(self, quad: Quadcopter) -> None:
         super(Controller, self).__init__()
         self.quad: Quadcopter = quad
-        self._set_motors: Callable[[np.ndarray], None] = self.quad.set_motor_speeds
+        ## controller outputs are clipped to the motor limits, they skip the
+        ## validation of `set_motor_speeds`
+        self._set_motors: Callable[[np.ndarray], None] = self.quad.motors.set
 
         self._thread: Union[threading.Thread, None] = None
         self._execute: threading.Event = threading.Event()
+        self.target: Union[tuple[np.ndarray, np.ndarray], None] = None
+        self.trajectory: Union[Trajectory, None] = None
+        ## simulated time at which the followed trajectory starts
+        self.trajectory_t0: float = 0.0
+        ## state estimator closing the loop instead of the true state, any
+        ## object with a `state` such as `ComplementaryFilter`
+        self.estimator = None
 
     def start(self, dt: float = 5e-3, scale: float = 1.0) -> None:
         self._execute.set()
@@ -29,6 +39,7 @@ class Controller(ABC):
             self._thread.join()
 
     def update_target(self, target: tuple[float, float, float, float]) -> None:
+        """hold a constant target, replacing any followed trajectory"""
         if len(target) != 4:
             raise ValueError(
                 "Input target must be a tuple with exactly four elements: (x, y, z, yaw)"
@@ -38,16 +49,50 @@ class Controller(ABC):
             np.array(target[:3], dtype=float),
             wrap(np.array([target[3]], dtype=float)),
         )
+        self.trajectory = None
+
+    def follow(self, trajectory: Trajectory, t0: Union[float, None] = None) -> None:
+        """track a trajectory, its target is sampled from the precomputed
+        table at every controller tick instead of being pushed by the caller
+        @param trajectory: trajectory of the controlled vehicle
+        @param t0: simulated time at which the trajectory starts, the current
+        time of the quadcopter by default
+        """
+        if trajectory.shape != (4,):
+            raise ValueError("Trajectory must have targets of shape (4,)")
+
+        self.trajectory = trajectory
+        self.trajectory_t0 = self.quad.time if t0 is None else t0
+        self._track()
+
+    def _track(self) -> None:
+        ## views into the table, the yaw of the table is already wrapped
+        target: np.ndarray = self.trajectory.sample(self.quad.time - self.trajectory_t0)
+        self.target = (target[0:3], target[3:4])
+
+    def feedback(self) -> np.ndarray:
+        """state fed back to the control law, the estimate of the estimator
+        if any, the true state otherwise"""
+        if self.estimator is None:
+            return self.quad.snapshot().state
+        return self.estimator.state
+
+    def step(self) -> None:
+        """run a single controller update against the current target"""
+        if self.trajectory is not None:
+            self._track()
+        self._update()
 
     def _threading(self, dt: float, scale: float) -> None:
-        rate: float = scale * dt
-        last: float = self.quad.time
+        rate: float = dt / scale
+        deadline: float = time.perf_counter() + rate
         while self._execute.is_set():
-            time.sleep(0)
-            current_time: float = self.quad.time
-            if last - current_time > rate:
+            time.sleep(max(0.0, deadline - time.perf_counter()))
+            deadline += rate
+            if self.trajectory is not None:
+                self._track()
+            if self.target is not None:
                 self._update()
-                last = current_time
 
     @abstractmethod
     def _update(self) -> None:
@@ -4,6 +4,7 @@ import numpy as np
 from dataclasses import dataclass, field
 
 from quadcopter import wrap
+from quadcopter.config import load_json_config
 from quadcopter.quad import Quadcopter
 from quadcopter.control import Controller
     
@@ -33,10 +34,49 @@ class ControlConfig(object):
     yaw_limit: tuple[int, int] = (-900, 900)
     tilt_limit: tuple[int, int] = (-10, 10)
     motor_limit: tuple[int, int] = (4000, 9000)
- 
+
+
+def control_config_from_dict(data: dict) -> ControlConfig:
+    """build a control config from its dictionary form, e.g. the `control`
+    section of a json config file. Missing limits keep their defaults."""
+    limits: dict = {
+        key: tuple(data[key])
+        for key in ("yaw_limit", "tilt_limit", "motor_limit") if key in data
+    }
+    return ControlConfig(
+        position=PID(**data["position"]),
+        attitude=PID(**data["attitude"]),
+        **limits
+    )
+
+
+def control_config_to_dict(config: ControlConfig) -> dict:
+    return {
+        "position": {
+            "Kp": config.position.Kp.tolist(),
+            "Ki": config.position.Ki.tolist(),
+            "Kd": config.position.Kd.tolist(),
+        },
+        "attitude": {
+            "Kp": config.attitude.Kp.tolist(),
+            "Ki": config.attitude.Ki.tolist(),
+            "Kd": config.attitude.Kd.tolist(),
+        },
+        "yaw_limit": list(config.yaw_limit),
+        "tilt_limit": list(config.tilt_limit),
+        "motor_limit": list(config.motor_limit),
+    }
+
+
+def load_control_config(file_path: str) -> ControlConfig:
+    return control_config_from_dict(load_json_config(file_path)["control"])
+
 
 class CPID(Controller):
     def __init__(self, config: ControlConfig, quad: Quadcopter) -> None:
+        if config.motor_limit[0] < 0:
+            raise ValueError("Lower motor limit should be positive or zero")
+
         super(CPID, self).__init__(quad)
         self.position: PID = config.position
         self.attitude: PID = config.attitude
@@ -51,9 +91,12 @@ class CPID(Controller):
             [[1, 1, 0, 1], [1, 0, 1, -1], [1, -1, 0, 1], [1, 0, -1, -1]]
         )
 
+        ## latest position and attitude errors, for telemetry
+        self.error: np.ndarray = np.zeros(6)
+
     def _update(self) -> None:
-        t_pos, t_yaw = self.target
-        state: np.ndarray = self.quad.state
+        t_pos, (t_yaw,) = self.target
+        state: np.ndarray = self.feedback()
         position, velocity, attitude, angular_rate = (
             state[0:3],
             state[3:6],
@@ -82,6 +125,7 @@ class CPID(Controller):
         )
         wx, wy, wz = self.attitude.update(error_att, angular_rate)
         wz = np.clip(wz, self._yaw_limit[0], self._yaw_limit[1])
+        self.error[0:3], self.error[3:6] = error_pos, error_att
 
         m = np.matmul(self._mixer_matrix, np.array([uz, wx, wy, wz]))
         m = np.clip(m, self.motor_limit[0], self.motor_limit[1])
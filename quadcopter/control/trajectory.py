@@ -0,0 +1,135 @@
+import numpy as np
+
+from typing import Callable, Union
+
+from quadcopter import wrap
+
+
+class Trajectory(object):
+    def __init__(
+        self,
+        times: np.ndarray,
+        points: np.ndarray,
+        rate: float = 1000.0,
+        method: str = "linear",
+    ) -> None:
+        """time-parameterized targets `(x, y, z, yaw)` interpolated once into a
+        dense table, sampled in constant time at every controller tick. The
+        first and last targets are held outside of the time span
+        @param times: increasing times of the points, `(M,)`
+        @param points: targets at these times, `(M, 4)` or `(M, N, 4)` for
+        one trajectory per vehicle
+        @param rate: rate of the table in Hz
+        @param method: `linear`, `previous` to hold each point until the next
+        one, or `cubic` for a cubic spline
+        """
+        times = np.asarray(times, dtype=float)
+        points = np.array(points, dtype=float)
+        if points.ndim < 2 or points.shape[-1] != 4 or len(points) != len(times):
+            raise ValueError("Points must be `(M, 4)` or `(M, N, 4)` targets, one per time")
+
+        if len(times) > 1 and np.any(np.diff(times) <= 0):
+            raise ValueError("Times of trajectory must be increasing")
+
+        if rate <= 0:
+            raise ValueError("Rate of trajectory table should be positive")
+
+        ## yaw is interpolated continuously across the wrapping
+        points[..., 3] = np.unwrap(points[..., 3], axis=0)
+
+        self.rate: float = rate
+        self.t0: float = float(times[0])
+        self.duration: float = float(times[-1] - times[0])
+        grid: np.ndarray = self.t0 + np.arange(round(self.duration * rate) + 1) / rate
+        self._table: np.ndarray = self._interpolate(times, points, grid, method)
+        self._table[..., 3] = wrap(self._table[..., 3])
+        self._last: int = len(self._table) - 1
+
+    @staticmethod
+    def _interpolate(
+        times: np.ndarray, points: np.ndarray, grid: np.ndarray, method: str
+    ) -> np.ndarray:
+        if len(times) == 1:
+            return points.copy()
+
+        if method == "cubic":
+            from scipy.interpolate import CubicSpline
+
+            return CubicSpline(times, points, axis=0)(grid)
+
+        k: np.ndarray = np.clip(np.searchsorted(times, grid, side="right") - 1, 0, len(times) - 2)
+        if method == "previous":
+            return points[np.where(grid >= times[-1], len(times) - 1, k)]
+
+        if method != "linear":
+            raise ValueError(f"Unknown interpolation method: {method}")
+        weight: np.ndarray = np.clip((grid - times[k]) / (times[k + 1] - times[k]), 0, 1)
+        weight = weight.reshape((-1,) + (1,) * (points.ndim - 1))
+        return points[k] + weight * (points[k + 1] - points[k])
+
+    @classmethod
+    def from_waypoints(
+        cls, waypoints: np.ndarray, speed: float, rate: float = 1000.0, method: str = "linear"
+    ) -> "Trajectory":
+        """trajectory through waypoints at a constant speed, the time of each
+        waypoint follows from the straight-line distance to the previous one
+        @param waypoints: targets `(x, y, z, yaw)`, `(M, 4)`
+        @param speed: travel speed, in meters per second
+        """
+        waypoints = np.asarray(waypoints, dtype=float)
+        if speed <= 0:
+            raise ValueError("Speed of trajectory should be positive")
+
+        distances: np.ndarray = np.linalg.norm(np.diff(waypoints[:, 0:3], axis=0), axis=1)
+        ## waypoints at the same position still get a table step apart
+        times: np.ndarray = np.concatenate(
+            [[0.0], np.cumsum(np.maximum(distances / speed, 1 / rate))]
+        )
+        return cls(times, waypoints, rate, method)
+
+    @classmethod
+    def from_function(
+        cls, fn: Callable[[np.ndarray], np.ndarray], duration: float, rate: float = 1000.0
+    ) -> "Trajectory":
+        """tabulate a time-parameterized trajectory, e.g. a spline
+        @param fn: vectorized function mapping `(K,)` times to `(K, 4)` or
+        `(K, N, 4)` targets
+        @param duration: time span of the trajectory, starting at 0
+        """
+        times: np.ndarray = np.arange(round(duration * rate) + 1) / rate
+        return cls(times, fn(times), rate)
+
+    @property
+    def shape(self) -> tuple[int, ...]:
+        """shape of one target, `(4,)` or `(N, 4)`"""
+        return self._table.shape[1:]
+
+    @property
+    def table(self) -> np.ndarray:
+        return self._table
+
+    def broadcast(self, n: int) -> "Trajectory":
+        """the same trajectory for `n` vehicles, sharing the table memory"""
+        if self.shape != (4,):
+            raise ValueError("Only a single vehicle trajectory can be broadcast")
+
+        batch: Trajectory = object.__new__(Trajectory)
+        batch.__dict__.update(self.__dict__)
+        batch._table = np.broadcast_to(self._table[:, np.newaxis], (len(self._table), n, 4))
+        return batch
+
+    def sample(self, t: float) -> np.ndarray:
+        """target at time `t`, a read-only row of the table
+        @param t: time of trajectory
+        @return: `(4,)` or `(N, 4)` target
+        """
+        i: int = int((t - self.t0) * self.rate + 0.5)
+        return self._table[min(max(i, 0), self._last)]
+
+    def samples(self, times: np.ndarray) -> np.ndarray:
+        """targets at many times at once, e.g. for offline evaluation
+        @param times: times of trajectory, `(K,)`
+        @return: `(K, 4)` or `(K, N, 4)` targets
+        """
+        i: np.ndarray = np.rint((np.asarray(times) - self.t0) * self.rate).astype(int)
+        return self._table[np.clip(i, 0, self._last)]
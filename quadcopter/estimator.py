@@ -0,0 +1,129 @@
+import math
+import numpy as np
+
+from typing import Union
+
+from quadcopter import wrap, rotation_matrix
+from quadcopter.lockstep import Lockstep
+from quadcopter.sensors import Sensors
+
+
+class ComplementaryFilter(object):
+    def __init__(
+        self,
+        sensors: Sensors,
+        tilt: float = 0.002,
+        altitude: float = 0.05,
+        position: float = 0.2,
+        velocity: float = 0.2,
+    ) -> None:
+        """state estimate of a quadcopter, or of each vehicle of a batch,
+        from its sensors. The gyro and the accelerometer are integrated
+        between measurements of the other sensors, which pull the estimate
+        towards them by a fraction of their innovation: the tilt of the
+        gravity seen by the accelerometer, the barometric altitude and the
+        GPS position and velocity. A delayed measurement is compared with
+        the estimate at its time, kept in a short history. The yaw is not
+        observed and drifts with the bias of the gyro.
+        Run it after every physics step as a hook of `Lockstep`, and set it
+        as the `estimator` of the controller to close the loop on it
+        @param sensors: sensors of the quadcopters
+        @param tilt: gain of the accelerometer on roll and pitch
+        @param altitude: gain of the barometer on the altitude
+        @param position: gain of the GPS on the position
+        @param velocity: gain of the GPS on the velocity
+        """
+        for gain in (tilt, altitude, position, velocity):
+            if not 0 <= gain <= 1:
+                raise ValueError("Gains of complementary filter should be within [0, 1]")
+
+        self.sensors: Sensors = sensors
+        self.tilt: float = tilt
+        self.altitude: float = altitude
+        self.position: float = position
+        self.velocity: float = velocity
+
+        ## estimates start from the true state, `(n, 12)`
+        state: np.ndarray = sensors.quad.snapshot().state
+        self.n: int = sensors.n
+        self._x: np.ndarray = np.array(state, dtype=float).reshape(self.n, 12)
+        self._state: np.ndarray = self._x if state.ndim == 2 else self._x[0]
+        self._force: np.ndarray = np.zeros((self.n, 3))
+        self._force[:, 2] = 9.81
+        self._rotation: np.ndarray = np.empty((self.n, 3, 3))
+        self._tilt: np.ndarray = np.empty((self.n, 2))
+
+        ## ring of the past positions and velocities, one per step over the
+        ## longest latency, sized at the first update once `dt` is known
+        self._latency: float = max(sensors.baro.config.latency, sensors.gps.config.latency)
+        self._history: Union[np.ndarray, None] = None
+        self._head: int = 0
+
+    @property
+    def state(self) -> np.ndarray:
+        """estimated state, `(12,)` or `(n, 12)` like the state of the
+        quadcopters"""
+        return self._state
+
+    def __call__(self, runner: Lockstep) -> None:
+        self.update(runner.time, runner.dt)
+
+    def update(self, t: float, dt: float) -> None:
+        """sample the sensors and advance the estimate over a step
+        @param t: current time
+        @param dt: duration of the step
+        """
+        measurements: dict[str, tuple[float, np.ndarray]] = self.sensors.update(t, dt)
+        x: np.ndarray = self._x
+
+        ## attitude from the gyro, corrected in tilt by the gravity
+        if "gyro" in measurements:
+            x[:, 9:12] = measurements["gyro"][1]
+        x[:, 6:9] += x[:, 9:12] * dt
+        if "accel" in measurements:
+            self._force[...] = measurements["accel"][1]
+            fx, fy, fz = self._force.T
+            tilt: np.ndarray = self._tilt
+            np.arctan2(fy, fz, out=tilt[:, 0])
+            np.arctan2(-fx, np.hypot(fy, fz), out=tilt[:, 1])
+            np.degrees(tilt, out=tilt)
+            tilt -= x[:, 6:8]
+            tilt *= self.tilt
+            x[:, 6:8] += tilt
+        wrap(x[:, 6:9], out=x[:, 6:9])
+
+        ## position and velocity from the specific force
+        rotation_matrix(x[:, 6:9], out=self._rotation)
+        acceleration: np.ndarray = np.matmul(self._rotation, self._force[:, :, np.newaxis])[..., 0]
+        acceleration[:, 2] -= 9.81
+        x[:, 3:6] += acceleration * dt
+        x[:, 0:3] += x[:, 3:6] * dt
+
+        self._record(dt)
+        if "baro" in measurements:
+            stamp, z = measurements["baro"]
+            self._correct(self._past(t, stamp, dt)[:, 2], z, self.altitude, slice(2, 3))
+        if "gps" in measurements:
+            stamp, fix = measurements["gps"]
+            past: np.ndarray = self._past(t, stamp, dt)
+            self._correct(past[:, 0:3], fix[:, 0:3], self.position, slice(0, 3))
+            self._correct(past[:, 3:6], fix[:, 3:6], self.velocity, slice(3, 6))
+
+    def _record(self, dt: float) -> None:
+        if self._history is None:
+            size: int = math.ceil(self._latency / dt) + 2
+            self._history = np.repeat(self._x[np.newaxis, :, 0:6], size, axis=0)
+        self._head = (self._head + 1) % len(self._history)
+        self._history[self._head] = self._x[:, 0:6]
+
+    def _past(self, t: float, stamp: float, dt: float) -> np.ndarray:
+        """estimated positions and velocities at the time of a measurement"""
+        back: int = min(round((t - stamp) / dt), len(self._history) - 1)
+        return self._history[(self._head - back) % len(self._history)]
+
+    def _correct(self, past: np.ndarray, z: np.ndarray, gain: float, columns: slice) -> None:
+        ## the correction shifts the whole history along with the estimate,
+        ## so that the next delayed measurement does not correct it again
+        innovation: np.ndarray = gain * (z.reshape(self.n, -1) - past.reshape(self.n, -1))
+        self._x[:, columns] += innovation
+        self._history[:, :, columns] += innovation
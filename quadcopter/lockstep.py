@@ -0,0 +1,105 @@
+import math
+
+from typing import Callable, Union
+
+from quadcopter.quad import Quadcopter
+from quadcopter.control import Controller
+from quadcopter.scheduler import Scheduler, Task
+
+
+class Lockstep(object):
+    def __init__(
+        self,
+        quad: Quadcopter,
+        ctrl: Union[Controller, None] = None,
+        dt: float = 1e-3,
+        ctrl_period: float = 5e-3,
+        t0: float = 0.0,
+        hooks: Union[list[Callable[["Lockstep"], None]], None] = None,
+    ) -> None:
+        """headless runner which advances the physics and the controller
+        on a simulated clock, as fast as the cpu allows
+        @param quad: quadcopter to be simulated
+        @param ctrl: controller driving the quadcopter, or `None`
+        @param dt: fixed time step of physics
+        @param ctrl_period: period of controller, a multiple of `dt`
+        @param t0: initial simulated time
+        @param hooks: callables invoked with the runner after every physics
+        step, e.g. a telemetry recorder
+        """
+        if dt <= 0:
+            raise ValueError("Time step of physics should be positive")
+
+        decimation: int = round(ctrl_period / dt)
+        if decimation < 1 or not math.isclose(decimation * dt, ctrl_period):
+            raise ValueError("Controller period must be a multiple of physics time step")
+
+        self.quad: Quadcopter = quad
+        self.ctrl: Union[Controller, None] = ctrl
+        self.dt: float = dt
+        self.ctrl_period: float = ctrl_period
+        self.hooks: list[Callable[["Lockstep"], None]] = list(hooks or [])
+
+        self._t0: float = t0
+        self._steps: int = 0
+        self._decimation: int = decimation
+        self.quad.time = t0
+
+    @property
+    def time(self) -> float:
+        return self._t0 + self._steps * self.dt
+
+    @property
+    def steps(self) -> int:
+        return self._steps
+
+    @steps.setter
+    def steps(self, steps: int) -> None:
+        """move the simulated clock, e.g. to resume from a checkpoint"""
+        self._steps = steps
+        self.quad.time = self.time
+
+    def step(self) -> None:
+        """advance a single physics step, running the controller first
+        whenever its tick falls on the current step."""
+        if self.ctrl is not None and self._steps % self._decimation == 0:
+            self.ctrl.step()
+        self._advance()
+
+    def _advance(self) -> None:
+        self._steps += 1
+        self.quad.step(self.dt, self.time)
+        for hook in self.hooks:
+            hook(self)
+
+    def schedule(self, scheduler: Scheduler) -> list[Task]:
+        """register the physics and the controller as tasks of a scheduler
+        at their own rates, e.g. to pace the simulation against the wall
+        clock, the controller runs first on the ticks they share
+        @param scheduler: scheduler whose clock starts at the current time
+        @return: the registered tasks
+        """
+        ## both tasks tick at the physics rate, the controller every
+        ## `decimation` ticks, so that their due times coincide exactly
+        rate: float = 1.0 / self.dt
+        tasks: list[Task] = []
+        if self.ctrl is not None:
+            tasks.append(scheduler.add(
+                "control", lambda t: self.ctrl.step(), rate, -1, every=self._decimation
+            ))
+        tasks.append(scheduler.add("physics", lambda t: self._advance(), rate))
+        return tasks
+
+    def run(self, n_steps: int) -> None:
+        """advance the simulation by a number of physics steps
+        @param n_steps: number of physics steps
+        """
+        for _ in range(n_steps):
+            self.step()
+
+    def run_until(self, t: float) -> None:
+        """advance the simulation until the simulated clock reaches `t`,
+        rounded to the nearest physics step
+        @param t: simulated time to stop at
+        """
+        self.run(max(0, round((t - self._t0) / self.dt) - self._steps))
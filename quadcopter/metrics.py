@@ -0,0 +1,71 @@
+import numpy as np
+
+from dataclasses import dataclass, asdict
+
+
+@dataclass
+class StepResponse(object):
+    rise_time: float
+    overshoot: float
+    settling_time: float
+    steady_state_error: float
+    saturation: float
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def step_response(
+    t: np.ndarray,
+    position: np.ndarray,
+    target: np.ndarray,
+    commands: np.ndarray = None,
+    motor_limit: tuple[float, float] = None,
+    band: float = 0.02,
+) -> StepResponse:
+    """Evaluate the response to a position step, the trajectory is projected
+    onto the step direction so that it rises from 0 to 1
+    @param t: sample times, `(T,)`
+    @param position: sampled positions, `(T, 3)`
+    @param target: target position, `(3,)`
+    @param commands: optional motor commands, `(K, 4)`
+    @param motor_limit: limits of the motor commands
+    @param band: settling band relative to the step size
+    @return: rise time (10% to 90%), overshoot (relative), settling time,
+    steady-state error (distance at the end) and actuator saturation fraction
+    """
+    target = np.asarray(target, dtype=float)
+    step: np.ndarray = target - position[0]
+    size: float = float(np.dot(step, step))
+    response: np.ndarray = (
+        (position - position[0]) @ step / size if size > 0 else np.ones(len(t))
+    )
+    finite: bool = bool(np.all(np.isfinite(response)))
+
+    rise_time: float = np.inf
+    if finite:
+        above_10: np.ndarray = np.flatnonzero(response >= 0.1)
+        above_90: np.ndarray = np.flatnonzero(response >= 0.9)
+        if len(above_10) and len(above_90):
+            rise_time = float(t[above_90[0]] - t[above_10[0]])
+
+    settling_time: float = np.inf
+    if finite:
+        outside: np.ndarray = np.flatnonzero(np.abs(response - 1) > band)
+        if len(outside) == 0:
+            settling_time = 0.0
+        elif outside[-1] + 1 < len(t):
+            settling_time = float(t[outside[-1] + 1] - t[0])
+
+    saturation: float = 0.0
+    if commands is not None and motor_limit is not None and np.size(commands):
+        lo, hi = motor_limit
+        saturation = float(np.mean((commands <= lo) | (commands >= hi)))
+
+    return StepResponse(
+        rise_time=rise_time,
+        overshoot=float(max(0.0, np.max(response) - 1)) if finite else np.inf,
+        settling_time=settling_time,
+        steady_state_error=float(np.linalg.norm(target - position[-1])) if finite else np.inf,
+        saturation=saturation,
+    )
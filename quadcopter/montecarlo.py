@@ -0,0 +1,294 @@
+"""Monte Carlo robustness of a control config under perturbed quadcopters.
+
+Thousands of configs are sampled around a base quadcopter with a seeded
+random generator, one independent stream per episode so that results do
+not depend on the number of workers. Episodes run headless in worker
+processes which write their metrics, and optionally decimated
+trajectories, straight into shared memory arrays.
+
+usage: python -m quadcopter.montecarlo CONTROL [--config FILE] [--n 1000]
+                                       [--seed 0] [--workers N] [--sensors]
+"""
+import argparse
+import numpy as np
+
+from typing import Union
+from dataclasses import dataclass, replace
+from multiprocessing import Pool, shared_memory
+
+from quadcopter import QuadConfig, load_config
+from quadcopter.quad import Quadcopter
+from quadcopter.lockstep import Lockstep
+from quadcopter.sensors import Sensors, SensorsConfig
+from quadcopter.estimator import ComplementaryFilter
+from quadcopter.control import CPID, ControlConfig
+from quadcopter.control import control_config_from_dict, control_config_to_dict, load_control_config
+
+
+## columns of the metrics array
+METRICS: tuple[str, ...] = (
+    "rms_error", "max_error", "final_error", "crashed", "diverged", "failed"
+)
+
+
+@dataclass
+class Perturbation(object):
+    weight: float = 0.1         # relative standard deviations
+    length: float = 0.05
+    lift_const: float = 0.1
+    diameter: float = 0.05
+    pitch: float = 0.05
+    position: float = 0.1       # absolute standard deviations
+    attitude: float = 0.02
+
+
+def sample_config(
+    base: QuadConfig, perturbation: Perturbation, rng: np.random.Generator
+) -> QuadConfig:
+    """perturb a quadcopter config, relative parameters stay positive
+    @param base: base quadcopter config
+    @param perturbation: standard deviations of the perturbations
+    @param rng: random number generator of the episode
+    @return: perturbed quadcopter config
+    """
+    def scale(value: float, sigma: float) -> float:
+        return value * float(np.exp(rng.normal(0.0, sigma)))
+
+    return replace(
+        base,
+        weight=scale(base.weight, perturbation.weight),
+        length=scale(base.length, perturbation.length),
+        lift_const=scale(base.lift_const, perturbation.lift_const),
+        motors=replace(
+            base.motors,
+            d=scale(base.motors.d, perturbation.diameter),
+            pitch=scale(base.motors.pitch, perturbation.pitch),
+        ),
+        states=[
+            (np.array(base.states[0]) + rng.normal(0.0, perturbation.position, 3)).tolist(),
+            (np.array(base.states[1]) + rng.normal(0.0, perturbation.attitude, 3)).tolist(),
+        ],
+    )
+
+
+def episode(
+    quad_config: QuadConfig,
+    ctrl_config: ControlConfig,
+    target: tuple[float, float, float, float],
+    duration: float,
+    dt: float = 1e-3,
+    ctrl_period: float = 5e-3,
+    crash_speed: float = 1.0,
+    bound: float = 100.0,
+    tolerance: float = 0.1,
+    trajectory: Union[np.ndarray, None] = None,
+    sensors: Union[SensorsConfig, None] = None,
+    noise_seed: int = 0,
+) -> np.ndarray:
+    """simulate one episode and evaluate the tracking of the target
+    @param crash_speed: downward speed at touchdown counted as a crash
+    @param bound: distance to the target counted as a divergence
+    @param tolerance: final distance to the target counted as a failure
+    @param trajectory: optional `(K, 12)` array receiving the states at
+    `K` evenly spaced controller ticks
+    @param sensors: optional sensors config, the controller is then fed
+    back the estimate of a complementary filter instead of the true state
+    @param noise_seed: seed of the noise and biases of the sensors
+    @return: metrics in the order of `METRICS`
+    """
+    quad: Quadcopter = Quadcopter(quad_config, "rk4")
+    ctrl: CPID = CPID(ctrl_config, quad)
+    ctrl.update_target(target)
+    sim: Lockstep = Lockstep(quad, ctrl, dt, ctrl_period)
+    if sensors is not None:
+        ctrl.estimator = ComplementaryFilter(Sensors(quad, sensors, noise_seed))
+        sim.hooks.append(ctrl.estimator)
+
+    ticks: int = round(duration / ctrl_period)
+    if ticks < 1:
+        raise ValueError("Duration of episode must cover a controller period")
+
+    decimation: int = round(ctrl_period / dt)
+    every: int = max(1, ticks // len(trajectory)) if trajectory is not None else 0
+    goal: np.ndarray = np.array(target[:3], dtype=float)
+    errors: np.ndarray = np.full(ticks, np.nan)
+    crashed: bool = False
+    diverged: bool = False
+
+    with np.errstate(all="ignore"):
+        for k in range(ticks):
+            sim.run(decimation)
+            state: np.ndarray = quad.state
+            errors[k] = np.linalg.norm(goal - state[0:3])
+            crashed |= quad.impact_speed > crash_speed
+            if every and k % every == 0 and k // every < len(trajectory):
+                trajectory[k // every] = state
+            if not np.isfinite(errors[k]) or errors[k] > bound:
+                diverged = True
+                break
+
+    tracked: np.ndarray = errors[np.isfinite(errors)]
+    final: float = float(errors[k]) if np.isfinite(errors[k]) else np.inf
+    return np.array([
+        float(np.sqrt(np.mean(tracked**2))) if len(tracked) else np.inf,
+        float(np.max(tracked)) if len(tracked) else np.inf,
+        final,
+        crashed,
+        diverged,
+        crashed or diverged or not final <= tolerance,
+    ])
+
+
+## shared arrays and settings of a worker process
+_worker: dict = {}
+
+
+def _attach(names: dict, shapes: dict, settings: dict) -> None:
+    _worker.clear()
+    _worker["settings"] = settings
+    for key, name in names.items():
+        shm: shared_memory.SharedMemory = shared_memory.SharedMemory(name=name)
+        _worker[key] = (shm, np.ndarray(shapes[key], dtype=float, buffer=shm.buf))
+
+
+def _run(indices: range) -> int:
+    settings: dict = _worker["settings"]
+    metrics: np.ndarray = _worker["metrics"][1]
+    trajectories: Union[np.ndarray, None] = (
+        _worker["trajectories"][1] if "trajectories" in _worker else None
+    )
+    for i in indices:
+        ## the `i`-th child of `SeedSequence(seed).spawn(n)`, without
+        ## spawning the children of the other episodes
+        rng: np.random.Generator = np.random.default_rng(
+            np.random.SeedSequence(settings["seed"], spawn_key=(i,))
+        )
+        quad_config: QuadConfig = sample_config(
+            settings["base"], settings["perturbation"], rng
+        )
+        metrics[i] = episode(
+            quad_config,
+            control_config_from_dict(settings["control"]),
+            trajectory=None if trajectories is None else trajectories[i],
+            noise_seed=int(rng.integers(2**63)),
+            **settings["options"],
+        )
+    return len(indices)
+
+
+def run(
+    base: QuadConfig,
+    control: Union[ControlConfig, dict],
+    n: int,
+    seed: int = 0,
+    perturbation: Union[Perturbation, None] = None,
+    workers: Union[int, None] = None,
+    samples: int = 0,
+    chunk: int = 16,
+    **options,
+) -> tuple[np.ndarray, Union[np.ndarray, None]]:
+    """run `n` perturbed episodes over a pool of worker processes
+    @param base: base quadcopter config
+    @param control: control config under test
+    @param n: number of episodes
+    @param seed: seed of the random streams
+    @param perturbation: standard deviations of the perturbations
+    @param workers: number of worker processes, all cores by default
+    @param samples: number of decimated states per trajectory, 0 for none
+    @param chunk: number of episodes per task
+    @param options: `target`, `duration` and the options of `episode`
+    @return: `(n, len(METRICS))` metrics and `(n, samples, 12)` trajectories
+    """
+    shapes: dict[str, tuple] = {"metrics": (n, len(METRICS))}
+    if samples:
+        shapes["trajectories"] = (n, samples, 12)
+
+    blocks: dict[str, shared_memory.SharedMemory] = {
+        key: shared_memory.SharedMemory(create=True, size=max(8, int(np.prod(shape)) * 8))
+        for key, shape in shapes.items()
+    }
+    try:
+        arrays: dict[str, np.ndarray] = {
+            key: np.ndarray(shapes[key], dtype=float, buffer=block.buf)
+            for key, block in blocks.items()
+        }
+        for array in arrays.values():
+            array.fill(np.nan)
+
+        settings: dict = {
+            "n": n,
+            "seed": seed,
+            "base": base,
+            "perturbation": perturbation or Perturbation(),
+            "control": control if isinstance(control, dict) else control_config_to_dict(control),
+            "options": options,
+        }
+        names: dict[str, str] = {key: block.name for key, block in blocks.items()}
+        tasks: list[range] = [range(i, min(n, i + chunk)) for i in range(0, n, chunk)]
+        with Pool(workers, initializer=_attach, initargs=(names, shapes, settings)) as pool:
+            for _ in pool.imap_unordered(_run, tasks):
+                pass
+
+        metrics: np.ndarray = arrays["metrics"].copy()
+        trajectories: Union[np.ndarray, None] = (
+            arrays["trajectories"].copy() if samples else None
+        )
+        del arrays
+    finally:
+        for block in blocks.values():
+            block.close()
+            block.unlink()
+    return metrics, trajectories
+
+
+def summarize(metrics: np.ndarray) -> dict:
+    """aggregate statistics of the episodes"""
+    column: dict[str, np.ndarray] = {name: metrics[:, i] for i, name in enumerate(METRICS)}
+    rms: np.ndarray = column["rms_error"][np.isfinite(column["rms_error"])]
+    percentiles: dict[str, float] = {
+        f"p{p}": float(np.percentile(rms, p)) if len(rms) else np.inf
+        for p in (50, 90, 95, 99)
+    }
+    return {
+        "episodes": len(metrics),
+        "failure_rate": float(np.mean(column["failed"] > 0)),
+        "crashed": int(np.sum(column["crashed"] > 0)),
+        "diverged": int(np.sum(column["diverged"] > 0)),
+        "rms_error": percentiles,
+    }
+
+
+def main(argv: Union[list[str], None] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("control", help="json file with a `control` section")
+    parser.add_argument("--config", default="./cfg/quad.json", help="quadcopter config")
+    parser.add_argument("--n", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--target", type=float, nargs=4, default=(1, 1, 1, 0))
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--sensors", action="store_true",
+                        help="close the loop on noisy sensors through an estimator")
+    args = parser.parse_args(argv)
+
+    metrics, _ = run(
+        load_config(args.config),
+        load_control_config(args.control),
+        args.n,
+        args.seed,
+        workers=args.workers,
+        target=tuple(args.target),
+        duration=args.duration,
+        sensors=SensorsConfig() if args.sensors else None,
+    )
+    summary: dict = summarize(metrics)
+    print(f"episodes      : {summary['episodes']}")
+    print(f"failure rate  : {summary['failure_rate']:.1%}")
+    print(f"crashed       : {summary['crashed']}")
+    print(f"diverged      : {summary['diverged']}")
+    for name, value in summary["rms_error"].items():
+        print(f"rms error {name:>3} : {value:.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+import os
+import json
+import math
+import time
+import threading
+import functools
+
+from typing import Callable, Union
+from collections import deque
+
+
+class Histogram(object):
+    def __init__(self, low: float = 1e-7, decades: int = 9, per_decade: int = 10) -> None:
+        """histogram over logarithmic buckets, starting at `low`
+        @param low: upper edge of the first bucket
+        @param decades: number of decades covered above `low`
+        @param per_decade: number of buckets per decade
+        """
+        self.low: float = low
+        self.per_decade: int = per_decade
+        self.buckets: list[int] = [0] * (decades * per_decade + 2)
+        self.count: int = 0
+        self.total: float = 0.0
+        self.min: float = math.inf
+        self.max: float = -math.inf
+
+    def add(self, value: float) -> None:
+        index: int = (
+            0 if value <= self.low
+            else min(len(self.buckets) - 1, 1 + int(math.log10(value / self.low) * self.per_decade))
+        )
+        self.buckets[index] += 1
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, p: float) -> float:
+        """upper edge of the bucket holding the `p` percentile, `0 <= p <= 100`"""
+        if not self.count:
+            return 0.0
+        rank: float = p / 100 * self.count
+        seen: int = 0
+        for index, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank and n:
+                return min(self.max, self.low * 10 ** (index / self.per_decade))
+        return self.max
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "min": self.min if self.count else 0.0,
+            "max": self.max if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+        }
+
+
+class Profiler(object):
+    def __init__(self, max_events: int = 100000) -> None:
+        """opt-in instrumentation of the simulation hot paths. Methods are
+        wrapped on the instances given to `attach` only, so nothing is paid
+        by objects which are not attached, nor after `detach`
+        @param max_events: number of latest spans kept for the timeline
+        """
+        self.histograms: dict[str, Histogram] = {}
+        self.counters: dict[str, int] = {}
+        self.events: deque = deque(maxlen=max_events)
+        self._origin: float = time.perf_counter()
+        self._wrapped: list[tuple[object, str]] = []
+
+    def _histogram(self, name: str, **options) -> Histogram:
+        if name not in self.histograms:
+            self.histograms[name] = Histogram(**options)
+        return self.histograms[name]
+
+    def count(self, name: str, n: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def record(self, name: str, start: float, duration: float) -> None:
+        """record a span measured with `time.perf_counter`"""
+        self._histogram(name).add(duration)
+        thread: threading.Thread = threading.current_thread()
+        self.events.append((name, thread.ident, thread.name, start, duration))
+
+    def wrap(self, obj: object, method: str, name: Union[str, None] = None) -> None:
+        """time every call of a method of one instance
+        @param obj: instance whose method is wrapped
+        @param method: name of the method
+        @param name: name of the span, `<class>.<method>` by default
+        """
+        name = name or f"{type(obj).__name__.lower()}.{method}"
+        fn: Callable = getattr(obj, method)
+
+        @functools.wraps(fn)
+        def timed(*args, **kwargs):
+            start: float = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.record(name, start, time.perf_counter() - start)
+
+        setattr(obj, method, timed)
+        self._wrapped.append((obj, method))
+
+    def _wrap_quadcopter(self, quad) -> None:
+        evaluations: list[int] = [0]
+        fetch_state: Callable = quad._fetch_state
+        update: Callable = quad._update
+
+        @functools.wraps(fetch_state)
+        def counted(*args, **kwargs):
+            evaluations[0] += 1
+            return fetch_state(*args, **kwargs)
+
+        @functools.wraps(update)
+        def timed(dt: float) -> None:
+            evaluations[0] = 0
+            start: float = time.perf_counter()
+            try:
+                update(dt)
+            finally:
+                self.record("quadcopter._update", start, time.perf_counter() - start)
+                self._histogram("quadcopter._fetch_state/step", low=1, decades=3).add(evaluations[0])
+                self.count("quadcopter._fetch_state", evaluations[0])
+
+        quad._fetch_state = counted
+        quad._update = timed
+        self._wrapped += [(quad, "_fetch_state"), (quad, "_update")]
+
+    def attach(self, quad=None, ctrl=None, monitor=None) -> "Profiler":
+        """instrument `Quadcopter._update` with the number of evaluations of
+        `_fetch_state` per step, `CPID._update` and the monitor rendering
+        @return: the profiler itself
+        """
+        if quad is not None:
+            self._wrap_quadcopter(quad)
+        if ctrl is not None:
+            self.wrap(ctrl, "_update")
+        if monitor is not None:
+            self.wrap(monitor, "update")
+            self.wrap(monitor, "render")
+        return self
+
+    def detach(self) -> None:
+        """remove every wrapper, restoring the plain methods"""
+        for obj, method in reversed(self._wrapped):
+            vars(obj).pop(method, None)
+        self._wrapped.clear()
+
+    def query(self) -> dict:
+        """histogram summaries and counters collected so far"""
+        return {
+            "histograms": {name: h.summary() for name, h in self.histograms.items()},
+            "counters": dict(self.counters),
+        }
+
+    def report(self) -> str:
+        lines: list[str] = []
+        for name, h in self.histograms.items():
+            s: dict = h.summary()
+            unit, scale = ("", 1) if name.endswith("/step") else ("us", 1e6)
+            lines.append(
+                f"{name:>32}: {s['count']:8d} calls  mean {s['mean'] * scale:10.2f}{unit}  "
+                f"p50 {s['p50'] * scale:10.2f}{unit}  p99 {s['p99'] * scale:10.2f}{unit}"
+            )
+        return "\n".join(lines)
+
+    def chrome_trace(self) -> dict:
+        """timeline of the recorded spans in the Chrome trace event format,
+        loadable in Perfetto or `chrome://tracing`, one track per thread"""
+        pid: int = os.getpid()
+        events: list[dict] = []
+        threads: dict[int, str] = {}
+        for name, tid, thread, start, duration in list(self.events):
+            threads[tid] = thread
+            events.append({
+                "name": name,
+                "ph": "X",
+                "ts": (start - self._origin) * 1e6,
+                "dur": duration * 1e6,
+                "pid": pid,
+                "tid": tid,
+            })
+        for tid, thread in threads.items():
+            events.append({
+                "name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": thread}
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export(self, path: str) -> None:
+        with open(path, "w") as file:
+            json.dump(self.chrome_trace(), file)
@@ -1,2 +1,3 @@
 from .motors import Motors
 from .quadcopter import Quadcopter
+from .batch import QuadcopterBatch
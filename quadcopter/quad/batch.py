@@ -0,0 +1,252 @@
+import numpy as np
+
+from typing import Union
+
+from quadcopter import QuadConfig, wrap
+from quadcopter.snapshot import Snapshot, SnapshotBuffer
+from quadcopter.quad.motors import Motors
+from quadcopter.quad.integrators import Integrator, make_integrator
+from quadcopter.quad.contact import crossing
+
+
+class QuadcopterBatch(object):
+    def __init__(
+        self,
+        configs: list[QuadConfig],
+        integrator: Union[str, Integrator] = "rk4",
+        state: Union[np.ndarray, None] = None,
+        speeds: Union[np.ndarray, None] = None,
+    ) -> None:
+        """many quadcopters simulated together, the states are stored as a
+        `(N, 12)` array and the motor thrusts as a `(N, 4)` array
+        @param configs: configuration of each quadcopter
+        @param integrator: `rk4`, `rk45` or an integrator supporting `out=`
+        @param state: optional `(N, 12)` buffer holding the states, e.g. a
+        view of shared memory, it is initialized and then updated in place
+        @param speeds: optional `(N, 4)` buffer holding the motor speeds
+        """
+        self.n: int = len(configs)
+        self.w: np.ndarray = np.array([config.weight for config in configs], dtype=float)
+        self.l: np.ndarray = np.array([config.length for config in configs], dtype=float)
+        self.r: np.ndarray = np.array([config.radius for config in configs], dtype=float)
+
+        ## initialize diagonal momentum of inertia, `(N, 3)`
+        Ixy: np.ndarray = (2 * self.w * self.r**2) / 5 + (2 * self.w * self.l**2)
+        Iz: np.ndarray = (2 * self.w * self.r**2) / 5 + (4 * self.w * self.l**2)
+        self.J: np.ndarray = np.stack([Ixy, Ixy, Iz], axis=1)
+
+        ## initialize states
+        self._state: np.ndarray = np.zeros((self.n, 12)) if state is None else state
+        if np.shape(self._state) != (self.n, 12):
+            raise ValueError("Wrong shape of state buffer, expect (N, 12)")
+        self._state.fill(0.0)
+        self._state[:, 0:3] = [config.states[0] for config in configs]
+        self._state[:, 6:9] = [config.states[1] for config in configs]
+
+        ## initialize motors, written in place as `(N, 4)` arrays
+        self._motors: Motors = Motors(
+            [config.motors for config in configs],
+            speeds=np.zeros((self.n, 4)) if speeds is None else speeds,
+        )
+
+        ## initialize allocation matrices, `(N, 4, 4)`
+        L: np.ndarray = self.l
+        C: np.ndarray = np.array([config.lift_const for config in configs], dtype=float)
+        O: np.ndarray = np.zeros(self.n)
+        I: np.ndarray = np.ones(self.n)
+        self._allocation_matrix: np.ndarray = np.stack([
+            np.stack([I, I, I, I], axis=1),
+            np.stack([L, O, -L, O], axis=1),
+            np.stack([O, L, -L, O], axis=1),
+            np.stack([C, -C, C, -C], axis=1),
+        ], axis=1)
+        self._force: np.ndarray = np.zeros((self.n, 4))
+
+        ## initialize ground contact, the states at the start of a step are
+        ## kept to locate touchdowns
+        self.impact_speed: np.ndarray = np.zeros(self.n)
+        self._start: np.ndarray = np.empty((self.n, 12))
+        self._rate: np.ndarray = np.empty((self.n, 12))
+
+        self.solver: Integrator = make_integrator(integrator)
+        if not self.solver.batched:
+            raise ValueError("Integrator of a batch must step (N, 12) states, e.g. rk4 or rk45")
+        self._time: float = 0.0
+
+        ## initialize published snapshots
+        self._snapshots: SnapshotBuffer = SnapshotBuffer((self.n, 12), (self.n, 4))
+        self.publish()
+
+    def __len__(self) -> int:
+        return self.n
+
+    @property
+    def time(self) -> float:
+        return self._time
+
+    @time.setter
+    def time(self, t: float) -> None:
+        self._time = t
+
+    @property
+    def state(self) -> np.ndarray:
+        return self._state
+
+    @property
+    def grounded(self) -> np.ndarray:
+        """quadcopters resting on the ground, `(N,)`"""
+        return (self._state[:, 2] <= 0) & (self._state[:, 5] <= 0)
+
+    @property
+    def motors(self) -> Motors:
+        return self._motors
+
+    @property
+    def speeds(self) -> np.ndarray:
+        return self._motors.speeds
+
+    @property
+    def thrust(self) -> np.ndarray:
+        return self._motors.thrust
+
+    def set_motor_speeds(self, speeds: np.ndarray) -> None:
+        if np.shape(speeds) != (self.n, 4):
+            raise ValueError("Wrong shape of input speeds, expect (N, 4)")
+
+        self._motors.speeds = speeds
+
+    def snapshot(self) -> Snapshot:
+        """latest consistent `(states, thrusts, time)` of all quadcopters"""
+        return self._snapshots.read()
+
+    def publish(self) -> Snapshot:
+        """publish the current states, needed after writing them directly"""
+        return self._snapshots.publish(self._time, self._state, self._motors.thrust)
+
+    def step(self, dt: float, t: Union[float, None] = None) -> None:
+        """advance all quadcopters by a single step
+        @param dt: time step of simulation
+        @param t: simulated time reached by the step, `time + dt` by default
+        """
+        self._time = self._time + dt if t is None else t
+        self._update(dt)
+
+    def _update(self, dt: float) -> None:
+        thrust: np.ndarray = self._motors.advance(dt)
+        resting: np.ndarray = self.grounded
+        if resting.any():
+            resting &= self._fetch_state(0.0, self._state, thrust, self._rate)[:, 5] <= 0
+
+        ## a fleet resting on the ground is not integrated at all
+        if not resting.all():
+            self._start[:] = self._state
+            state: np.ndarray = self.solver.step(self._fetch_state, 0.0, self._state, dt, thrust)
+            if state is not self._state:
+                self._state[:] = state
+            self._state[resting] = self._start[resting]
+            landed: np.ndarray = self._state[:, 2] < 0
+            if landed.any():
+                self._touchdown(landed, dt)
+                resting |= landed
+
+        self._state[resting, 2:6] = 0.0
+        self._state[resting, 9:12] = 0.0
+        wrap(self._state[:, 6:9], out=self._state[:, 6:9])
+        self._snapshots.publish(self._time, self._state, thrust)
+
+    def _touchdown(self, landed: np.ndarray, dt: float) -> None:
+        """quadcopters whose step went through the ground come to rest at the
+        located crossing, positions and attitudes are interpolated linearly"""
+        start, end = self._start[landed], self._state[landed]
+        s, speed = crossing(start[:, 2], start[:, 5], end[:, 2], end[:, 5], dt)
+        self.impact_speed[landed] = np.maximum(0.0, -speed)
+        self._state[landed] = start + s[:, np.newaxis] * (end - start)
+
+    def _fetch_state(
+        self, t: float, state: np.ndarray, thrust: np.ndarray, out: np.ndarray = None
+    ) -> np.ndarray:
+        """batched right-hand side of the rigid-body dynamics, same model as
+        `Quadcopter._fetch_state` evaluated over the leading axis
+        @param t: current time
+        @param state: current states, `(N, 12)`
+        @param thrust: thrust of each motor, `(N, 4)`
+        @param out: optional buffer receiving the derivatives
+        @return: derivatives of the states
+        """
+        if out is None:
+            out = np.empty_like(state)
+
+        f: np.ndarray = np.einsum("nij,nj->ni", self._allocation_matrix, thrust, out=self._force)
+        angles: np.ndarray = np.radians(state[:, 6:9])
+        (cp, cr, cy), (sp, sr, sy) = np.cos(angles).T, np.sin(angles).T
+        fz: np.ndarray = f[:, 0] / self.w
+
+        out[:, 0:3] = state[:, 3:6]
+        out[:, 3] = (cy * sr * cp + sy * sp) * fz
+        out[:, 4] = (sy * sr * cp - cy * sp) * fz
+        out[:, 5] = cr * cp * fz - 9.81
+        out[:, 6:9] = state[:, 9:12]
+
+        omega: np.ndarray = state[:, 9:12]
+        out[:, 9:12] = (f[:, 1:4] - np.cross(omega, self.J * omega)) / self.J
+        return out
+
+    def _rotation_column(self, state: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """batched third column of the rotation matrices, `(N, 3)`, and its
+        derivatives with respect to the angles, `(N, 3, 3)`"""
+        angles: np.ndarray = np.radians(state[:, 6:9])
+        (cp, cr, cy), (sp, sr, sy) = np.cos(angles).T, np.sin(angles).T
+        column: np.ndarray = np.stack(
+            [cy * sr * cp + sy * sp, sy * sr * cp - cy * sp, cr * cp], axis=1
+        )
+        derivative: np.ndarray = np.radians(np.stack([
+            np.stack([sy * cp - cy * sr * sp, cy * cr * cp, cy * sp - sy * sr * cp], axis=1),
+            np.stack([-cy * cp - sy * sr * sp, sy * cr * cp, cy * sr * cp + sy * sp], axis=1),
+            np.stack([-cr * sp, -sr * cp, np.zeros_like(cp)], axis=1),
+        ], axis=1))
+        return column, derivative
+
+    def _jacobian(self, t: float, state: np.ndarray, thrust: np.ndarray) -> np.ndarray:
+        """batched analytical Jacobian of `_fetch_state` with respect to the
+        states, same as `Quadcopter._jacobian` for each vehicle
+        @return: `(N, 12, 12)` Jacobians
+        """
+        out: np.ndarray = np.zeros((len(state), 12, 12))
+        f: np.ndarray = np.einsum("nj,nj->n", self._allocation_matrix[:, 0], thrust) / self.w
+        _, derivative = self._rotation_column(state)
+        wx, wy, wz = state[:, 9:12].T
+        Ix, Iy, Iz = self.J.T
+
+        eye: np.ndarray = np.identity(3)
+        out[:, 0:3, 3:6] = eye
+        out[:, 3:6, 6:9] = derivative * f[:, np.newaxis, np.newaxis]
+        out[:, 6:9, 9:12] = eye
+        out[:, 9, 10], out[:, 9, 11] = -(Iz - Iy) / Ix * wz, -(Iz - Iy) / Ix * wy
+        out[:, 10, 9], out[:, 10, 11] = -(Ix - Iz) / Iy * wz, -(Ix - Iz) / Iy * wx
+        out[:, 11, 9], out[:, 11, 10] = -(Iy - Ix) / Iz * wy, -(Iy - Ix) / Iz * wx
+        return out
+
+    def _jacobian_thrust(self, t: float, state: np.ndarray) -> np.ndarray:
+        """batched analytical Jacobian of `_fetch_state` with respect to the
+        motor thrusts
+        @return: `(N, 12, 4)` Jacobians
+        """
+        column, _ = self._rotation_column(state)
+        out: np.ndarray = np.zeros((len(state), 12, 4))
+        out[:, 3:6] = np.einsum(
+            "ni,nj->nij", column / self.w[:, np.newaxis], self._allocation_matrix[:, 0]
+        )
+        out[:, 9:12] = self._allocation_matrix[:, 1:4] / self.J[:, :, np.newaxis]
+        return out
+
+    def linearize(
+        self, state: Union[np.ndarray, None] = None, thrust: Union[np.ndarray, None] = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """linearize the dynamics of every vehicle around an operating point
+        @param state: operating states, the current states by default
+        @param thrust: operating thrusts, the current thrusts by default
+        @return: `A` of shape `(N, 12, 12)` and `B` of shape `(N, 12, 4)`
+        """
+        state = self._state if state is None else np.asarray(state, dtype=float)
+        thrust = self._motors.thrust if thrust is None else np.asarray(thrust, dtype=float)
+        return self._jacobian(0.0, state, thrust), self._jacobian_thrust(0.0, state)
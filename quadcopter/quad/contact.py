@@ -0,0 +1,51 @@
+import numpy as np
+
+from typing import Union
+
+
+def crossing(
+    z0: Union[float, np.ndarray],
+    v0: Union[float, np.ndarray],
+    z1: Union[float, np.ndarray],
+    v1: Union[float, np.ndarray],
+    dt: float,
+    iterations: int = 40,
+) -> tuple[np.ndarray, np.ndarray]:
+    """locate where the height crosses the ground during a step, from the
+    cubic Hermite interpolation of the heights and vertical speeds at both
+    ends of the step, with `z0 >= 0 > z1`
+    @param z0: height at the start of the step
+    @param v0: vertical speed at the start of the step
+    @param z1: height at the end of the step
+    @param v1: vertical speed at the end of the step
+    @param dt: time step
+    @param iterations: number of bisections of the step
+    @return: fraction of the step at the crossing and vertical speed there
+    """
+    z0, v0, z1, v1 = np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in (z0, v0, z1, v1)))
+    m0, m1 = v0 * dt, v1 * dt
+
+    def height(s: np.ndarray) -> np.ndarray:
+        return (
+            (2 * s**3 - 3 * s**2 + 1) * z0
+            + (s**3 - 2 * s**2 + s) * m0
+            + (-2 * s**3 + 3 * s**2) * z1
+            + (s**3 - s**2) * m1
+        )
+
+    lo: np.ndarray = np.zeros_like(z0)
+    hi: np.ndarray = np.ones_like(z0)
+    for _ in range(iterations):
+        mid: np.ndarray = (lo + hi) / 2
+        above: np.ndarray = height(mid) >= 0
+        lo = np.where(above, mid, lo)
+        hi = np.where(above, hi, mid)
+
+    s: np.ndarray = (lo + hi) / 2
+    speed: np.ndarray = (
+        (6 * s**2 - 6 * s) * z0
+        + (3 * s**2 - 4 * s + 1) * m0
+        + (-6 * s**2 + 6 * s) * z1
+        + (3 * s**2 - 2 * s) * m1
+    ) / dt
+    return s, speed
@@ -0,0 +1,213 @@
+import math
+import numpy as np
+
+from typing import Callable, Union
+from abc import ABC, abstractmethod
+
+
+## right-hand side `f(t, y, *args, out=None)` of the ordinary differential
+## equation, writing the derivative into `out` when it is provided
+Function = Callable[..., np.ndarray]
+
+
+class Integrator(ABC):
+    ## optional Jacobian `jac(t, y, *args)` of the right-hand side, used by
+    ## implicit integrators instead of finite differences
+    jacobian: Union[Function, None] = None
+    ## optional projection `normalize(y)` applied in place after every step,
+    ## e.g. to keep the quaternion of an attitude of unit norm
+    normalize: Union[Callable[[np.ndarray], None], None] = None
+    ## step size carried between steps by adaptive integrators, `None` for
+    ## integrators without state, saved and restored by checkpoints
+    h: Union[float, None] = None
+    ## whether the integrator steps the `(N, 12)` states of a batch, those
+    ## flattening the state into a solver of their own do not
+    batched: bool = True
+
+    @abstractmethod
+    def step(self, f: Function, t: float, y: np.ndarray, dt: float, *args) -> np.ndarray:
+        """integrate the equation from `t` to `t + dt`
+        @param f: right-hand side of the equation
+        @param t: initial time
+        @param y: initial value
+        @param dt: time step
+        @param args: extra arguments passed to `f`
+        @return: value at `t + dt`
+        """
+        pass
+
+
+class VODE(Integrator):
+    batched: bool = False
+
+    def __init__(self, **options) -> None:
+        """scipy `ode("vode")` integrator, restarted at every step. With
+        `with_jacobian=True` it uses `jacobian` when one is provided. scipy
+        is imported on the first step only
+        @param options: options passed to `set_integrator`
+        """
+        self._options: dict = options
+        self._f: Union[Function, None] = None
+        self._args: tuple = ()
+        self.solver = None
+
+    def step(self, f: Function, t: float, y: np.ndarray, dt: float, *args) -> np.ndarray:
+        if self.solver is None or self._f != f:
+            from scipy.integrate import ode
+
+            self._f = f
+            jac: Union[Function, None] = (
+                self.jacobian if self._options.get("with_jacobian") else None
+            )
+            ## the callbacks take the extra arguments from `self._args` with
+            ## an explicit signature, the Fortran wrappers count the arguments
+            ## of the callbacks and cannot pass them through `*args` wrappers
+            self.solver = ode(
+                f=lambda t, y: f(t, y, *self._args),
+                jac=None if jac is None else lambda t, y: jac(t, y, *self._args),
+            ).set_integrator("vode", **self._options)
+
+        self._args = args
+        self.solver.set_initial_value(y, t)
+        self.solver.integrate(t + dt)
+        y = np.array(self.solver.y)
+        if self.normalize is not None:
+            self.normalize(y)
+        return y
+
+
+class RK4(Integrator):
+    def __init__(self) -> None:
+        """classic fixed-step fourth order Runge-Kutta integrator, the value
+        is updated in place and all stages live in preallocated buffers"""
+        self._buffers: Union[np.ndarray, None] = None
+
+    def _allocate(self, y: np.ndarray) -> np.ndarray:
+        if self._buffers is None or self._buffers.shape[1:] != y.shape:
+            self._buffers = np.empty((5,) + y.shape)
+        return self._buffers
+
+    def step(self, f: Function, t: float, y: np.ndarray, dt: float, *args) -> np.ndarray:
+        k1, k2, k3, k4, tmp = self._allocate(y)
+        h: float = dt / 2
+
+        f(t, y, *args, out=k1)
+        np.multiply(k1, h, out=tmp)
+        tmp += y
+        f(t + h, tmp, *args, out=k2)
+        np.multiply(k2, h, out=tmp)
+        tmp += y
+        f(t + h, tmp, *args, out=k3)
+        np.multiply(k3, dt, out=tmp)
+        tmp += y
+        f(t + dt, tmp, *args, out=k4)
+
+        k2 += k3
+        k2 *= 2
+        k2 += k1
+        k2 += k4
+        k2 *= dt / 6
+        y += k2
+        if self.normalize is not None:
+            self.normalize(y)
+        return y
+
+
+class RK45(Integrator):
+    ## Dormand-Prince tableau
+    C: tuple = (0, 1 / 5, 3 / 10, 4 / 5, 8 / 9, 1, 1)
+    A: tuple = (
+        (),
+        (1 / 5,),
+        (3 / 40, 9 / 40),
+        (44 / 45, -56 / 15, 32 / 9),
+        (19372 / 6561, -25360 / 2187, 64448 / 6561, -212 / 729),
+        (9017 / 3168, -355 / 33, 46732 / 5247, 49 / 176, -5103 / 18656),
+        (35 / 384, 0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84),
+    )
+    E: tuple = (
+        71 / 57600, 0, -71 / 16695, 71 / 1920, -17253 / 339200, 22 / 525, -1 / 40
+    )
+
+    def __init__(self, rtol: float = 1e-6, atol: float = 1e-9) -> None:
+        """embedded Dormand-Prince 5(4) integrator, it takes adaptive sub-steps
+        inside each step and keeps its step size between steps. The value is
+        updated in place and all stages live in preallocated buffers
+        @param rtol: relative tolerance
+        @param atol: absolute tolerance
+        """
+        self.rtol: float = rtol
+        self.atol: float = atol
+        self.h: Union[float, None] = None
+        self._buffers: Union[np.ndarray, None] = None
+
+    def _allocate(self, y: np.ndarray) -> np.ndarray:
+        if self._buffers is None or self._buffers.shape[1:] != y.shape:
+            self._buffers = np.empty((11,) + y.shape)
+        return self._buffers
+
+    def step(self, f: Function, t: float, y: np.ndarray, dt: float, *args) -> np.ndarray:
+        buffers: np.ndarray = self._allocate(y)
+        k, tmp, err, scale, scratch = buffers[0:7], buffers[7], buffers[8], buffers[9], buffers[10]
+
+        end: float = t + dt
+        h: float = dt if self.h is None else min(self.h, dt)
+        f(t, y, *args, out=k[0])
+        while end - t > 1e-12 * dt:
+            h = min(h, end - t)
+            for i in range(1, 7):
+                tmp[...] = y
+                for j, a in enumerate(self.A[i]):
+                    if a:
+                        np.multiply(k[j], h * a, out=scratch)
+                        tmp += scratch
+                f(t + self.C[i] * h, tmp, *args, out=k[i])
+
+            ## `tmp` now holds the fifth order solution, estimate the error
+            err.fill(0)
+            for j, e in enumerate(self.E):
+                if e:
+                    np.multiply(k[j], h * e, out=scratch)
+                    err += scratch
+            np.abs(y, out=scale)
+            np.abs(tmp, out=scratch)
+            np.maximum(scale, scratch, out=scale)
+            scale *= self.rtol
+            scale += self.atol
+            err /= scale
+            norm: float = math.sqrt(np.vdot(err, err) / err.size)
+
+            if norm <= 1:
+                t += h
+                y[...] = tmp
+                k[0][...] = k[6]
+                ## the projection moves the value by the truncation error at
+                ## most, the derivative of the last stage is kept
+                if self.normalize is not None:
+                    self.normalize(y)
+            h *= min(5.0, max(0.2, 0.9 * norm ** -0.2)) if norm > 0 else 5.0
+
+        self.h = h
+        return y
+
+
+INTEGRATORS: dict[str, Callable[[], Integrator]] = {
+    "vode": VODE,
+    "bdf": lambda: VODE(method="bdf", with_jacobian=True),
+    "rk4": RK4,
+    "rk45": RK45,
+}
+
+
+def make_integrator(integrator: Union[str, Integrator]) -> Integrator:
+    """create an integrator from its name, integrator instances are
+    returned untouched
+    @param integrator: `vode`, `bdf`, `rk4`, `rk45` or an integrator instance
+    @return: integrator instance
+    """
+    if isinstance(integrator, Integrator):
+        return integrator
+
+    if integrator not in INTEGRATORS:
+        raise ValueError(f"Unknown integrator: {integrator}")
+    return INTEGRATORS[integrator]()
@@ -1,36 +1,225 @@
 import math
 import numpy as np
 
+from typing import Union
+
 from quadcopter import MotorConfig
 
 
+## conversion of speeds in rad/s to rpm, the unit of the thrust constant
+RPM: float = 60 / (2 * np.pi)
+
+
+class QuadraticCurve(object):
+    def __init__(self, c: Union[float, np.ndarray]) -> None:
+        """thrust `c * rpm**2` of a propeller, the unit conversion is folded
+        into the constant once
+        @param c: thrust constant, a float or one per vehicle as `(N, 1)`
+        """
+        self.c: Union[float, np.ndarray] = c
+        self._k: Union[float, np.ndarray] = c * RPM**2
+
+    def __call__(self, speeds: np.ndarray, out: Union[np.ndarray, None] = None) -> np.ndarray:
+        if out is None:
+            return self._k * np.square(speeds, dtype=float)
+        np.square(speeds, out=out)
+        out *= self._k
+        return out
+
+
+class ThrustTable(object):
+    def __init__(self, speeds: np.ndarray, thrust: np.ndarray, size: int = 1024) -> None:
+        """thrust interpolated linearly in a table on a uniform grid of speeds,
+        so that a lookup is an index computation instead of a search. Measured
+        curves are resampled onto the grid once, beyond the last speed the
+        thrust is extrapolated with the last slope
+        @param speeds: increasing motor speeds of the curve, in rad/s
+        @param thrust: thrust at these speeds
+        @param size: number of grid points from zero to the last speed
+        """
+        speeds, thrust = np.asarray(speeds, dtype=float), np.asarray(thrust, dtype=float)
+        if speeds.ndim != 1 or speeds.shape != thrust.shape or len(speeds) < 2:
+            raise ValueError("Thrust curve needs matching speeds and thrusts, at least two")
+
+        if np.any(np.diff(speeds) <= 0) or speeds[0] < 0:
+            raise ValueError("Speeds of thrust curve should be positive and increasing")
+
+        grid: np.ndarray = np.linspace(0.0, speeds[-1], size)
+        self._table: np.ndarray = np.interp(grid, speeds, thrust)
+        self._slope: np.ndarray = np.diff(self._table)
+        self._scale: float = (size - 1) / speeds[-1]
+        self._last: int = size - 2
+
+    @staticmethod
+    def from_config(config: MotorConfig, top: float, size: int = 1024) -> "ThrustTable":
+        """table of the quadratic curve of a motor config up to a speed"""
+        c: float = 1.857e-11 * math.pow(config.d, 2) * math.sqrt(config.pitch)
+        grid: np.ndarray = np.linspace(0.0, top, size)
+        return ThrustTable(grid, QuadraticCurve(c)(grid), size)
+
+    @staticmethod
+    def load(path: str, size: int = 1024) -> "ThrustTable":
+        """table of a measured curve, a `.npy` or a csv file of two columns,
+        speeds in rad/s and thrusts, header and `#` comment lines are skipped
+        """
+        data: np.ndarray = (
+            np.load(path) if path.endswith(".npy")
+            else np.genfromtxt(path, delimiter=",", comments="#")
+        )
+        data = np.atleast_2d(data)
+        data = data[~np.isnan(data).any(axis=1)]
+        return ThrustTable(data[:, 0], data[:, 1], size)
+
+    def __call__(self, speeds: np.ndarray, out: Union[np.ndarray, None] = None) -> np.ndarray:
+        x: np.ndarray = np.multiply(speeds, self._scale, dtype=float)
+        i: np.ndarray = np.minimum(x.astype(np.intp), self._last)
+        x -= i
+        x *= self._slope[i]
+        return np.add(self._table[i], x, out=out)
+
+
+def thrust_curve(configs: list[MotorConfig], c: Union[float, np.ndarray]):
+    """thrust curve of motors, the measured curve of the configs if any"""
+    curves: set = {config.curve for config in configs}
+    if len(curves) > 1:
+        raise ValueError("Motors of a batch must share their measured curve")
+
+    curve: Union[str, None] = curves.pop()
+    return QuadraticCurve(c) if curve is None else ThrustTable.load(curve)
+
+
 class Motors(object):
-    def __init__(self, config: MotorConfig, n: int = 4) -> None:
-        self._d: float = config.d
-        self._p: float = config.pitch
-        self._s: np.ndarray = np.full(n, config.speed)
-        self._f: np.ndarray = np.full(n, config.force)
+    def __init__(
+        self,
+        config: Union[MotorConfig, list[MotorConfig]],
+        n: int = 4,
+        speeds: Union[np.ndarray, None] = None,
+    ) -> None:
+        """motors of a quadcopter as `(n,)` arrays, or of a batch of
+        quadcopters given one config each as `(N, n)` arrays. The thrust
+        follows the quadratic curve of the config or its measured curve.
+        With a time constant `tau` the rotor speeds lag behind their commands
+        as a first-order system, advanced with the body state by `advance`
+        @param config: motor config, or one config per vehicle
+        @param n: number of motors per vehicle
+        @param speeds: optional buffer holding the rotor speeds, e.g. shared
+        memory, speeds and thrusts are then written in place instead of
+        being replaced
+        """
+        batched: bool = isinstance(config, list)
+        configs: list[MotorConfig] = config if batched else [config]
+        shape: tuple = (len(configs), n) if batched else (n,)
 
-        self._n: int = n
-        self._c: float = (  # constant
-            1.857e-11 * math.pow(self._d, 2) * math.sqrt(self._p)
+        def per_vehicle(values: list[float]) -> Union[float, np.ndarray]:
+            return np.array(values, dtype=float)[:, np.newaxis] if batched else float(values[0])
+
+        self._d: Union[float, np.ndarray] = per_vehicle([c.d for c in configs])
+        self._p: Union[float, np.ndarray] = per_vehicle([c.pitch for c in configs])
+        self._c: Union[float, np.ndarray] = (  # constant
+            1.857e-11 * np.square(self._d) * np.sqrt(self._p)
         )
+        self.tau: Union[float, np.ndarray] = per_vehicle([c.tau for c in configs])
+        if np.any(np.asarray(self.tau) < 0):
+            raise ValueError("Time constant of motors should be positive or zero")
+        self.curve = thrust_curve(configs, self._c)
+
+        self._n: int = n
+        self._shape: tuple = shape
+        self._inplace: bool = speeds is not None
+        self._s: np.ndarray = np.empty(shape) if speeds is None else speeds
+        if np.shape(self._s) != shape:
+            raise ValueError(f"Wrong shape of speed buffer, expect {shape}")
+        self._s[...] = per_vehicle([c.speed for c in configs])
+        self._f: np.ndarray = np.empty(shape)
+        self._f[...] = per_vehicle([c.force for c in configs])
+        self._command: np.ndarray = self._s.copy()
+
+        self._lagged: bool = bool(np.any(np.asarray(self.tau) > 0))
+        self._decay: dict[float, tuple] = {}
 
     @property
     def speeds(self) -> np.ndarray:
+        """current rotor speeds"""
         return self._s
 
     @property
     def thrust(self) -> np.ndarray:
         return self._f
 
+    @property
+    def command(self) -> np.ndarray:
+        """commanded speeds, which the rotor speeds follow with a lag"""
+        return self._command
+
     @speeds.setter
     def speeds(self, speeds: np.ndarray) -> None:
-        if len(speeds) != self._n:
+        if np.shape(speeds) != self._shape:
             raise ValueError("Wrong number of input speeds for motors")
 
         if np.any(speeds < 0):
             raise ValueError("Input speeds should be positive or zero")
 
-        self._s = speeds
-        self._f = self._c * np.square(self._s * 60 / (2 * np.pi))  
+        self.set(speeds)
+
+    def set(self, speeds: np.ndarray) -> None:
+        """command the motors without validation, for trusted callers such
+        as controllers whose outputs are already clipped to the motor limits
+        @param speeds: non-negative speeds of the shape of the motors
+        """
+        if self._lagged:
+            self._command = speeds
+        else:
+            self._apply(speeds, None)
+
+    def reset(self, speeds: np.ndarray, command: Union[np.ndarray, None] = None) -> None:
+        """set the rotor speeds at once whatever the lag, e.g. to restore a
+        checkpoint, along with a pending command
+        @param speeds: rotor speeds
+        @param command: commanded speeds, the rotor speeds by default
+        """
+        if np.shape(speeds) != self._shape or np.any(speeds < 0):
+            raise ValueError("Rotor speeds should be positive or zero, of the motor shape")
+
+        self._apply(np.array(speeds, dtype=float), None)
+        self._command = np.array(speeds if command is None else command, dtype=float)
+
+    def _apply(self, speeds: np.ndarray, thrust: Union[np.ndarray, None]) -> None:
+        ## a single quadcopter replaces its arrays, so a reference taken by
+        ## the physics thread stays consistent during a whole step
+        if self._inplace:
+            self._s[...] = speeds
+            if thrust is None:
+                self.curve(self._s, out=self._f)
+            else:
+                self._f[...] = thrust
+        else:
+            self._s = speeds
+            self._f = self.curve(speeds) if thrust is None else thrust
+
+    def advance(self, dt: float) -> np.ndarray:
+        """advance the rotor speeds towards their commands over a step with
+        the exact solution of the first-order lag
+        @param dt: time step of simulation
+        @return: thrust to apply during the step, averaged over the step by
+        Simpson's rule, the current thrust for motors without lag
+        """
+        if not self._lagged:
+            return self._f
+
+        if dt not in self._decay:
+            with np.errstate(divide="ignore"):
+                decay: np.ndarray = np.exp(-dt / np.asarray(self.tau))
+            self._decay[dt] = (np.sqrt(decay), decay)
+        half, full = self._decay[dt]
+
+        command: np.ndarray = self._command
+        gap: np.ndarray = self._s - command
+        end: np.ndarray = gap * full + command
+        thrust: np.ndarray = self.curve(end)
+        mean: np.ndarray = self.curve(gap * half + command)
+        mean *= 4
+        mean += self._f
+        mean += thrust
+        mean /= 6
+        self._apply(end, thrust)
+        return mean
@@ -1,18 +1,37 @@
+import math
 import time
 import threading
 import numpy as np
 
 from typing import Union
-from scipy.integrate import ode
 
 from quadcopter import QuadConfig
+from quadcopter.snapshot import Snapshot, SnapshotBuffer
 from quadcopter.quad import Motors
+from quadcopter.quad.contact import crossing
+from quadcopter.quad.integrators import Integrator, make_integrator
 
-from quadcopter import rotation_matrix, wrap
+from quadcopter import wrap
+from quadcopter.utils import quaternion_from_euler, euler_from_quaternion
 
 
 class Quadcopter(object):
-    def __init__(self, config: QuadConfig) -> None:
+    def __init__(
+        self,
+        config: QuadConfig,
+        integrator: Union[str, Integrator] = "vode",
+        attitude: str = "euler",
+    ) -> None:
+        """rigid-body quadcopter driven by its motors
+        @param config: quadcopter config
+        @param integrator: name of the integrator or an integrator instance
+        @param attitude: `euler` to integrate the euler angles of the state,
+        or `quaternion` to integrate a unit quaternion, free of gimbal lock
+        and trig in the dynamics, the state keeps its euler angles
+        """
+        if attitude not in ("euler", "quaternion"):
+            raise ValueError(f"Unknown attitude representation: {attitude}")
+
         self.w: float = config.weight
         self.l: float = config.length
         self.r: float = config.radius
@@ -29,23 +48,46 @@ class Quadcopter(object):
         self._state[0:3] = np.array(config.states[0])
         self._state[6:9] = np.array(config.states[1])
 
+        ## integrated state, the state itself with euler angles, otherwise
+        ## `(position, velocity, quaternion, angular rate)` synced with it
+        self.attitude: str = attitude
+        self._quaternion: bool = attitude == "quaternion"
+        self._y: np.ndarray = np.empty(13) if self._quaternion else self._state
+        self._rates: slice = slice(10, 13) if self._quaternion else slice(9, 12)
+
         ## initialize _motors
         self._motors: Motors = Motors(config.motors)
 
         ## initialize solver
-        self.solver: ode = ode(f=self._fetch_state).set_integrator("vode")
+        self.solver: Integrator = make_integrator(integrator)
+        if self._quaternion:
+            self.solver.normalize = self._normalize
+        elif self.solver.jacobian is None:
+            self.solver.jacobian = self._jacobian
 
         ## initialize allocation matrix
         L: float = config.length
         C: float = config.lift_const
         self._allocation_matrix: np.ndarray = np.array(
-            [[1, 1, 1, 1], [L, 0, -L, 0], [0, L, -L, 0], [C, -C, C, -C]]
+            [[1, 1, 1, 1], [L, 0, -L, 0], [0, L, -L, 0], [C, -C, C, -C]], dtype=float
         )
+        self._force: np.ndarray = np.zeros(4)
+        self._inertia: tuple[float, float, float] = (Ix, Iy, Iz)
+
+        ## initialize ground contact, the state at the start of a step is
+        ## kept to locate touchdowns
+        self.impact_speed: float = 0.0
+        self._start: np.ndarray = np.empty(len(self._y))
+        self._rate: np.ndarray = np.empty(len(self._y))
 
         self._time: float = time.time()
         self._thread: Union[threading.Thread, None] = None
         self._execute: bool = True
 
+        ## initialize published snapshots
+        self._snapshots: SnapshotBuffer = SnapshotBuffer()
+        self.publish()
+
     def start(self, dt: float = 5e-2, scale: float = 1.0) -> None:
         """start the quadcopter in a saperate threading
         @param dt: time step of simulation
@@ -64,10 +106,20 @@ class Quadcopter(object):
     def time(self) -> float:
         return self._time
 
+    @time.setter
+    def time(self, t: float) -> None:
+        self._time = t
+
     @property
     def state(self) -> np.ndarray:
         return self._state
     
+    @property
+    def grounded(self) -> bool:
+        """resting on the ground, the dynamics are not integrated as long as
+        the thrust cannot lift the quadcopter"""
+        return self._state[2] <= 0 and self._state[5] <= 0
+
     @property
     def motors(self) -> Motors:
         return self._motors
@@ -75,35 +127,221 @@ class Quadcopter(object):
     def set_motor_speeds(self, speeds: np.ndarray) -> None:
         self._motors.speeds = speeds
 
+    def snapshot(self) -> Snapshot:
+        """latest consistent `(state, thrust, time)`, safe to read from other
+        threads while the simulation is running"""
+        return self._snapshots.read()
+
+    def publish(self) -> Snapshot:
+        """publish the current state, needed after writing the state directly"""
+        if self._quaternion:
+            self._y[0:6] = self._state[0:6]
+            quaternion_from_euler(self._state[6:9], out=self._y[6:10])
+            self._y[10:13] = self._state[9:12]
+        return self._snapshots.publish(self._time, self._state, self._motors.thrust)
+
+    def step(self, dt: float, t: Union[float, None] = None) -> None:
+        """advance the quadcopter dynamics by a single step, used by
+        external steppers instead of the wall-clock threading
+        @param dt: time step of simulation
+        @param t: simulated time reached by the step, `time + dt` by default
+        """
+        self._time = self._time + dt if t is None else t
+        self._update(dt)
+
     def _threading(self, dt: float, scale: float) -> None:
-        rate: float = scale * dt
-        last: float = self.time
+        rate: float = dt / scale
+        deadline: float = time.perf_counter() + rate
         while self._execute:
-            time.sleep(0)
+            time.sleep(max(0.0, deadline - time.perf_counter()))
+            deadline += rate
             self._time = time.time()
-            if self.time - last > rate:
-                self._update(dt)
-                last = self.time
+            self._update(dt)
 
     def _update(self, dt: float) -> None:
-        self.solver.set_initial_value(self._state, 0).set_f_params(self._motors.thrust)
-        self.solver.integrate(self.solver.t + dt)
+        ## the motors replace their thrust array, so a reference taken once
+        ## stays consistent during the whole step
+        thrust: np.ndarray = self._motors.advance(dt)
+        f = self._fetch_quaternion if self._quaternion else self._fetch_state
+        if self.grounded and f(0.0, self._y, thrust, self._rate)[5] <= 0:
+            self._rest()
+        else:
+            self._start[:] = self._y
+            self._y = self.solver.step(f, 0.0, self._y, dt, thrust)
+            if self._y[2] < 0:
+                self._touchdown(dt, thrust, f)
+        self._sync()
+        self._snapshots.publish(self._time, self._state, thrust)
+
+    def _sync(self) -> None:
+        """update the state from the integrated one, integrated euler angles
+        are wrapped while those of a quaternion are already within ±180
+        degrees, and are converted back by `publish` without loss"""
+        if self._quaternion:
+            self._state[0:6] = self._y[0:6]
+            euler_from_quaternion(self._y[6:10], out=self._state[6:9])
+            self._state[9:12] = self._y[10:13]
+        else:
+            self._state = self._y
+            wrap(self._state[6:9], out=self._state[6:9])
+
+    def _rest(self) -> None:
+        self._y[2] = 0.0
+        self._y[3:6] = 0.0
+        self._y[self._rates] = 0.0
+
+    def _touchdown(self, dt: float, thrust: np.ndarray, f) -> None:
+        """the step went through the ground, integrate again from the start of
+        the step up to the located crossing and come to rest there"""
+        s, _ = crossing(self._start[2], self._start[5], self._y[2], self._y[5], dt)
+        self._y = self.solver.step(f, 0.0, self._start.copy(), float(s) * dt, thrust)
+        self.impact_speed = max(0.0, -self._y[5])
+        self._rest()
 
-        self._state = np.array(self.solver.y)
-        self._state[2] = max(0, self._state[2])
-        self._state[6:9] = wrap(self._state[6:9])
+    def _normalize(self, y: np.ndarray) -> None:
+        q: np.ndarray = y[6:10]
+        q /= math.sqrt(float(q @ q))
 
-    def _fetch_state(self, t: float, state: np.ndarray, thrust: np.ndarray) -> np.ndarray:
-        f: np.ndarray = self._allocation_matrix @ thrust
-        dstate: np.ndarray = np.zeros_like(self._state)
+    def _fetch_state(
+        self, t: float, state: np.ndarray, thrust: np.ndarray, out: np.ndarray = None
+    ) -> np.ndarray:
+        """right-hand side of the rigid-body dynamics, the rotation is expanded
+        into its third column, the only one acting on the body thrust
+        @param t: current time
+        @param state: current state
+        @param thrust: thrust of each motor
+        @param out: optional buffer receiving the derivative
+        @return: derivative of the state
+        """
+        if out is None:
+            out = np.empty(12)
+
+        f, tx, ty, tz = np.dot(self._allocation_matrix, thrust, out=self._force).tolist()
+        _, _, _, vx, vy, vz, a0, a1, a2, wx, wy, wz = state.tolist()
+        Ix, Iy, Iz = self._inertia
 
-        dstate[0:3] = self._state[3:6]
-        dstate[3:6] = (
-            rotation_matrix(self._state[6:9]) @ np.array([0, 0, f[0]]) / self.w
-            + np.array([0, 0, -9.81])
+        ## third column of `rotation_matrix(state[6:9])`
+        a0, a1, a2 = math.radians(a0), math.radians(a1), math.radians(a2)
+        cp, cr, cy = math.cos(a0), math.cos(a1), math.cos(a2)
+        sp, sr, sy = math.sin(a0), math.sin(a1), math.sin(a2)
+        f /= self.w
+
+        out[:] = (
+            vx,
+            vy,
+            vz,
+            (cy * sr * cp + sy * sp) * f,
+            (sy * sr * cp - cy * sp) * f,
+            cr * cp * f - 9.81,
+            wx,
+            wy,
+            wz,
+            (tx - (Iz - Iy) * wy * wz) / Ix,
+            (ty - (Ix - Iz) * wz * wx) / Iy,
+            (tz - (Iy - Ix) * wx * wy) / Iz,
         )
-        dstate[6:9] = self._state[9:12]
-        dstate[9:12] = (
-            self.J_inv @ (f[1:4] - np.cross(self._state[9:12], self.J @ self._state[9:12]))
+        return out
+
+    def _fetch_quaternion(
+        self, t: float, y: np.ndarray, thrust: np.ndarray, out: np.ndarray = None
+    ) -> np.ndarray:
+        """right-hand side of the rigid-body dynamics with a quaternion
+        attitude, the body thrust acts along the third column of its rotation
+        matrix, a polynomial of the quaternion
+        @param y: `(position, velocity, quaternion, angular rate)`, `(13,)`
+        @return: derivative of `y`
+        """
+        if out is None:
+            out = np.empty(13)
+
+        f, tx, ty, tz = np.dot(self._allocation_matrix, thrust, out=self._force).tolist()
+        _, _, _, vx, vy, vz, qw, qx, qy, qz, wx, wy, wz = y.tolist()
+        Ix, Iy, Iz = self._inertia
+        f /= self.w
+
+        ## `q' = q * (0, w) / 2`, the angular rates share the degrees of the
+        ## euler angles
+        k: float = math.pi / 360
+        out[:] = (
+            vx,
+            vy,
+            vz,
+            2 * (qx * qz + qw * qy) * f,
+            2 * (qy * qz - qw * qx) * f,
+            (1 - 2 * (qx * qx + qy * qy)) * f - 9.81,
+            k * (-qx * wx - qy * wy - qz * wz),
+            k * (qw * wx + qy * wz - qz * wy),
+            k * (qw * wy - qx * wz + qz * wx),
+            k * (qw * wz + qx * wy - qy * wx),
+            (tx - (Iz - Iy) * wy * wz) / Ix,
+            (ty - (Ix - Iz) * wz * wx) / Iy,
+            (tz - (Iy - Ix) * wx * wy) / Iz,
         )
-        return dstate
+        return out
+
+    def _rotation_column(self, state: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """third column of `rotation_matrix(state[6:9])` and its derivatives
+        with respect to the three angles, as the columns of a 3x3 matrix"""
+        k: float = math.pi / 180
+        a0, a1, a2 = np.radians(state[6:9]).tolist()
+        cp, cr, cy = math.cos(a0), math.cos(a1), math.cos(a2)
+        sp, sr, sy = math.sin(a0), math.sin(a1), math.sin(a2)
+        column: np.ndarray = np.array([cy * sr * cp + sy * sp, sy * sr * cp - cy * sp, cr * cp])
+        derivative: np.ndarray = k * np.array([
+            [sy * cp - cy * sr * sp, cy * cr * cp, cy * sp - sy * sr * cp],
+            [-cy * cp - sy * sr * sp, sy * cr * cp, cy * sr * cp + sy * sp],
+            [-cr * sp, -sr * cp, 0.0],
+        ])
+        return column, derivative
+
+    def _jacobian(
+        self, t: float, state: np.ndarray, thrust: np.ndarray, out: np.ndarray = None
+    ) -> np.ndarray:
+        """analytical Jacobian of `_fetch_state` with respect to the state
+        @param t: current time
+        @param state: current state
+        @param thrust: thrust of each motor
+        @param out: optional `(12, 12)` buffer receiving the Jacobian
+        @return: Jacobian of the state derivative
+        """
+        if out is None:
+            out = np.zeros((12, 12))
+        else:
+            out.fill(0)
+
+        f: float = float(self._allocation_matrix[0] @ thrust) / self.w
+        _, derivative = self._rotation_column(state)
+        wx, wy, wz = state[9:12].tolist()
+        Ix, Iy, Iz = self._inertia
+
+        out[0:3, 3:6] = np.identity(3)
+        out[3:6, 6:9] = derivative * f
+        out[6:9, 9:12] = np.identity(3)
+        out[9, 10:12] = -(Iz - Iy) / Ix * wz, -(Iz - Iy) / Ix * wy
+        out[10, 9], out[10, 11] = -(Ix - Iz) / Iy * wz, -(Ix - Iz) / Iy * wx
+        out[11, 9:11] = -(Iy - Ix) / Iz * wy, -(Iy - Ix) / Iz * wx
+        return out
+
+    def _jacobian_thrust(self, t: float, state: np.ndarray) -> np.ndarray:
+        """analytical Jacobian of `_fetch_state` with respect to the thrust
+        of each motor, constant but for the attitude
+        @return: `(12, 4)` Jacobian of the state derivative
+        """
+        column, _ = self._rotation_column(state)
+        out: np.ndarray = np.zeros((12, 4))
+        out[3:6] = np.outer(column, self._allocation_matrix[0]) / self.w
+        out[9:12] = self._allocation_matrix[1:4] / np.array(self._inertia)[:, np.newaxis]
+        return out
+
+    def linearize(
+        self, state: Union[np.ndarray, None] = None, thrust: Union[np.ndarray, None] = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """linearize the dynamics around an operating point, `dx = A x + B u`
+        with `u` the motor thrusts, e.g. around hover
+        @param state: operating state, the current state by default
+        @param thrust: operating thrust, the current thrust by default
+        @return: `A` of shape `(12, 12)` and `B` of shape `(12, 4)`
+        """
+        state = self._state if state is None else np.asarray(state, dtype=float)
+        thrust = self._motors.thrust if thrust is None else np.asarray(thrust, dtype=float)
+        return self._jacobian(0.0, state, thrust), self._jacobian_thrust(0.0, state)
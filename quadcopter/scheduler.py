@@ -0,0 +1,151 @@
+import math
+import time
+import heapq
+import threading
+
+from typing import Callable, Union
+from dataclasses import dataclass, field
+
+
+@dataclass
+class TaskStats(object):
+    runs: int = 0
+    overruns: int = 0
+    jitter: float = 0.0      # total lateness of the wall-clock deadlines
+    max_jitter: float = 0.0
+    busy: float = 0.0        # total execution time
+    max_busy: float = 0.0
+
+    @property
+    def mean_jitter(self) -> float:
+        return self.jitter / self.runs if self.runs else 0.0
+
+    @property
+    def mean_busy(self) -> float:
+        return self.busy / self.runs if self.runs else 0.0
+
+
+@dataclass
+class Task(object):
+    name: str
+    fn: Callable[[float], None]
+    period: float
+    priority: int
+    every: int = 1          # ticks of the period between two runs
+    tick: int = 0
+    stats: TaskStats = field(default_factory=TaskStats)
+
+    @property
+    def interval(self) -> float:
+        """simulated time between two runs"""
+        return self.period * self.every
+
+
+class Scheduler(object):
+    def __init__(self, factor: Union[float, None] = 1.0, t0: float = 0.0) -> None:
+        """single-threaded scheduler owning a simulated clock and running each
+        registered task at its own rate, e.g. physics at 1 kHz and controller
+        at 200 Hz. Ahead of the wall clock it sleeps, behind it catches up
+        and counts the ticks which missed their slot as overruns.
+        @param factor: real-time factor, e.g. `0.1`, `1` or `10`, `None`
+        runs as fast as possible
+        @param t0: initial simulated time
+        """
+        if factor is not None and factor <= 0:
+            raise ValueError("Real-time factor should be positive or None")
+
+        self.factor: Union[float, None] = factor
+        self.t0: float = t0
+        self.time: float = t0
+        self.tasks: list[Task] = []
+        self._queue: list[tuple[float, int, int, Task]] = []
+        self._stop: threading.Event = threading.Event()
+
+    def add(
+        self,
+        name: str,
+        fn: Callable[[float], None],
+        rate: float,
+        priority: int = 0,
+        every: int = 1,
+    ) -> Task:
+        """register a task running at `rate` on the simulated clock
+        @param name: name of the task in the statistics
+        @param fn: called with the simulated time of each tick
+        @param rate: rate in hertz of simulated time
+        @param priority: order of tasks due at the same time, lower first,
+        then by registration order
+        @param every: run on every n-th tick of the rate only, tasks sharing
+        a rate then fall on exactly the same due times
+        @return: the registered task
+        """
+        if rate <= 0 or every < 1:
+            raise ValueError("Rate of task should be positive, and `every` at least 1")
+
+        task: Task = Task(name, fn, 1.0 / rate, priority, every)
+        task.tick = math.ceil((self.time - self.t0) / task.interval - 1e-9)
+        self.tasks.append(task)
+        heapq.heappush(self._queue, (self._due(task), priority, len(self.tasks), task))
+        return task
+
+    def _due(self, task: Task) -> float:
+        ## due times are integer multiples of the period to avoid drifting
+        return self.t0 + task.tick * task.every * task.period
+
+    def stats(self) -> dict[str, TaskStats]:
+        return {task.name: task.stats for task in self.tasks}
+
+    def report(self) -> str:
+        lines: list[str] = []
+        for task in self.tasks:
+            s: TaskStats = task.stats
+            lines.append(
+                f"{task.name:>12}: {s.runs:8d} runs  {s.overruns:6d} overruns  "
+                f"jitter {s.mean_jitter * 1e3:8.3f} ms (max {s.max_jitter * 1e3:8.3f})  "
+                f"busy {s.mean_busy * 1e6:8.1f} us (max {s.max_busy * 1e6:8.1f})"
+            )
+        return "\n".join(lines)
+
+    def stop(self) -> None:
+        """stop a running scheduler, safe to call from another thread"""
+        self._stop.set()
+
+    def run(self, duration: float) -> None:
+        """run the tasks for a duration of simulated time"""
+        self.run_until(self.time + duration)
+
+    def run_until(self, t: float) -> None:
+        """run every tick due before the simulated time `t`
+        @param t: simulated time to stop at
+        """
+        self._stop.clear()
+        wall0: float = time.perf_counter()
+        sim0: float = self.time
+
+        while self._queue and self._queue[0][0] < t and not self._stop.is_set():
+            due, priority, order, task = heapq.heappop(self._queue)
+            stats: TaskStats = task.stats
+
+            if self.factor is not None:
+                deadline: float = wall0 + (due - sim0) / self.factor
+                now: float = time.perf_counter()
+                if deadline > now:
+                    time.sleep(deadline - now)
+                    now = time.perf_counter()
+                late: float = max(0.0, now - deadline)
+                stats.jitter += late
+                stats.max_jitter = max(stats.max_jitter, late)
+                stats.overruns += late > task.interval / self.factor
+
+            self.time = due
+            start: float = time.perf_counter()
+            task.fn(due)
+            busy: float = time.perf_counter() - start
+            stats.runs += 1
+            stats.busy += busy
+            stats.max_busy = max(stats.max_busy, busy)
+
+            task.tick += 1
+            heapq.heappush(self._queue, (self._due(task), priority, order, task))
+        if not self._stop.is_set():
+            self.time = max(self.time, t)
@@ -0,0 +1,183 @@
+"""Simulated sensors of a quadcopter or of a batch of quadcopters.
+
+An IMU measures the angular rates and the specific force in the body
+frame, a barometer the altitude and a GPS the position and velocity, each
+at its own rate with a turn-on bias, white noise and a latency. Noise is
+drawn by one seeded generator per sensor in large blocks, so that a run is
+reproducible whatever the rates and a sample costs a slice of the block
+instead of a call into the generator.
+"""
+import math
+import numpy as np
+
+from typing import Union
+from collections import deque
+from dataclasses import dataclass, field
+
+from quadcopter import rotation_matrix
+from quadcopter.quad import Quadcopter, QuadcopterBatch
+
+
+@dataclass
+class SensorConfig(object):
+    rate: float                 # sampling rate, Hz
+    noise: float = 0.0          # standard deviation of the white noise
+    bias: float = 0.0           # standard deviation of the turn-on bias
+    latency: float = 0.0        # delay of the measurements, seconds
+
+
+@dataclass
+class SensorsConfig(object):
+    gyro: SensorConfig = field(default_factory=lambda: SensorConfig(1000.0, 0.01, 0.001))
+    accel: SensorConfig = field(default_factory=lambda: SensorConfig(1000.0, 0.05, 0.02))
+    baro: SensorConfig = field(default_factory=lambda: SensorConfig(50.0, 0.05, 0.05))
+    gps: SensorConfig = field(default_factory=lambda: SensorConfig(10.0, 0.02, 0.0, 0.1))
+
+
+def sensors_config_from_dict(data: dict) -> SensorsConfig:
+    """build a sensors config from its dictionary form, e.g. the `sensors`
+    section of a run config. Missing sensors keep their defaults."""
+    return SensorsConfig(**{
+        name: SensorConfig(**data[name])
+        for name in ("gyro", "accel", "baro", "gps") if name in data
+    })
+
+
+class Noise(object):
+    def __init__(self, rng: np.random.Generator, shape: tuple, block: int = 1024) -> None:
+        """standard normal samples of a shape, generated `block` samples at
+        a time. A sample is a view into the block, valid until the next draw
+        refills it
+        @param rng: generator of the samples
+        @param shape: shape of a sample
+        @param block: number of samples generated at once
+        """
+        self._rng: np.random.Generator = rng
+        self._block: np.ndarray = np.empty((block,) + tuple(shape))
+        self._i: int = block
+
+    def draw(self) -> np.ndarray:
+        if self._i == len(self._block):
+            self._rng.standard_normal(out=self._block)
+            self._i = 0
+        self._i += 1
+        return self._block[self._i - 1]
+
+
+class Sensor(object):
+    def __init__(
+        self, config: SensorConfig, shape: tuple, rng: np.random.Generator, block: int = 1024
+    ) -> None:
+        """a sensor sampled on a grid of its period, its measurements are
+        delivered once their latency has elapsed
+        @param config: sensor config
+        @param shape: shape of a measurement
+        @param rng: generator of the bias and of the noise
+        @param block: number of noise samples generated at once
+        """
+        if config.rate <= 0:
+            raise ValueError("Sampling rate of sensor should be positive")
+
+        if config.latency < 0 or config.noise < 0 or config.bias < 0:
+            raise ValueError("Latency, noise and bias of sensor should be positive or zero")
+
+        self.config: SensorConfig = config
+        self.period: float = 1.0 / config.rate
+        self.bias: np.ndarray = config.bias * rng.standard_normal(shape)
+        self._noise: Noise = Noise(rng, shape, block)
+        self._due: float = -math.inf
+        self._queue: deque[tuple[float, np.ndarray]] = deque()
+
+    def due(self, t: float) -> bool:
+        return t >= self._due - 1e-9
+
+    def sample(self, t: float, value: np.ndarray) -> None:
+        """measure a true value, on the grid of the period unless the sensor
+        fell a whole period behind
+        @param t: time of the measurement
+        @param value: true value
+        """
+        self._due = self._due + self.period if t - self._due < self.period else t + self.period
+        measurement: np.ndarray = self._noise.draw() * self.config.noise
+        measurement += value
+        measurement += self.bias
+        self._queue.append((t, measurement))
+
+    def read(self, t: float) -> Union[tuple[float, np.ndarray], None]:
+        """latest measurement delivered at `t`, older ones are dropped
+        @return: `(time of the measurement, measurement)`, or `None`
+        """
+        latest: Union[tuple[float, np.ndarray], None] = None
+        while self._queue and self._queue[0][0] + self.config.latency <= t + 1e-9:
+            latest = self._queue.popleft()
+        return latest
+
+
+class Sensors(object):
+    def __init__(
+        self,
+        quad: Union[Quadcopter, QuadcopterBatch],
+        config: Union[SensorsConfig, None] = None,
+        seed: Union[int, np.random.SeedSequence, None] = None,
+        block: int = 1024,
+    ) -> None:
+        """IMU, barometer and GPS of a quadcopter, or of each vehicle of a
+        batch, measured in the units of the state
+        @param quad: quadcopter or batch of quadcopters
+        @param config: sensors config, the defaults if `None`
+        @param seed: seed of the noise and of the biases
+        @param block: number of noise samples generated at once
+        """
+        self.quad: Union[Quadcopter, QuadcopterBatch] = quad
+        self.config: SensorsConfig = config or SensorsConfig()
+
+        state: np.ndarray = quad.snapshot().state
+        self.n: int = 1 if state.ndim == 1 else len(state)
+        rngs: list[np.random.Generator] = [
+            np.random.default_rng(s) for s in np.random.SeedSequence(seed).spawn(4)
+        ]
+        n: int = self.n
+        self.gyro: Sensor = Sensor(self.config.gyro, (n, 3), rngs[0], block)
+        self.accel: Sensor = Sensor(self.config.accel, (n, 3), rngs[1], block)
+        self.baro: Sensor = Sensor(self.config.baro, (n,), rngs[2], block)
+        self.gps: Sensor = Sensor(self.config.gps, (n, 6), rngs[3], block)
+
+        ## velocity of the previous update, the acceleration is the change
+        ## of velocity over the last step
+        self._velocity: np.ndarray = state.reshape(n, 12)[:, 3:6].copy()
+        self._rotation: np.ndarray = np.empty((n, 3, 3))
+        self._force: np.ndarray = np.empty((n, 3))
+
+    def update(self, t: float, dt: float) -> dict[str, tuple[float, np.ndarray]]:
+        """sample the sensors due at `t`, after every physics step
+        @param t: current time
+        @param dt: duration of the last step
+        @return: measurements delivered at `t` by name, `(n, 3)` angular
+        rates and specific forces in the body frame, `(n,)` altitudes and
+        `(n, 6)` positions and velocities, along with their time
+        """
+        state: np.ndarray = self.quad.snapshot().state.reshape(self.n, 12)
+
+        if self.accel.due(t):
+            ## specific force of the last step, including the reaction of
+            ## the ground, rotated into the body frame
+            np.subtract(state[:, 3:6], self._velocity, out=self._force)
+            self._force /= dt
+            self._force[:, 2] += 9.81
+            rotation_matrix(state[:, 6:9], out=self._rotation)
+            self.accel.sample(t, np.matmul(self._force[:, np.newaxis], self._rotation)[:, 0])
+        self._velocity[...] = state[:, 3:6]
+
+        if self.gyro.due(t):
+            self.gyro.sample(t, state[:, 9:12])
+        if self.baro.due(t):
+            self.baro.sample(t, state[:, 2])
+        if self.gps.due(t):
+            self.gps.sample(t, state[:, 0:6])
+
+        delivered: dict[str, tuple[float, np.ndarray]] = {}
+        for name in ("gyro", "accel", "baro", "gps"):
+            measurement = getattr(self, name).read(t)
+            if measurement is not None:
+                delivered[name] = measurement
+        return delivered
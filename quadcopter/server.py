@@ -0,0 +1,401 @@
+"""Local simulation server over asyncio with fixed-layout binary frames.
+
+One or many quadcopters, each driven by its `CPID`, are stepped on a
+simulated clock paced against the wall clock, and exposed over a local TCP
+or Unix socket. Clients send targets or raw motor speeds and subscribe to
+the state of vehicles at their own rate. Every frame is a 3 bytes header,
+the kind and the vehicle, followed by a payload whose layout is fixed by
+the kind, all little-endian:
+
+    TARGET     client -> server  x, y, z, yaw            4 float64
+    MOTORS     client -> server  motor speeds            4 float64
+    SUBSCRIBE  client -> server  rate in Hz, 0 to stop   1 float64
+    PING       client -> server  client timestamp        1 float64
+    PONG       server -> client  echoed timestamp        1 float64
+    STATE      server -> client  tick, time, state, motor speeds
+                                                         uint32, 17 float64
+
+Raw motor speeds take the vehicle off its controller until the next
+target, commands with non-finite values are rejected. A slow subscriber
+never slows the simulation down: only the latest state frame of each
+vehicle waits for its socket, older ones are dropped and counted, and a
+client not reading its replies is disconnected.
+
+usage: python -m quadcopter.server serve CONFIG [--n 1] [--port 8765]
+                                                [--unix PATH] [--realtime 1]
+       python -m quadcopter.server loadtest [--port 8765] [--clients 4]
+                                            [--rate 200] [--duration 5]
+"""
+import time
+import struct
+import asyncio
+import argparse
+import numpy as np
+
+from typing import Union
+
+from quadcopter.lockstep import Lockstep
+from quadcopter.control import Controller
+
+
+TARGET, MOTORS, SUBSCRIBE, PING, PONG, STATE = range(1, 7)
+HEADER: struct.Struct = struct.Struct("<BH")
+PAYLOADS: dict[int, struct.Struct] = {
+    TARGET: struct.Struct("<4d"),
+    MOTORS: struct.Struct("<4d"),
+    SUBSCRIBE: struct.Struct("<d"),
+    PING: struct.Struct("<d"),
+    PONG: struct.Struct("<d"),
+    STATE: struct.Struct("<I17d"),
+}
+
+
+def encode(kind: int, vehicle: int, *values) -> bytes:
+    return HEADER.pack(kind, vehicle) + PAYLOADS[kind].pack(*values)
+
+
+async def read_frame(reader: asyncio.StreamReader) -> tuple[int, int, tuple]:
+    """read one frame
+    @return: kind, vehicle and payload values of the frame
+    """
+    kind, vehicle = HEADER.unpack(await reader.readexactly(HEADER.size))
+    if kind not in PAYLOADS:
+        raise ValueError(f"Unknown frame kind: {kind}")
+
+    payload: struct.Struct = PAYLOADS[kind]
+    values: tuple = payload.unpack(await reader.readexactly(payload.size))
+    if kind in (TARGET, MOTORS) and not np.all(np.isfinite(values)):
+        raise ValueError("Commands must have finite values")
+    return kind, vehicle, values
+
+
+class Session(object):
+    def __init__(self, writer: asyncio.StreamWriter, max_replies: int = 1024) -> None:
+        """connection of one client, its state frames are conflated per
+        vehicle while its socket drains, its replies are never dropped
+        @param writer: stream of the client
+        @param max_replies: bound of the queued replies, a client letting
+        more pile up is disconnected
+        """
+        self.writer: asyncio.StreamWriter = writer
+        self.subscriptions: dict[int, list[float]] = {}  # vehicle: [period, due]
+        self.pending: dict[int, bytes] = {}
+        self.replies: asyncio.Queue = asyncio.Queue(maxsize=max_replies)
+        self.sent: int = 0
+        self.dropped: int = 0
+        self._ready: asyncio.Event = asyncio.Event()
+
+    def subscribe(self, vehicle: int, rate: float) -> None:
+        if rate <= 0:
+            self.subscriptions.pop(vehicle, None)
+        else:
+            self.subscriptions[vehicle] = [1.0 / rate, 0.0]
+
+    def due(self, vehicle: int, now: float) -> bool:
+        """whether a state frame of the vehicle is due, at most at the rate
+        of the subscription"""
+        subscription: Union[list[float], None] = self.subscriptions.get(vehicle)
+        if subscription is None or now < subscription[1]:
+            return False
+
+        ## keep to the grid of the rate unless the stream fell a period behind
+        period, due = subscription
+        subscription[1] = due + period if now - due < period else now + period
+        return True
+
+    def offer(self, vehicle: int, frame: bytes) -> None:
+        if vehicle in self.pending:
+            self.dropped += 1
+        self.pending[vehicle] = frame
+        self._ready.set()
+
+    def reply(self, frame: bytes) -> None:
+        """queue a reply, raises `asyncio.QueueFull` once the bound is reached"""
+        self.replies.put_nowait(frame)
+        self._ready.set()
+
+    async def send(self) -> None:
+        """write the queued frames, waiting for the socket to drain"""
+        while True:
+            await self._ready.wait()
+            self._ready.clear()
+            frames: list[bytes] = []
+            while not self.replies.empty():
+                frames.append(self.replies.get_nowait())
+            frames.extend(self.pending.values())
+            self.sent += len(self.pending)
+            self.pending = {}
+            self.writer.write(b"".join(frames))
+            await self.writer.drain()
+
+
+class Server(object):
+    def __init__(self, sims: list[Lockstep], factor: Union[float, None] = 1.0) -> None:
+        """serve simulations driven by their controllers
+        @param sims: lockstep runner of each vehicle, sharing their periods
+        @param factor: real-time factor of the simulated clock, or `None`
+        to run as fast as possible
+        """
+        if len({(sim.dt, sim.ctrl_period) for sim in sims}) != 1:
+            raise ValueError("Served simulations must share their time steps")
+
+        self.sims: list[Lockstep] = sims
+        self.factor: Union[float, None] = factor
+        self.sessions: set[Session] = set()
+        self.ticks: int = 0
+        self._controllers: list[Union[Controller, None]] = [sim.ctrl for sim in sims]
+        self._server: Union[asyncio.AbstractServer, None] = None
+
+    async def start(
+        self, host: str = "127.0.0.1", port: int = 0, path: Union[str, None] = None
+    ) -> asyncio.AbstractServer:
+        """listen on a TCP port, or on a Unix socket when a path is given"""
+        if path is not None:
+            self._server = await asyncio.start_unix_server(self._handle, path)
+        else:
+            self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server
+
+    @property
+    def port(self) -> int:
+        return self._server.sockets[0].getsockname()[1]
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        session: Session = Session(writer)
+        sender: asyncio.Task = asyncio.create_task(session.send())
+        self.sessions.add(session)
+        try:
+            while True:
+                kind, vehicle, values = await read_frame(reader)
+                if kind == PING:
+                    session.reply(encode(PONG, vehicle, *values))
+                elif vehicle >= len(self.sims):
+                    continue
+                elif kind == SUBSCRIBE:
+                    session.subscribe(vehicle, values[0])
+                elif kind == TARGET:
+                    self.target(vehicle, values)
+                elif kind == MOTORS:
+                    self.motors(vehicle, values)
+        except (asyncio.IncompleteReadError, asyncio.QueueFull, ConnectionError, ValueError):
+            pass
+        finally:
+            self.sessions.discard(session)
+            sender.cancel()
+            writer.close()
+
+    def target(self, vehicle: int, target: tuple[float, float, float, float]) -> None:
+        """give the vehicle back to its controller with a new target"""
+        sim: Lockstep = self.sims[vehicle]
+        sim.ctrl = self._controllers[vehicle]
+        sim.ctrl.update_target(target)
+
+    def motors(self, vehicle: int, speeds: tuple[float, ...]) -> None:
+        """drive the motors of the vehicle directly, bypassing its controller"""
+        sim: Lockstep = self.sims[vehicle]
+        sim.ctrl = None
+        sim.quad.set_motor_speeds(np.maximum(np.array(speeds), 0.0))
+
+    def publish(self, now: float) -> None:
+        """offer the latest state of each vehicle to its due subscribers, a
+        frame is encoded once whatever the number of subscribers"""
+        for vehicle, sim in enumerate(self.sims):
+            frame: Union[bytes, None] = None
+            for session in self.sessions:
+                if session.due(vehicle, now):
+                    if frame is None:
+                        snapshot = sim.quad.snapshot()
+                        frame = encode(
+                            STATE, vehicle, self.ticks & 0xFFFFFFFF, snapshot.time,
+                            *snapshot.state.tolist(), *sim.quad.motors.speeds.tolist(),
+                        )
+                    session.offer(vehicle, frame)
+
+    async def run(self, duration: Union[float, None] = None) -> None:
+        """step the simulations tick by tick, one controller period each
+        @param duration: simulated duration, forever by default
+        """
+        sim: Lockstep = self.sims[0]
+        period: float = sim.ctrl_period
+        decimation: int = round(period / sim.dt)
+        ticks: Union[int, None] = None if duration is None else round(duration / period)
+        start: float = time.perf_counter()
+        k: int = 0
+        while ticks is None or k < ticks:
+            for sim in self.sims:
+                sim.run(decimation)
+            k += 1
+            self.ticks += 1
+            now: float = time.perf_counter()
+            self.publish(now)
+            if self.factor:
+                await asyncio.sleep(max(0.0, start + k * period / self.factor - now))
+            else:
+                await asyncio.sleep(0)
+
+
+class Client(object):
+    def __init__(self) -> None:
+        """asyncio client of the simulation server"""
+        self.states: dict[int, tuple] = {}
+        self.received: int = 0
+        self._reader: Union[asyncio.StreamReader, None] = None
+        self._writer: Union[asyncio.StreamWriter, None] = None
+        self._pings: dict[float, asyncio.Future] = {}
+        self._task: Union[asyncio.Task, None] = None
+
+    async def connect(
+        self, host: str = "127.0.0.1", port: int = 8765, path: Union[str, None] = None
+    ) -> "Client":
+        if path is not None:
+            self._reader, self._writer = await asyncio.open_unix_connection(path)
+        else:
+            self._reader, self._writer = await asyncio.open_connection(host, port)
+        self._task = asyncio.create_task(self._receive())
+        return self
+
+    async def _receive(self) -> None:
+        try:
+            while True:
+                kind, vehicle, values = await read_frame(self._reader)
+                if kind == STATE:
+                    self.received += 1
+                    self.states[vehicle] = values
+                elif kind == PONG and values[0] in self._pings:
+                    self._pings.pop(values[0]).set_result(time.perf_counter())
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+
+    def target(self, vehicle: int, target: tuple[float, float, float, float]) -> None:
+        self._writer.write(encode(TARGET, vehicle, *target))
+
+    def motors(self, vehicle: int, speeds: tuple[float, float, float, float]) -> None:
+        self._writer.write(encode(MOTORS, vehicle, *speeds))
+
+    def subscribe(self, vehicle: int, rate: float) -> None:
+        self._writer.write(encode(SUBSCRIBE, vehicle, rate))
+
+    async def ping(self) -> float:
+        """round-trip time of a frame through the server, in seconds"""
+        sent: float = time.perf_counter()
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._pings[sent] = future
+        self._writer.write(encode(PING, 0, sent))
+        await self._writer.drain()
+        return await future - sent
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+        if self._writer is not None:
+            self._writer.close()
+
+
+async def loadtest(
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    path: Union[str, None] = None,
+    clients: int = 4,
+    vehicles: int = 1,
+    rate: float = 200.0,
+    command_rate: float = 50.0,
+    duration: float = 5.0,
+) -> dict:
+    """measure the throughput and latency of a running server, every client
+    subscribes to every vehicle, sends targets and pings in a loop
+    @param rate: subscription rate of each client, in Hz
+    @param command_rate: rate of the targets and pings of each client
+    @return: frames received per second, commands sent per second and
+    round-trip latency percentiles in milliseconds
+    """
+    connections: list[Client] = [await Client().connect(host, port, path) for _ in range(clients)]
+    for client in connections:
+        for vehicle in range(vehicles):
+            client.subscribe(vehicle, rate)
+
+    latencies: list[float] = []
+    commands: list[int] = [0]
+
+    async def drive(client: Client, seed: int) -> None:
+        rng: np.random.Generator = np.random.default_rng(seed)
+        end: float = time.perf_counter() + duration
+        while time.perf_counter() < end:
+            client.target(int(rng.integers(vehicles)), (*rng.uniform(-1, 1, 2), 1.0, 0.0))
+            commands[0] += 1
+            latencies.append(await client.ping())
+            await asyncio.sleep(1.0 / command_rate)
+
+    start: float = time.perf_counter()
+    await asyncio.gather(*(drive(client, i) for i, client in enumerate(connections)))
+    elapsed: float = time.perf_counter() - start
+    received: int = sum(client.received for client in connections)
+    for client in connections:
+        await client.close()
+
+    rtt: np.ndarray = np.array(latencies) * 1e3
+    return {
+        "frames_per_second": received / elapsed,
+        "commands_per_second": commands[0] / elapsed,
+        "rtt_ms": {
+            f"p{p}": float(np.percentile(rtt, p)) if len(rtt) else np.nan for p in (50, 90, 99)
+        },
+    }
+
+
+async def serve(server: Server, host: str, port: int, path: Union[str, None]) -> None:
+    await server.start(host, port, path)
+    print(f"serving {len(server.sims)} vehicles on {path or f'{host}:{server.port}'}")
+    try:
+        await server.run()
+    finally:
+        await server.close()
+
+
+def main(argv: Union[list[str], None] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    served = commands.add_parser("serve", help="serve the vehicles of a run config")
+    served.add_argument("config", help="run config, see `python -m quadcopter`")
+    served.add_argument("--n", type=int, default=1, help="number of vehicles")
+    served.add_argument("--realtime", type=float, default=1.0, help="0 for as fast as possible")
+    tested = commands.add_parser("loadtest", help="measure a running server")
+    tested.add_argument("--clients", type=int, default=4)
+    tested.add_argument("--vehicles", type=int, default=1)
+    tested.add_argument("--rate", type=float, default=200.0)
+    tested.add_argument("--command-rate", type=float, default=50.0)
+    tested.add_argument("--duration", type=float, default=5.0)
+    for command in (served, tested):
+        command.add_argument("--host", default="127.0.0.1")
+        command.add_argument("--port", type=int, default=8765)
+        command.add_argument("--unix", default=None, help="Unix socket path")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        from quadcopter import load_json_config
+        from quadcopter.cli import build
+
+        config: dict = load_json_config(args.config)
+        server: Server = Server([build(config) for _ in range(args.n)], args.realtime or None)
+        try:
+            asyncio.run(serve(server, args.host, args.port, args.unix))
+        except KeyboardInterrupt:
+            print("Server Stopped")
+        return
+
+    result: dict = asyncio.run(loadtest(
+        args.host, args.port, args.unix, args.clients, args.vehicles,
+        args.rate, args.command_rate, args.duration,
+    ))
+    print(f"state frames  : {result['frames_per_second']:10.0f} /s")
+    print(f"commands      : {result['commands_per_second']:10.0f} /s")
+    for name, value in result["rtt_ms"].items():
+        print(f"rtt {name:>3}       : {value:10.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import numpy as np
+
+from typing import NamedTuple
+
+
+class Snapshot(NamedTuple):
+    seq: int
+    time: float
+    state: np.ndarray
+    thrust: np.ndarray
+
+
+class SnapshotBuffer(object):
+    def __init__(self, state_shape: tuple = (12,), thrust_shape: tuple = (4,), slots: int = 3) -> None:
+        """publication of consistent `(state, thrust, time)` snapshots from a
+        single writer to many readers in other threads, without locks.
+
+        The writer copies into the oldest of `slots` preallocated slots and
+        then swaps the reference to the latest snapshot, which is atomic for
+        readers. Snapshots hold read-only views of their slot, so reading is
+        free of copies; a slot is only rewritten `slots` publications later
+        and readers holding a snapshot longer can check it with `valid`.
+        @param state_shape: shape of the state
+        @param thrust_shape: shape of the motor thrusts
+        @param slots: number of slots, at least 2
+        """
+        if slots < 2:
+            raise ValueError("Snapshot buffer needs at least two slots")
+
+        self.slots: int = slots
+        self._states: np.ndarray = np.zeros((slots,) + tuple(state_shape))
+        self._thrusts: np.ndarray = np.zeros((slots,) + tuple(thrust_shape))
+        self._seqs: list[int] = [-1] * slots
+
+        ## read-only views handed to the readers
+        self._views: list[tuple[np.ndarray, np.ndarray]] = []
+        for state, thrust in zip(self._states, self._thrusts):
+            state, thrust = state.view(), thrust.view()
+            state.flags.writeable = thrust.flags.writeable = False
+            self._views.append((state, thrust))
+
+        self._latest: Snapshot = Snapshot(-1, 0.0, *self._views[-1])
+
+    def publish(self, t: float, state: np.ndarray, thrust: np.ndarray) -> Snapshot:
+        """copy and publish a new snapshot, only one thread may publish
+        @param t: simulated time of the state
+        @param state: state to be published
+        @param thrust: motor thrusts applied to reach the state
+        @return: the published snapshot
+        """
+        seq: int = self._latest.seq + 1
+        slot: int = seq % self.slots
+        self._seqs[slot] = -1
+        self._states[slot] = state
+        self._thrusts[slot] = thrust
+        self._seqs[slot] = seq
+
+        self._latest = Snapshot(seq, t, *self._views[slot])
+        return self._latest
+
+    def read(self) -> Snapshot:
+        """latest published snapshot"""
+        return self._latest
+
+    def valid(self, snapshot: Snapshot) -> bool:
+        """whether the slot of a snapshot has not been reused since it was
+        published, check it after reading the arrays of an old snapshot"""
+        return self._seqs[snapshot.seq % self.slots] == snapshot.seq
@@ -0,0 +1,140 @@
+"""Linear surrogate of the quadcopter dynamics for fast approximate rollouts.
+
+The rigid-body dynamics are linearized around hover with the analytical
+Jacobians and discretized exactly for a zero-order hold of the thrusts
+through the matrix exponential, so a step is two matrix products whatever
+its length. `SurrogateBatch` is a drop-in replacement of `QuadcopterBatch`,
+a `Lockstep` can step it once per controller tick. Thrusts follow the motor
+curve exactly, ground contact is not modeled.
+
+`validate` runs the surrogate against the nonlinear model to tell how far
+from hover it stays trustworthy.
+"""
+import numpy as np
+
+from typing import Union
+
+from quadcopter import QuadConfig, wrap
+from quadcopter.quad import Quadcopter, QuadcopterBatch
+from quadcopter.lockstep import Lockstep
+from quadcopter.control import CPID, ControlConfig, BatchCPID
+
+
+## discretized models keyed by the parameters of the config, the trim yaw
+## and the time step
+_DISCRETIZATIONS: dict[tuple, tuple[np.ndarray, np.ndarray]] = {}
+
+
+def discretize(A: np.ndarray, B: np.ndarray, dt: float) -> tuple[np.ndarray, np.ndarray]:
+    """exact discretization of `dx/dt = A x + B u` with `u` held over `dt`
+    @return: `A_d = exp(A dt)` and `B_d = int_0^dt exp(A s) ds B`
+    """
+    from scipy.linalg import expm
+
+    n, m = B.shape
+    block: np.ndarray = np.zeros((n + m, n + m))
+    block[:n, :n], block[:n, n:] = A, B
+    exponential: np.ndarray = expm(block * dt)
+    return exponential[:n, :n], exponential[:n, n:]
+
+
+def hover(quad: Quadcopter, config: QuadConfig) -> tuple[np.ndarray, np.ndarray]:
+    """trim point of a config, hovering at its initial position and yaw
+    @param quad: quadcopter built from the config
+    @param config: configuration of the quadcopter
+    @return: trim state `(12,)` and motor thrusts `(4,)`
+    """
+    state: np.ndarray = np.zeros(12)
+    state[0:3] = config.states[0]
+    state[8] = config.states[1][2]
+    thrust: np.ndarray = np.linalg.solve(
+        quad._allocation_matrix, [config.weight * 9.81, 0.0, 0.0, 0.0]
+    )
+    return state, thrust
+
+
+class SurrogateBatch(QuadcopterBatch):
+    def __init__(self, config: QuadConfig, n: int = 1) -> None:
+        """many copies of one quadcopter simulated by its linear surrogate
+        around hover, e.g. one per gain set or initial state
+        @param config: configuration of the quadcopters
+        @param n: number of quadcopters
+        """
+        super(SurrogateBatch, self).__init__([config] * n)
+        self._model: Quadcopter = Quadcopter(config, "rk4")
+        self.trim_state, self.trim_thrust = hover(self._model, config)
+        self._key: tuple = (
+            config.weight, config.length, config.radius, config.lift_const,
+            config.motors.d, config.motors.pitch, self.trim_state[8],
+        )
+        self._dx: np.ndarray = np.empty((n, 12))
+        self._du: np.ndarray = np.empty((n, 4))
+
+    def discretization(self, dt: float) -> tuple[np.ndarray, np.ndarray]:
+        """cached `(A_d, B_d)` of the config for a time step"""
+        key: tuple = self._key + (dt,)
+        if key not in _DISCRETIZATIONS:
+            A, B = self._model.linearize(self.trim_state, self.trim_thrust)
+            _DISCRETIZATIONS[key] = discretize(A, B, dt)
+        return _DISCRETIZATIONS[key]
+
+    def _update(self, dt: float) -> None:
+        A_d, B_d = self.discretization(dt)
+        thrust: np.ndarray = self._motors.advance(dt)
+        np.subtract(self._state, self.trim_state, out=self._dx)
+        np.subtract(thrust, self.trim_thrust, out=self._du)
+        np.matmul(self._dx, A_d.T, out=self._state)
+        self._state += self._du @ B_d.T
+        self._state += self.trim_state
+        self._snapshots.publish(self._time, self._state, thrust)
+
+
+def validate(
+    quad_config: QuadConfig,
+    ctrl_config: ControlConfig,
+    target: tuple[float, float, float, float],
+    duration: float,
+    dt: float = 1e-3,
+    ctrl_period: float = 5e-3,
+) -> dict:
+    """closed-loop error of the surrogate against the nonlinear model, both
+    driven by the same control law, the surrogate stepping once per tick
+    @param target: target `(x, y, z, yaw)`
+    @param duration: simulated time
+    @return: position and attitude errors over the run, in the units of the
+    states, and the largest attitude deviation of the nonlinear model from
+    the trim, the surrogate degrades as it grows
+    """
+    ticks: int = round(duration / ctrl_period)
+
+    quad: Quadcopter = Quadcopter(quad_config, "rk4")
+    ctrl: CPID = CPID(ctrl_config, quad)
+    ctrl.update_target(target)
+    nonlinear: Lockstep = Lockstep(quad, ctrl, dt, ctrl_period)
+
+    surrogate: SurrogateBatch = SurrogateBatch(quad_config)
+    batch: BatchCPID = BatchCPID(ctrl_config, surrogate)
+    batch.update_target(target)
+    linear: Lockstep = Lockstep(surrogate, batch, ctrl_period, ctrl_period)
+
+    position: np.ndarray = np.empty(ticks)
+    attitude: np.ndarray = np.empty(ticks)
+    deviation: float = 0.0
+    with np.errstate(all="ignore"):
+        for k in range(ticks):
+            nonlinear.run_until(linear.time + ctrl_period)
+            linear.step()
+            error: np.ndarray = quad.state - surrogate.state[0]
+            position[k] = np.linalg.norm(error[0:3])
+            attitude[k] = np.max(np.abs(wrap(error[6:9])))
+            deviation = max(deviation, float(np.max(np.abs(
+                wrap(quad.state[6:9] - surrogate.trim_state[6:9])
+            ))))
+
+    return {
+        "position_rms": float(np.sqrt(np.mean(position**2))),
+        "position_max": float(np.max(position)),
+        "attitude_max": float(np.max(attitude)),
+        "final_position": float(position[-1]),
+        "max_attitude_deviation": deviation,
+    }
@@ -0,0 +1,279 @@
+"""Parallel swarm of quadcopters partitioned across worker processes.
+
+The vehicles are split into contiguous shards, each stepped by one worker
+process as a `QuadcopterBatch` driven by a `BatchCPID`. The states, motor
+speeds, targets and PID integrators of all vehicles live in shared memory
+arrays which the workers update in place, so the parent process only reads
+or writes these arrays between runs. Workers meet on a barrier after every
+controller tick, keeping all shards on the same simulated clock.
+
+usage: python -m quadcopter.swarm [--config FILE] [--control FILE] [--n 10000]
+                                  [--workers N] [--duration 1]
+"""
+import os
+import time
+import argparse
+import threading
+import numpy as np
+import multiprocessing as mp
+
+from typing import Union
+from multiprocessing import shared_memory
+
+from quadcopter import QuadConfig, load_config
+from quadcopter.quad import QuadcopterBatch
+from quadcopter.lockstep import Lockstep
+from quadcopter.control import BatchCPID, ControlConfig, load_control_config
+
+
+## shared arrays, their trailing shape per vehicle
+ARRAYS: dict[str, tuple] = {
+    "state": (12,),
+    "speeds": (4,),
+    "targets": (4,),
+    "integrators": (6,),    # position then attitude PID integrators
+}
+
+## commands of the workers, written to the shared `command` array
+STOP: int = -1
+
+
+def _views(blocks: dict[str, shared_memory.SharedMemory], n: int) -> dict[str, np.ndarray]:
+    return {
+        key: np.ndarray((1,) if key == "command" else (n,) + ARRAYS[key], dtype=float, buffer=block.buf)
+        for key, block in blocks.items()
+    }
+
+
+def _work(
+    names: dict[str, str],
+    n: int,
+    shard: tuple[int, int],
+    quad_configs: list[QuadConfig],
+    ctrl_configs: list[ControlConfig],
+    options: dict,
+    start: mp.Barrier,
+    tick: mp.Barrier,
+) -> None:
+    """loop of a worker process, stepping the vehicles `lo:hi` run by run"""
+    blocks: dict[str, shared_memory.SharedMemory] = {
+        key: shared_memory.SharedMemory(name=name) for key, name in names.items()
+    }
+    arrays: dict[str, np.ndarray] = _views(blocks, n)
+    lo, hi = shard
+    try:
+        quad: QuadcopterBatch = QuadcopterBatch(
+            quad_configs, options["integrator"],
+            state=arrays["state"][lo:hi], speeds=arrays["speeds"][lo:hi],
+        )
+        ctrl: BatchCPID = BatchCPID(ctrl_configs, quad)
+        ## the integrators are updated in place, bind them to shared views
+        integrators: np.ndarray = arrays["integrators"][lo:hi]
+        ctrl.position.Ie, ctrl.attitude.Ie = integrators[:, 0:3], integrators[:, 3:6]
+        sim: Lockstep = Lockstep(quad, ctrl, options["dt"], options["ctrl_period"])
+        decimation: int = round(options["ctrl_period"] / options["dt"])
+        start.wait()
+
+        while True:
+            start.wait()
+            ticks: int = int(arrays["command"][0])
+            if ticks == STOP:
+                break
+            ## the states may have been written between runs, publish them
+            ## before the first command is computed from the snapshot
+            quad.publish()
+            ctrl.update_target(arrays["targets"][lo:hi])
+            for _ in range(ticks):
+                sim.run(decimation)
+                tick.wait()
+            start.wait()
+    except threading.BrokenBarrierError:
+        pass
+    except BaseException:
+        start.abort()
+        tick.abort()
+        raise
+    finally:
+        del arrays
+        for block in blocks.values():
+            block.close()
+
+
+def partition(n: int, shards: int) -> list[tuple[int, int]]:
+    """contiguous `(lo, hi)` bounds of balanced shards of `n` vehicles"""
+    bounds: np.ndarray = np.linspace(0, n, min(shards, n) + 1).round().astype(int)
+    return [(int(lo), int(hi)) for lo, hi in zip(bounds[:-1], bounds[1:])]
+
+
+class Swarm(object):
+    def __init__(
+        self,
+        quad_config: Union[QuadConfig, list[QuadConfig]],
+        ctrl_config: Union[ControlConfig, list[ControlConfig]],
+        n: Union[int, None] = None,
+        workers: Union[int, None] = None,
+        dt: float = 1e-3,
+        ctrl_period: float = 5e-3,
+        integrator: str = "rk4",
+    ) -> None:
+        """swarm of quadcopters stepped in parallel by worker processes,
+        use it as a context manager or `close` it to release the workers
+        @param quad_config: one config shared by all vehicles, or one config
+        per vehicle
+        @param ctrl_config: one control config shared by all vehicles, or
+        one control config per vehicle
+        @param n: number of vehicles, the length of the config lists by default
+        @param workers: number of worker processes, all cores by default
+        @param dt: time step of physics
+        @param ctrl_period: period of the controllers, a multiple of `dt`
+        @param integrator: `rk4` or `rk45`
+        """
+        if n is None:
+            n = len(quad_config) if isinstance(quad_config, list) else len(ctrl_config)
+        quad_configs: list[QuadConfig] = (
+            quad_config if isinstance(quad_config, list) else [quad_config] * n
+        )
+        ctrl_configs: list[ControlConfig] = (
+            ctrl_config if isinstance(ctrl_config, list) else [ctrl_config] * n
+        )
+        if len(quad_configs) != n or len(ctrl_configs) != n:
+            raise ValueError("Number of configs must match number of vehicles")
+
+        self.n: int = n
+        self.ctrl_period: float = ctrl_period
+        self.shards: list[tuple[int, int]] = partition(n, workers or os.cpu_count() or 1)
+        self.ticks: int = 0
+
+        self._blocks: dict[str, shared_memory.SharedMemory] = {
+            key: shared_memory.SharedMemory(create=True, size=max(8, n * int(np.prod(shape)) * 8))
+            for key, shape in ARRAYS.items()
+        }
+        self._blocks["command"] = shared_memory.SharedMemory(create=True, size=8)
+        names: dict[str, str] = {key: block.name for key, block in self._blocks.items()}
+        self._arrays: dict[str, np.ndarray] = _views(self._blocks, n)
+        self._arrays["integrators"].fill(0.0)
+        self._arrays["targets"][:] = [[*config.states[0], 0.0] for config in quad_configs]
+
+        ## workers and parent meet on `start` before and after every run,
+        ## workers meet on `tick` after every controller tick
+        self._start: mp.Barrier = mp.Barrier(len(self.shards) + 1)
+        self._tick: mp.Barrier = mp.Barrier(len(self.shards))
+        options: dict = {"dt": dt, "ctrl_period": ctrl_period, "integrator": integrator}
+        self._workers: list[mp.Process] = [
+            mp.Process(
+                target=_work,
+                args=(
+                    names, n, (lo, hi), quad_configs[lo:hi], ctrl_configs[lo:hi],
+                    options, self._start, self._tick,
+                ),
+                daemon=True,
+            )
+            for lo, hi in self.shards
+        ]
+        try:
+            for worker in self._workers:
+                worker.start()
+            self._start.wait()
+        except BaseException:
+            self.close()
+            raise
+
+    def __enter__(self) -> "Swarm":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @property
+    def time(self) -> float:
+        return self.ticks * self.ctrl_period
+
+    @property
+    def state(self) -> np.ndarray:
+        """shared `(N, 12)` states, writable between runs"""
+        return self._arrays["state"]
+
+    @property
+    def speeds(self) -> np.ndarray:
+        """shared `(N, 4)` motor speeds"""
+        return self._arrays["speeds"]
+
+    @property
+    def targets(self) -> np.ndarray:
+        """shared `(N, 4)` targets `(x, y, z, yaw)`, writable between runs"""
+        return self._arrays["targets"]
+
+    @property
+    def integrators(self) -> np.ndarray:
+        """shared `(N, 6)` integrators of the position and attitude PIDs"""
+        return self._arrays["integrators"]
+
+    def update_target(self, target: np.ndarray) -> None:
+        """set the targets, shared by all vehicles or one per vehicle"""
+        self.targets[:] = np.broadcast_to(np.asarray(target, dtype=float), (self.n, 4))
+
+    def run(self, ticks: int) -> None:
+        """advance every vehicle by a number of controller ticks, blocking
+        until all shards are done
+        @param ticks: number of controller periods
+        """
+        if ticks < 0:
+            raise ValueError("Number of ticks should be positive or zero")
+
+        self._arrays["command"][0] = ticks
+        self._start.wait()
+        self._start.wait()
+        self.ticks += ticks
+
+    def run_until(self, t: float) -> None:
+        """advance every vehicle until the simulated clock reaches `t`"""
+        self.run(max(0, round(t / self.ctrl_period) - self.ticks))
+
+    def close(self) -> None:
+        """stop the workers and release the shared memory"""
+        if not self._blocks:
+            return
+
+        if all(worker.is_alive() for worker in self._workers) and not self._start.broken:
+            self._arrays["command"][0] = STOP
+            try:
+                self._start.wait(timeout=10)
+            except threading.BrokenBarrierError:
+                pass
+        for worker in self._workers:
+            worker.join(timeout=10)
+            if worker.is_alive():
+                worker.terminate()
+
+        self._arrays.clear()
+        for block in self._blocks.values():
+            block.close()
+            block.unlink()
+        self._blocks = {}
+
+
+def main(argv: Union[list[str], None] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--config", default="./cfg/quad.json", help="quadcopter config")
+    parser.add_argument("--control", default="./cfg/run.json", help="json file with a `control` section")
+    parser.add_argument("--n", type=int, default=10000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--target", type=float, nargs=4, default=(1, 1, 1, 0))
+    parser.add_argument("--duration", type=float, default=1.0)
+    args = parser.parse_args(argv)
+
+    control: ControlConfig = load_control_config(args.control)
+    with Swarm(load_config(args.config), control, args.n, args.workers) as swarm:
+        swarm.update_target(args.target)
+        start: float = time.perf_counter()
+        swarm.run_until(args.duration)
+        elapsed: float = time.perf_counter() - start
+        error: np.ndarray = np.linalg.norm(swarm.state[:, 0:3] - swarm.targets[:, 0:3], axis=1)
+        print(f"vehicles      : {swarm.n} in {len(swarm.shards)} shards")
+        print(f"simulated     : {swarm.time:.3f} s in {elapsed:.3f} s")
+        print(f"vehicle-ticks : {swarm.n * swarm.ticks / elapsed:.0f} /s")
+        print(f"mean error    : {np.nanmean(error):.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""Parallel PID gain sweep with step-response metrics.
+
+Each candidate overrides some gains of a base control config, keyed by
+`<loop>.<gain>` such as `position.Kp` or `attitude.Kd`. Candidates are
+simulated headless in a process pool and every result is appended to a
+json lines file as soon as it finishes, so that an interrupted sweep can
+be resumed by running it again with the same output file.
+
+usage: python -m quadcopter.sweep SPEC --out results.jsonl [--workers N]
+
+The spec is a json file with a `control` section (the base gains) and
+either a `grid`, mapping gain keys to lists of values, or a `random`
+section with `n`, `seed` and `bounds` mapping gain keys to `[low, high]`.
+"""
+import os
+import json
+import argparse
+import itertools
+import numpy as np
+
+from typing import Iterator, Union
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from quadcopter import QuadConfig, load_config, load_json_config
+from quadcopter.quad import Quadcopter
+from quadcopter.lockstep import Lockstep
+from quadcopter.metrics import step_response
+from quadcopter.control import CPID, ControlConfig
+from quadcopter.control import control_config_from_dict, control_config_to_dict
+
+
+GAINS: tuple[str, ...] = tuple(
+    f"{loop}.{gain}" for loop in ("position", "attitude") for gain in ("Kp", "Ki", "Kd")
+)
+
+
+def grid(space: dict[str, list]) -> list[dict]:
+    """cartesian product of the gain values
+    @param space: gain key to list of values, each value a list of three gains
+    @return: candidates
+    """
+    for key in space:
+        if key not in GAINS:
+            raise ValueError(f"Unknown gain: {key}")
+
+    keys: list[str] = list(space)
+    return [dict(zip(keys, values)) for values in itertools.product(*space.values())]
+
+
+def random_samples(bounds: dict[str, list], n: int, seed: int = 0) -> list[dict]:
+    """uniformly sample the gains between their bounds
+    @param bounds: gain key to `[low, high]`, each bound a list of three gains
+    @param n: number of candidates
+    @param seed: seed of random number generator
+    @return: candidates
+    """
+    for key in bounds:
+        if key not in GAINS:
+            raise ValueError(f"Unknown gain: {key}")
+
+    rng: np.random.Generator = np.random.default_rng(seed)
+    samples: dict[str, np.ndarray] = {
+        key: rng.uniform(low, high, (n, 3)) for key, (low, high) in bounds.items()
+    }
+    return [{key: samples[key][i].tolist() for key in bounds} for i in range(n)]
+
+
+def apply(base: dict, candidate: dict) -> ControlConfig:
+    """override the gains of a base control config with a candidate
+    @param base: dictionary form of the base control config
+    @param candidate: gain key to values
+    @return: control config of the candidate
+    """
+    data: dict = json.loads(json.dumps(base))
+    for key, values in candidate.items():
+        loop, gain = key.split(".")
+        data[loop][gain] = list(values)
+    return control_config_from_dict(data)
+
+
+def evaluate(
+    quad_config: QuadConfig,
+    ctrl_config: ControlConfig,
+    target: tuple[float, float, float, float],
+    duration: float = 5.0,
+    dt: float = 1e-3,
+    ctrl_period: float = 5e-3,
+) -> dict:
+    """simulate a closed-loop step response headless and evaluate it
+    @param quad_config: quadcopter config
+    @param ctrl_config: control config
+    @param target: step target `(x, y, z, yaw)`
+    @param duration: simulated duration
+    @param dt: time step of physics
+    @param ctrl_period: period of controller
+    @return: step-response metrics
+    """
+    quad: Quadcopter = Quadcopter(quad_config, "rk4")
+    ctrl: CPID = CPID(ctrl_config, quad)
+    ctrl.update_target(target)
+    sim: Lockstep = Lockstep(quad, ctrl, dt, ctrl_period)
+
+    ticks: int = round(duration / ctrl_period)
+    decimation: int = round(ctrl_period / dt)
+    t: np.ndarray = np.empty(ticks + 1)
+    position: np.ndarray = np.empty((ticks + 1, 3))
+    commands: np.ndarray = np.empty((ticks, 4))
+    t[0], position[0] = sim.time, quad.state[0:3]
+    with np.errstate(all="ignore"):
+        for k in range(ticks):
+            sim.run(decimation)
+            t[k + 1], position[k + 1] = sim.time, quad.state[0:3]
+            commands[k] = quad.motors.speeds
+            if not np.all(np.isfinite(quad.state)):
+                position[k + 1:] = np.nan
+                break
+
+    return step_response(
+        t, position, np.array(target[:3]), commands, ctrl_config.motor_limit
+    ).to_dict()
+
+
+def _evaluate(job: tuple) -> tuple[int, dict]:
+    index, quad_config, base, candidate, options = job
+    return index, evaluate(quad_config, apply(base, candidate), **options)
+
+
+def completed(out_path: str) -> dict[int, dict]:
+    """candidates already written to the output file
+    @return: gain overrides of each written result by index
+    """
+    if not os.path.exists(out_path):
+        return {}
+
+    done: dict[int, dict] = {}
+    with open(out_path, "r") as file:
+        for line in file:
+            try:
+                result: dict = json.loads(line)
+                done[result["index"]] = result["gains"]
+            except (json.JSONDecodeError, KeyError):
+                continue  # truncated by an interruption
+    return done
+
+
+def _drop_partial_line(out_path: str) -> None:
+    ## cut a record left incomplete by an interruption, so that the next
+    ## result starts on a line of its own
+    if not os.path.exists(out_path):
+        return
+
+    with open(out_path, "rb+") as file:
+        data: bytes = file.read()
+        if data and not data.endswith(b"\n"):
+            file.truncate(data.rfind(b"\n") + 1)
+
+
+def sweep(
+    quad_config: QuadConfig,
+    base: Union[ControlConfig, dict],
+    candidates: list[dict],
+    out_path: str,
+    workers: Union[int, None] = None,
+    **options,
+) -> Iterator[dict]:
+    """evaluate the candidates over a process pool, streaming each result to
+    the output file as it finishes and skipping candidates already there. An
+    output file holding results of other candidates is refused
+    @param quad_config: quadcopter config
+    @param base: base control config
+    @param candidates: gain overrides of each candidate
+    @param out_path: json lines output file
+    @param workers: number of worker processes, all cores by default
+    @param options: `target`, `duration`, `dt` and `ctrl_period` of `evaluate`
+    @return: iterator over the new results
+    """
+    if isinstance(base, ControlConfig):
+        base = control_config_to_dict(base)
+
+    done: dict[int, dict] = completed(out_path)
+    for index, gains in done.items():
+        if index >= len(candidates) or gains != json.loads(json.dumps(candidates[index])):
+            raise ValueError(f"Results in {out_path} are of other candidates, use another output")
+
+    jobs: list[tuple] = [
+        (index, quad_config, base, candidate, options)
+        for index, candidate in enumerate(candidates) if index not in done
+    ]
+    if not jobs:
+        return
+
+    _drop_partial_line(out_path)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool, open(out_path, "a") as file:
+        futures: dict = {pool.submit(_evaluate, job): job for job in jobs}
+        for future in as_completed(futures):
+            index, metrics = future.result()
+            result: dict = {"index": index, "gains": futures[future][3], **metrics}
+            file.write(json.dumps(result) + "\n")
+            file.flush()
+            yield result
+
+
+def load_candidates(spec: dict) -> list[dict]:
+    if "grid" in spec:
+        return grid(spec["grid"])
+
+    if "random" in spec:
+        random: dict = spec["random"]
+        return random_samples(random["bounds"], random["n"], random.get("seed", 0))
+
+    raise ValueError("Sweep spec needs a `grid` or a `random` section")
+
+
+def main(argv: Union[list[str], None] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("spec", help="json file with `control` and `grid` or `random`")
+    parser.add_argument("--config", default="./cfg/quad.json", help="quadcopter config")
+    parser.add_argument("--out", required=True, help="json lines output, resumed if it exists")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--target", type=float, nargs=4, default=(1, 1, 1, 0))
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--dt", type=float, default=1e-3)
+    parser.add_argument("--ctrl-period", type=float, default=5e-3)
+    args = parser.parse_args(argv)
+
+    spec: dict = load_json_config(args.spec)
+    candidates: list[dict] = load_candidates(spec)
+    results = sweep(
+        load_config(args.config),
+        spec["control"],
+        candidates,
+        args.out,
+        args.workers,
+        target=tuple(args.target),
+        duration=args.duration,
+        dt=args.dt,
+        ctrl_period=args.ctrl_period,
+    )
+    for result in results:
+        print(
+            f"[{result['index']:>5}/{len(candidates)}] "
+            f"rise {result['rise_time']:.3f}s  overshoot {result['overshoot']:.1%}  "
+            f"settling {result['settling_time']:.3f}s  "
+            f"error {result['steady_state_error']:.3f}  "
+            f"saturation {result['saturation']:.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+import os
+import struct
+import numpy as np
+
+from typing import Union
+
+from quadcopter.quad import Quadcopter
+
+
+def telemetry_dtype(n: int = 1) -> np.dtype:
+    """record layout of `n` vehicles sampled at the same time"""
+    return np.dtype([
+        ("time", "<f8"),
+        ("state", "<f8", (n, 12)),
+        ("speeds", "<f8", (n, 4)),
+        ("thrust", "<f8", (n, 4)),
+        ("target", "<f8", (n, 4)),
+        ("error", "<f8", (n, 6)),
+    ])
+
+
+class NpyAppender(object):
+    MAGIC: bytes = b"\x93NUMPY\x01\x00"
+
+    def __init__(self, path: str, dtype: np.dtype, append: bool = False) -> None:
+        """one dimensional `.npy` file growing at its end, the header is
+        padded to a fixed size and its shape rewritten on every append, so
+        the file is a valid `.npy` loadable with `np.load(mmap_mode="r")`
+        @param path: file path
+        @param dtype: record layout
+        @param append: keep the records of an existing file
+        """
+        self.path: str = path
+        self.dtype: np.dtype = np.dtype(dtype)
+        self._descr: str = repr(np.lib.format.dtype_to_descr(self.dtype))
+        self._header_size: int = -(-(len(self._header(10**20)) + 11) // 64) * 64
+
+        if append and os.path.exists(path):
+            existing: np.memmap = np.load(path, mmap_mode="r")
+            if existing.dtype != self.dtype or existing.offset != self._header_size:
+                raise ValueError(f"Cannot append to {path}, the record layout differs")
+            self.count: int = len(existing)
+            del existing
+            self._file = open(path, "r+b")
+            self._file.seek(0, os.SEEK_END)
+        else:
+            self.count = 0
+            self._file = open(path, "w+b")
+            self._write_header()
+
+    def _header(self, count: int) -> str:
+        return f"{{'descr': {self._descr}, 'fortran_order': False, 'shape': ({count},), }}"
+
+    def _write_header(self) -> None:
+        header: str = self._header(self.count)
+        header += " " * (self._header_size - len(self.MAGIC) - 2 - len(header) - 1) + "\n"
+        self._file.seek(0)
+        self._file.write(self.MAGIC + struct.pack("<H", len(header)) + header.encode("latin1"))
+        self._file.seek(0, os.SEEK_END)
+
+    def append(self, records: np.ndarray) -> None:
+        self._file.write(records.tobytes())
+        self.count += len(records)
+        self._write_header()
+        self._file.flush()
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+
+
+class Recorder(object):
+    def __init__(
+        self,
+        path: str,
+        n: int = 1,
+        capacity: int = 4096,
+        chunk: int = 1024,
+        every: int = 1,
+        append: bool = False,
+    ) -> None:
+        """telemetry recorder writing into a preallocated ring buffer which is
+        flushed to an appendable `.npy` file in chunks, memory use is constant
+        whatever the length of the run
+        @param path: output `.npy` file
+        @param n: number of vehicles per record
+        @param capacity: number of records kept in memory, multiple of `chunk`
+        @param chunk: number of records flushed at once
+        @param every: record every `every` physics steps when used as a hook
+        @param append: keep the records of an existing file
+        """
+        if capacity % chunk:
+            raise ValueError("Capacity of the ring buffer must be a multiple of the chunk")
+
+        self.n: int = n
+        self.every: int = every
+        self.capacity: int = capacity
+        self.chunk: int = chunk
+        self._buffer: np.ndarray = np.zeros(capacity, dtype=telemetry_dtype(n))
+        self._fields: dict[str, np.ndarray] = {
+            name: self._buffer[name] for name in self._buffer.dtype.names
+        }
+        self._count: int = 0
+        self._flushed: int = 0
+        self._file: NpyAppender = NpyAppender(path, self._buffer.dtype, append)
+
+    def __enter__(self) -> "Recorder":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._file.count + self._count - self._flushed
+
+    def __call__(self, sim) -> None:
+        """lockstep hook, sample the simulation every `every` steps"""
+        if sim.steps % self.every == 0:
+            self.sample(sim.time, sim.quad, sim.ctrl)
+
+    def record(
+        self,
+        t: float,
+        state: np.ndarray,
+        speeds: np.ndarray,
+        thrust: np.ndarray,
+        target: Union[np.ndarray, None] = None,
+        error: Union[np.ndarray, None] = None,
+    ) -> None:
+        """write a record into the ring buffer, arrays are broadcast to the
+        `(n, ...)` field shapes, a missing target or error is recorded as zero
+        """
+        i: int = self._count % self.capacity
+        fields: dict[str, np.ndarray] = self._fields
+        fields["time"][i] = t
+        fields["state"][i] = state
+        fields["speeds"][i] = speeds
+        fields["thrust"][i] = thrust
+        fields["target"][i] = 0 if target is None else target
+        fields["error"][i] = 0 if error is None else error
+
+        self._count += 1
+        if self._count - self._flushed >= self.chunk:
+            self.flush()
+
+    def sample(self, t: float, quad, ctrl=None) -> None:
+        """record a `Quadcopter` or `QuadcopterBatch` and its controller
+        @param t: simulated time
+        @param quad: simulated quadcopter or batch of quadcopters
+        @param ctrl: controller of the quadcopter, or `None`
+        """
+        motors = quad.motors if isinstance(quad, Quadcopter) else quad
+        i: int = self._count % self.capacity
+        if ctrl is not None and ctrl.target is not None:
+            t_pos, t_yaw = ctrl.target
+            self._fields["target"][i, :, 0:3] = t_pos
+            self._fields["target"][i, :, 3] = t_yaw
+            target = self._fields["target"][i]
+        else:
+            target = None
+        self.record(
+            t, quad.state, motors.speeds, motors.thrust, target, getattr(ctrl, "error", None)
+        )
+
+    def latest(self, k: int) -> np.ndarray:
+        """copy of the `k` latest records still held in memory, oldest first"""
+        k = min(k, self._count, self.capacity)
+        index: np.ndarray = np.arange(self._count - k, self._count) % self.capacity
+        return self._buffer[index]
+
+    def flush(self) -> None:
+        """write the pending records, up to the end of the buffer at a time
+        since an earlier flush may have stopped within a chunk"""
+        while self._flushed < self._count:
+            start: int = self._flushed % self.capacity
+            stop: int = min(start + self._count - self._flushed, start + self.chunk, self.capacity)
+            self._file.append(self._buffer[start:stop])
+            self._flushed += stop - start
+
+    def close(self) -> None:
+        self.flush()
+        self._file.close()
+
+
+def load(path: str) -> np.memmap:
+    """memory map a telemetry file, slices are read from disk on access"""
+    return np.load(path, mmap_mode="r")
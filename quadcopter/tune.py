@@ -0,0 +1,348 @@
+"""Population-based tuning of the 18 PID gains of a control config.
+
+A cross-entropy search samples a population of gain sets around a mean,
+each gain relative to the magnitude of its base value so that signs may
+flip, evaluates the whole population in one batched closed-loop
+rollout and refits the mean and spread to the elite candidates. The cost
+weighs tracking error, overshoot and motor effort, candidates diverging
+from the target stop being scored and pay a penalty instead. The search
+state is saved after every generation, so running the same command again
+resumes it, and the best gains are written as a json config with a
+`control` section.
+
+usage: python -m quadcopter.tune CONTROL --out best.json [--state FILE]
+                                 [--generations 20] [--population 32]
+                                 [--surrogate]
+"""
+import os
+import json
+import argparse
+import numpy as np
+
+from typing import Iterator, Union
+from dataclasses import dataclass, replace
+
+from quadcopter import QuadConfig, load_config
+from quadcopter.quad import QuadcopterBatch
+from quadcopter.lockstep import Lockstep
+from quadcopter.surrogate import SurrogateBatch
+from quadcopter.sweep import GAINS
+from quadcopter.control import PID, BatchCPID, ControlConfig
+from quadcopter.control import control_config_from_dict, control_config_to_dict, load_control_config
+
+
+@dataclass
+class Weights(object):
+    tracking: float = 1.0       # mean squared position error
+    overshoot: float = 1.0      # peak progress beyond the target
+    effort: float = 0.1         # mean squared normalized motor command
+    divergence: float = 100.0   # fraction of the run left when diverging
+
+
+def gains(config: ControlConfig) -> np.ndarray:
+    """the 18 gains of a control config in the order of `GAINS`"""
+    return np.concatenate([
+        getattr(getattr(config, key.split(".")[0]), key.split(".")[1]) for key in GAINS
+    ]).astype(float)
+
+
+def scales(config: ControlConfig) -> np.ndarray:
+    """unit of each gain in a search vector, the magnitude of the base gain
+    or 1 for a gain switched off"""
+    magnitude: np.ndarray = np.abs(gains(config))
+    return np.where(magnitude > 0, magnitude, 1.0)
+
+
+def from_vector(vector: np.ndarray, base: ControlConfig, scale: np.ndarray) -> ControlConfig:
+    """control config of a search vector, keeping the limits of the base"""
+    values: np.ndarray = (vector * scale).reshape(6, 3)
+    loops: dict[str, dict] = {"position": {}, "attitude": {}}
+    for key, value in zip(GAINS, values):
+        loop, gain = key.split(".")
+        loops[loop][gain] = value.tolist()
+    return replace(base, position=PID(**loops["position"]), attitude=PID(**loops["attitude"]))
+
+
+def rollout(
+    quad_config: QuadConfig,
+    configs: list[ControlConfig],
+    target: tuple[float, float, float, float],
+    duration: float = 2.0,
+    dt: float = 1e-3,
+    ctrl_period: float = 5e-3,
+    surrogate: bool = False,
+    bound: float = 10.0,
+    weights: Union[Weights, None] = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """cost of many control configs from one batched step response
+    @param quad_config: quadcopter config shared by all candidates
+    @param configs: control config of each candidate
+    @param target: step target `(x, y, z, yaw)`
+    @param duration: simulated duration
+    @param surrogate: simulate the linear surrogate, stepped once per tick
+    @param bound: distance to the target counted as a divergence
+    @param weights: weights of the cost terms
+    @return: cost and divergence of each candidate, `(P,)` arrays
+    """
+    weights = weights or Weights()
+    n: int = len(configs)
+    if surrogate:
+        quad: QuadcopterBatch = SurrogateBatch(quad_config, n)
+        dt = ctrl_period
+    else:
+        quad = QuadcopterBatch([quad_config] * n)
+    ctrl: BatchCPID = BatchCPID(configs, quad)
+    ctrl.update_target(target)
+    sim: Lockstep = Lockstep(quad, ctrl, dt, ctrl_period)
+
+    ticks: int = round(duration / ctrl_period)
+    decimation: int = round(ctrl_period / dt)
+    goal: np.ndarray = np.array(target[:3], dtype=float)
+    start: np.ndarray = quad.state[:, 0:3].copy()
+    step: np.ndarray = goal - start
+    length: np.ndarray = np.sum(step**2, axis=1)
+    length[length < 1e-12] = np.inf
+    lo, hi = ctrl.motor_limit[:, 0:1], ctrl.motor_limit[:, 1:2]
+
+    tracking: np.ndarray = np.zeros(n)
+    effort: np.ndarray = np.zeros(n)
+    peak: np.ndarray = np.zeros(n)
+    alive: np.ndarray = np.ones(n, dtype=bool)
+    left: np.ndarray = np.zeros(n)
+    with np.errstate(all="ignore"):
+        for k in range(ticks):
+            sim.run(decimation)
+            position: np.ndarray = quad.state[:, 0:3]
+            error: np.ndarray = np.linalg.norm(goal - position, axis=1)
+
+            ## diverging candidates are parked at the target, no longer scored
+            diverged: np.ndarray = alive & ~(error <= bound)
+            if diverged.any():
+                alive &= ~diverged
+                left[diverged] = (ticks - k) / ticks
+                quad.state[diverged] = 0.0
+                quad.state[diverged, 0:3] = goal
+                ctrl.position.Ie[diverged] = 0.0
+                ctrl.attitude.Ie[diverged] = 0.0
+                quad.publish()
+                if not alive.any():
+                    break
+
+            tracking += np.where(alive, error**2, 0.0)
+            progress: np.ndarray = np.sum((position - start) * step, axis=1) / length
+            peak = np.where(alive, np.maximum(peak, progress), peak)
+            command: np.ndarray = np.mean(((quad.speeds - lo) / (hi - lo)) ** 2, axis=1)
+            effort += np.where(alive, command, 0.0)
+
+    cost: np.ndarray = (
+        weights.tracking * tracking / ticks
+        + weights.overshoot * np.maximum(peak - 1, 0.0)
+        + weights.effort * effort / ticks
+        + weights.divergence * left
+    )
+    return cost, ~alive
+
+
+class CrossEntropy(object):
+    def __init__(
+        self,
+        mean: np.ndarray,
+        sigma: Union[float, np.ndarray] = 0.3,
+        population: int = 32,
+        elite: float = 0.25,
+        smoothing: float = 0.7,
+        min_sigma: float = 1e-2,
+        seed: int = 0,
+    ) -> None:
+        """cross-entropy search with a diagonal Gaussian
+        @param mean: initial mean of the search vectors
+        @param sigma: initial standard deviations
+        @param population: number of candidates per generation
+        @param elite: fraction of the population refitting the Gaussian
+        @param smoothing: weight of the elites against the previous Gaussian
+        @param min_sigma: lower bound of the standard deviations
+        @param seed: seed of the random number generator
+        """
+        if population < 2 or not 0 < elite <= 1:
+            raise ValueError("Search needs two candidates and a positive elite fraction")
+
+        self.mean: np.ndarray = np.array(mean, dtype=float)
+        self.sigma: np.ndarray = np.full(self.mean.shape, sigma, dtype=float)
+        ## settings the search was started with, checked when it is resumed
+        self.initial_sigma: np.ndarray = self.sigma.copy()
+        self.seed: int = seed
+        self.population: int = population
+        self.elite: int = max(1, round(elite * population))
+        self.smoothing: float = smoothing
+        self.min_sigma: float = min_sigma
+        self.generation: int = 0
+        self.best: np.ndarray = self.mean.copy()
+        self.best_cost: float = np.inf
+        self.rng: np.random.Generator = np.random.default_rng(seed)
+
+    def ask(self) -> np.ndarray:
+        """candidates of the next generation, `(population, D)`"""
+        noise: np.ndarray = self.rng.standard_normal((self.population, len(self.mean)))
+        return self.mean + self.sigma * noise
+
+    def tell(self, samples: np.ndarray, costs: np.ndarray) -> None:
+        """refit the Gaussian to the elite candidates, `nan` costs rank last"""
+        costs = np.where(np.isnan(costs), np.inf, costs)
+        order: np.ndarray = np.argsort(costs, kind="stable")
+        elites: np.ndarray = samples[order[:self.elite]]
+        if costs[order[0]] < self.best_cost:
+            self.best, self.best_cost = samples[order[0]].copy(), float(costs[order[0]])
+
+        ## the spread is taken around the previous mean, it keeps the step size
+        ## while the elites move in one direction and shrinks once they settle
+        s: float = self.smoothing
+        spread: np.ndarray = np.sqrt(np.mean((elites - self.mean) ** 2, axis=0))
+        self.mean = s * elites.mean(axis=0) + (1 - s) * self.mean
+        self.sigma = np.maximum(s * spread + (1 - s) * self.sigma, self.min_sigma)
+        self.generation += 1
+
+    def to_dict(self) -> dict:
+        return {
+            "mean": self.mean.tolist(),
+            "sigma": self.sigma.tolist(),
+            "population": self.population,
+            "initial_sigma": self.initial_sigma.tolist(),
+            "seed": self.seed,
+            "elite": self.elite,
+            "smoothing": self.smoothing,
+            "min_sigma": self.min_sigma,
+            "generation": self.generation,
+            "best": self.best.tolist(),
+            "best_cost": self.best_cost if np.isfinite(self.best_cost) else None,
+            "rng": self.rng.bit_generator.state,
+        }
+
+    @staticmethod
+    def from_dict(data: dict) -> "CrossEntropy":
+        search: CrossEntropy = CrossEntropy(
+            data["mean"], data["sigma"], data["population"], 1.0,
+            data["smoothing"], data["min_sigma"], data["seed"],
+        )
+        search.initial_sigma = np.array(data["initial_sigma"], dtype=float)
+        search.elite = data["elite"]
+        search.generation = data["generation"]
+        search.best = np.array(data["best"], dtype=float)
+        search.best_cost = np.inf if data["best_cost"] is None else data["best_cost"]
+        search.rng.bit_generator.state = data["rng"]
+        return search
+
+
+def save_state(path: str, search: CrossEntropy) -> None:
+    """write the search state atomically, an interruption keeps the last one"""
+    with open(path + ".tmp", "w") as file:
+        json.dump(search.to_dict(), file)
+    os.replace(path + ".tmp", path)
+
+
+def load_state(path: str) -> CrossEntropy:
+    with open(path, "r") as file:
+        return CrossEntropy.from_dict(json.load(file))
+
+
+def tune(
+    quad_config: QuadConfig,
+    base: Union[ControlConfig, dict],
+    generations: int = 20,
+    population: int = 32,
+    sigma: float = 0.5,
+    seed: int = 0,
+    state_path: Union[str, None] = None,
+    **options,
+) -> Iterator[tuple[CrossEntropy, dict]]:
+    """search the gains around a base control config, resuming the search
+    state of `state_path` when it exists
+    @param quad_config: quadcopter config
+    @param base: base control config, its limits are kept
+    @param generations: total number of generations
+    @param population: number of candidates per generation
+    @param sigma: initial standard deviation, relative to the base gains
+    @param seed: seed of the search
+    @param state_path: json file receiving the search state, resumed only
+    with the population, sigma and seed it was started with
+    @param options: `target`, `duration` and the options of `rollout`
+    @return: iterator over the search and the summary of each generation
+    """
+    if isinstance(base, dict):
+        base = control_config_from_dict(base)
+    scale: np.ndarray = scales(base)
+
+    if state_path is not None and os.path.exists(state_path):
+        search: CrossEntropy = load_state(state_path)
+        if (
+            search.population != population
+            or search.seed != seed
+            or not np.allclose(search.initial_sigma, sigma)
+        ):
+            raise ValueError(
+                f"Search state {state_path} was started with population {search.population}, "
+                f"sigma {search.initial_sigma[0]:g} and seed {search.seed}"
+            )
+    else:
+        search = CrossEntropy(gains(base) / scale, sigma, population, seed=seed)
+
+    while search.generation < generations:
+        samples: np.ndarray = search.ask()
+        costs, diverged = rollout(
+            quad_config, [from_vector(sample, base, scale) for sample in samples], **options
+        )
+        search.tell(samples, costs)
+        if state_path is not None:
+            save_state(state_path, search)
+        yield search, {
+            "generation": search.generation,
+            "best_cost": search.best_cost,
+            "median_cost": float(np.median(costs)),
+            "diverged": int(np.sum(diverged)),
+        }
+
+
+def main(argv: Union[list[str], None] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("control", help="json file with the base `control` section")
+    parser.add_argument("--config", default="./cfg/quad.json", help="quadcopter config")
+    parser.add_argument("--out", required=True, help="json file receiving the best gains")
+    parser.add_argument("--state", default=None, help="search state, resumed if it exists")
+    parser.add_argument("--generations", type=int, default=20)
+    parser.add_argument("--population", type=int, default=32)
+    parser.add_argument("--sigma", type=float, default=0.5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--target", type=float, nargs=4, default=(1, 1, 1, 0))
+    parser.add_argument("--duration", type=float, default=2.0)
+    parser.add_argument("--surrogate", action="store_true", help="linear surrogate rollouts")
+    args = parser.parse_args(argv)
+
+    base: ControlConfig = load_control_config(args.control)
+    search: Union[CrossEntropy, None] = None
+    for search, summary in tune(
+        load_config(args.config),
+        base,
+        args.generations,
+        args.population,
+        args.sigma,
+        args.seed,
+        args.state,
+        target=tuple(args.target),
+        duration=args.duration,
+        surrogate=args.surrogate,
+    ):
+        print(
+            f"[{summary['generation']:>3}/{args.generations}] "
+            f"best {summary['best_cost']:.4f}  median {summary['median_cost']:.4f}  "
+            f"diverged {summary['diverged']}"
+        )
+
+    if search is None and args.state is not None and os.path.exists(args.state):
+        print(f"search already ran {args.generations} generations, see {args.state}")
+        search = load_state(args.state)
+    best: ControlConfig = base if search is None else from_vector(search.best, base, scales(base))
+    with open(args.out, "w") as file:
+        json.dump({"control": control_config_to_dict(best)}, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
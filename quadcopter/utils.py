@@ -1,30 +1,122 @@
+import math
 import numpy as np
 import numpy.typing as npt
 
+from typing import Union
 
-def wrap(angles: np.ndarray) -> np.ndarray:
+
+def wrap(angles: np.ndarray, out: Union[np.ndarray, None] = None) -> np.ndarray:
     """Wrap the input angles into the range between [−π,π)
-    @param angles: input angles to be wrapped
+    @param angles: input angles to be wrapped, of any shape
+    @param out: optional buffer receiving the wrapped angles, may be `angles`
     @return: wrapped angles
     """
-    return (angles + np.pi) % (np.pi * 2) - np.pi
+    if out is None:
+        return (angles + np.pi) % (np.pi * 2) - np.pi
+
+    np.add(angles, np.pi, out=out)
+    np.mod(out, np.pi * 2, out=out)
+    return np.subtract(out, np.pi, out=out)
 
 
-def rotation_matrix(angles: np.ndarray) -> np.ndarray:
-    """Input roll, pitch and yaw angle and make them into a 
-    rotation matrix from body frame to inertia frame
-    @param angles: `(roll, pitch, yaw)`
+def rotation_matrix(angles: np.ndarray, out: Union[np.ndarray, None] = None) -> np.ndarray:
+    """Input roll, pitch and yaw angle and make them into a
+    rotation matrix from body frame to inertia frame, in closed form
+    @param angles: `(roll, pitch, yaw)`, or `(N, 3)` angles of many bodies
+    @param out: optional `(3, 3)` or `(N, 3, 3)` buffer receiving the matrices
     @return: rotation matrix from body frame to inertia frame
     """
-    cp, cr, cy = np.cos(np.radians(angles))
-    sp, sr, sy = np.sin(np.radians(angles))
-    RP = np.array([[1,  0,  0],
-                   [0, cp,-sp],
-                   [0, sp, cp]])
-    RR = np.array([[cr, 0, sr],
-                   [0,  1,  0],
-                   [-sr,0, cr]])
-    RY = np.array([[cy,-sy, 0],
-                   [sy, cy, 0],
-                   [0,  0,  1]])
-    return np.dot(RY, np.dot(RR, RP))
+    if np.ndim(angles) == 1:
+        ## a single body is cheaper with scalar math than with arrays
+        a0, a1, a2 = (math.radians(a) for a in angles)
+        cp, cr, cy = math.cos(a0), math.cos(a1), math.cos(a2)
+        sp, sr, sy = math.sin(a0), math.sin(a1), math.sin(a2)
+        rows: tuple = (
+            (cy * cr, cy * sr * sp - sy * cp, cy * sr * cp + sy * sp),
+            (sy * cr, sy * sr * sp + cy * cp, sy * sr * cp - cy * sp),
+            (-sr, cr * sp, cr * cp),
+        )
+        if out is None:
+            return np.array(rows)
+        out[...] = rows
+        return out
+
+    angles = np.radians(angles)
+    c, s = np.cos(angles), np.sin(angles)
+    cp, cr, cy = c[..., 0], c[..., 1], c[..., 2]
+    sp, sr, sy = s[..., 0], s[..., 1], s[..., 2]
+    if out is None:
+        out = np.empty(np.shape(angles)[:-1] + (3, 3))
+
+    out[..., 0, 0] = cy * cr
+    out[..., 0, 1] = cy * sr * sp - sy * cp
+    out[..., 0, 2] = cy * sr * cp + sy * sp
+    out[..., 1, 0] = sy * cr
+    out[..., 1, 1] = sy * sr * sp + cy * cp
+    out[..., 1, 2] = sy * sr * cp - cy * sp
+    out[..., 2, 0] = -sr
+    out[..., 2, 1] = cr * sp
+    out[..., 2, 2] = cr * cp
+    return out
+
+
+def quaternion_from_euler(angles: np.ndarray, out: Union[np.ndarray, None] = None) -> np.ndarray:
+    """unit quaternion `(w, x, y, z)` of the same rotation as
+    `rotation_matrix(angles)`
+    @param angles: `(roll, pitch, yaw)`, or `(N, 3)` angles of many bodies
+    @param out: optional `(4,)` or `(N, 4)` buffer receiving the quaternions
+    @return: quaternions
+    """
+    half: np.ndarray = np.radians(angles) / 2
+    c, s = np.cos(half), np.sin(half)
+    cx, cy, cz = c[..., 0], c[..., 1], c[..., 2]
+    sx, sy, sz = s[..., 0], s[..., 1], s[..., 2]
+    if out is None:
+        out = np.empty(np.shape(angles)[:-1] + (4,))
+
+    out[..., 0] = cz * cy * cx + sz * sy * sx
+    out[..., 1] = cz * cy * sx - sz * sy * cx
+    out[..., 2] = cz * sy * cx + sz * cy * sx
+    out[..., 3] = sz * cy * cx - cz * sy * sx
+    return out
+
+
+def euler_from_quaternion(q: np.ndarray, out: Union[np.ndarray, None] = None) -> np.ndarray:
+    """`(roll, pitch, yaw)` of a unit quaternion, the inverse of
+    `quaternion_from_euler` with the pitch within [-90, 90]
+    @param q: quaternion `(w, x, y, z)`, or `(N, 4)` quaternions
+    @param out: optional `(3,)` or `(N, 3)` buffer receiving the angles
+    @return: angles
+    """
+    q = np.asarray(q)
+    w, x, y, z = q[..., 0], q[..., 1], q[..., 2], q[..., 3]
+    if out is None:
+        out = np.empty(np.shape(q)[:-1] + (3,))
+
+    out[..., 0] = np.arctan2(2 * (w * x + y * z), 1 - 2 * (x * x + y * y))
+    out[..., 1] = np.arcsin(np.clip(2 * (w * y - z * x), -1.0, 1.0))
+    out[..., 2] = np.arctan2(2 * (w * z + x * y), 1 - 2 * (y * y + z * z))
+    return np.degrees(out, out=out)
+
+
+def quaternion_rotation_matrix(q: np.ndarray, out: Union[np.ndarray, None] = None) -> np.ndarray:
+    """rotation matrix of a unit quaternion, polynomial without any trig
+    @param q: quaternion `(w, x, y, z)`, or `(N, 4)` quaternions
+    @param out: optional `(3, 3)` or `(N, 3, 3)` buffer receiving the matrices
+    @return: rotation matrix from body frame to inertia frame
+    """
+    q = np.asarray(q)
+    w, x, y, z = q[..., 0], q[..., 1], q[..., 2], q[..., 3]
+    if out is None:
+        out = np.empty(np.shape(q)[:-1] + (3, 3))
+
+    out[..., 0, 0] = 1 - 2 * (y * y + z * z)
+    out[..., 0, 1] = 2 * (x * y - w * z)
+    out[..., 0, 2] = 2 * (x * z + w * y)
+    out[..., 1, 0] = 2 * (x * y + w * z)
+    out[..., 1, 1] = 1 - 2 * (x * x + z * z)
+    out[..., 1, 2] = 2 * (y * z - w * x)
+    out[..., 2, 0] = 2 * (x * z - w * y)
+    out[..., 2, 1] = 2 * (y * z + w * x)
+    out[..., 2, 2] = 1 - 2 * (x * x + y * y)
+    return out
@@ -0,0 +1,84 @@
+import pytest
+import numpy as np
+
+from quadcopter import Quadcopter, QuadcopterBatch
+from quadcopter import QuadConfig, MotorConfig
+
+
+@pytest.fixture
+def configs() -> list[QuadConfig]:
+    return [
+        QuadConfig(
+            weight=1.0 + 0.1 * i,
+            length=0.5 - 0.05 * i,
+            radius=0.2,
+            states=[[0, 0, 1 + i], [0.01 * i, 0, 0]],
+            motors=MotorConfig(10, 2),
+            lift_const=0.1,
+        )
+        for i in range(3)
+    ]
+
+
+def test_batch_init(configs: list[QuadConfig]) -> None:
+    batch: QuadcopterBatch = QuadcopterBatch(configs)
+    assert len(batch) == 3
+    assert batch.state.shape == (3, 12)
+    assert batch.thrust.shape == (3, 4)
+    assert np.allclose(batch.state[:, 2], [1, 2, 3])
+    for i, config in enumerate(configs):
+        assert np.allclose(np.diag(Quadcopter(config).J), batch.J[i])
+
+
+def test_batch_invalid_speeds(configs: list[QuadConfig]) -> None:
+    batch: QuadcopterBatch = QuadcopterBatch(configs)
+    with pytest.raises(ValueError):
+        batch.set_motor_speeds(np.full((2, 4), 1000.0))
+
+    with pytest.raises(ValueError):
+        batch.set_motor_speeds(np.full((3, 4), -1000.0))
+
+
+@pytest.mark.parametrize("integrator", ["vode", "bdf"])
+def test_batch_rejects_integrator(configs: list[QuadConfig], integrator: str) -> None:
+    with pytest.raises(ValueError):
+        QuadcopterBatch(configs, integrator)
+
+
+def test_batch_matches_single(configs: list[QuadConfig]) -> None:
+    speeds: np.ndarray = np.array([
+        [3000.0, 2900.0, 3000.0, 3100.0],
+        [3200.0, 3200.0, 3150.0, 3200.0],
+        [3500.0, 3400.0, 3300.0, 3400.0],
+    ])
+    batch: QuadcopterBatch = QuadcopterBatch(configs)
+    batch.set_motor_speeds(speeds)
+    quads: list[Quadcopter] = [Quadcopter(config, "rk4") for config in configs]
+    for quad, speed in zip(quads, speeds):
+        quad.set_motor_speeds(speed)
+
+    for _ in range(200):
+        batch.step(1e-3)
+        for quad in quads:
+            quad.step(1e-3)
+
+    assert np.allclose(batch.state, [quad.state for quad in quads], atol=1e-10)
+
+
+def test_batch_external_buffers(configs: list[QuadConfig]) -> None:
+    state: np.ndarray = np.full((3, 12), np.nan)
+    speeds: np.ndarray = np.full((3, 4), np.nan)
+    batch: QuadcopterBatch = QuadcopterBatch(configs, state=state, speeds=speeds)
+    assert np.allclose(state[:, 2], [1, 2, 3]) and np.all(speeds == 0)
+
+    batch.set_motor_speeds(np.full((3, 4), 1000.0))
+    batch.step(1e-3)
+    assert batch.state is state and batch.speeds is speeds
+    assert np.all(speeds == 1000.0) and np.all(state[:, 5] != 0)
+
+    with pytest.raises(ValueError):
+        QuadcopterBatch(configs, state=np.zeros((2, 12)))
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,86 @@
+import pytest
+import numpy as np
+
+from quadcopter import Quadcopter, QuadcopterBatch
+from quadcopter import QuadConfig, MotorConfig
+from quadcopter.control import CPID, PID, ControlConfig
+from quadcopter.control import BatchCPID, BatchPID
+
+
+def make_config(scale: float) -> ControlConfig:
+    return ControlConfig(
+        position=PID(
+            Kp=[300 * scale, 300 * scale, 7000],
+            Ki=[0.04, 0.04, 4.5 * scale],
+            Kd=[450, 450 * scale, 5000],
+        ),
+        attitude=PID(
+            Kp=[22000 * scale, 22000, 1500],
+            Ki=[0, 0, 1.2 * scale],
+            Kd=[12000, 12000 * scale, 0],
+        ),
+    )
+
+
+@pytest.fixture
+def quad_config() -> QuadConfig:
+    return QuadConfig(
+        weight=1.0,
+        length=0.5,
+        radius=0.2,
+        states=[[0, 0, 0], [0, 0, 0]],
+        motors=MotorConfig(10, 2),
+        lift_const=0.1,
+    )
+
+
+def test_batch_pid_update() -> None:
+    pid = BatchPID(
+        Kp=np.ones((2, 3)), Ki=np.full((2, 3), 0.1), Kd=np.full((2, 3), 0.01)
+    )
+    output = pid.update(np.full((2, 3), 0.5), np.full((2, 3), 0.1))
+    assert output.shape == (2, 3)
+    assert np.allclose(output, 0.551)
+
+
+def test_batch_cpid_matches_scalar(quad_config: QuadConfig) -> None:
+    n: int = 5
+    rng = np.random.default_rng(0)
+    targets: np.ndarray = rng.uniform(-2, 2, (n, 4))
+    states: np.ndarray = rng.normal(scale=0.5, size=(20, n, 12))
+
+    batch: QuadcopterBatch = QuadcopterBatch([quad_config] * n)
+    batch_ctrl: BatchCPID = BatchCPID([make_config(1 + 0.2 * i) for i in range(n)], batch)
+    batch_ctrl.update_target(targets)
+
+    quads: list[Quadcopter] = [Quadcopter(quad_config) for _ in range(n)]
+    ctrls: list[CPID] = [CPID(make_config(1 + 0.2 * i), quads[i]) for i in range(n)]
+    for ctrl, target in zip(ctrls, targets):
+        ctrl.update_target(tuple(target))
+
+    for state in states:
+        commands: np.ndarray = batch_ctrl.compute(state)
+        for i, (quad, ctrl) in enumerate(zip(quads, ctrls)):
+            quad.state[:] = state[i]
+            quad.publish()
+            ctrl.step()
+            assert np.allclose(commands[i], quad.motors.speeds, rtol=1e-12)
+
+    assert np.allclose(batch_ctrl.position.Ie, [ctrl.position.Ie for ctrl in ctrls])
+
+
+def test_batch_cpid_shared_target(quad_config: QuadConfig) -> None:
+    batch: QuadcopterBatch = QuadcopterBatch([quad_config] * 3)
+    ctrl: BatchCPID = BatchCPID(make_config(1.0), batch)
+    ctrl.update_target((1, 1, 1, 4.0))
+    assert ctrl.target[0].shape == (3, 3)
+    assert np.allclose(ctrl.target[1], 4.0 - 2 * np.pi)
+
+    ctrl.step()
+    assert batch.speeds.shape == (3, 4)
+    with pytest.raises(ValueError):
+        BatchCPID([make_config(1.0)] * 2, batch)
+
+
+if __name__ == "__main__":
+    pytest.main()
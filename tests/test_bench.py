@@ -0,0 +1,23 @@
+import pytest
+
+from quadcopter.bench import compare, measure
+
+
+def test_bench_measure() -> None:
+    calls: list[int] = []
+    seconds: float = measure(lambda: calls.append(1), number=10, repeat=3)
+    assert len(calls) == 30
+    assert 0 < seconds < 1e-3
+
+
+def test_bench_compare() -> None:
+    baseline: dict = {"results": {"a": 1.0, "b": 1.0, "c": 1.0}}
+    results: dict = {"results": {"a": 1.2, "b": 1.5, "c": 0.5, "d": 9.0}}
+    regressions = compare(results, baseline, threshold=0.25)
+    assert [name for name, _ in regressions] == ["b"]
+    assert regressions[0][1] == pytest.approx(0.5)
+    assert compare(results, baseline, threshold=0.1)[0][0] == "a"
+
+
+if __name__ == "__main__":
+    pytest.main()
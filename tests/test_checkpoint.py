@@ -0,0 +1,132 @@
+import pytest
+import numpy as np
+
+from quadcopter import Lockstep
+from quadcopter import MotorConfig
+from quadcopter import Quadcopter, QuadConfig
+from quadcopter.control import CPID, PID, ControlConfig, Trajectory
+from quadcopter import checkpoint
+
+
+@pytest.fixture
+def quad_config() -> QuadConfig:
+    return QuadConfig(
+        weight=1.0,
+        length=0.5,
+        radius=0.2,
+        states=[[0, 0, 0], [0, 0, 0]],
+        motors=MotorConfig(10, 2),
+        lift_const=0.1,
+    )
+
+
+def control_config() -> ControlConfig:
+    return ControlConfig(
+        position=PID(Kp=[300, 300, 7000], Ki=[0.04, 0.04, 4.5], Kd=[450, 450, 5000]),
+        attitude=PID(Kp=[22000, 22000, 1500], Ki=[0, 0, 1.2], Kd=[12000, 12000, 0]),
+    )
+
+
+def make_sim(config: QuadConfig, integrator: str = "rk4") -> Lockstep:
+    quad: Quadcopter = Quadcopter(config, integrator)
+    ctrl: CPID = CPID(control_config(), quad)
+    ctrl.update_target((1, 1, 1, 0))
+    return Lockstep(quad, ctrl)
+
+
+@pytest.mark.parametrize("integrator", ["rk4", "rk45"])
+def test_checkpoint_restore(quad_config: QuadConfig, integrator: str) -> None:
+    sim: Lockstep = make_sim(quad_config, integrator)
+    sim.run(203)
+    saved: np.ndarray = checkpoint.capture(sim.quad, sim.ctrl)
+    sim.run(300)
+
+    resumed: Lockstep = make_sim(quad_config, integrator)
+    checkpoint.restore(saved, resumed.quad, resumed.ctrl, resumed)
+    assert resumed.steps == 203
+    resumed.run(300)
+
+    assert resumed.time == pytest.approx(sim.time)
+    assert np.array_equal(resumed.quad.state, sim.quad.state)
+    assert np.array_equal(resumed.ctrl.position.Ie, sim.ctrl.position.Ie)
+
+
+def test_checkpoint_bytes(quad_config: QuadConfig, tmp_path) -> None:
+    sim: Lockstep = make_sim(quad_config)
+    sim.run(50)
+    saved: np.ndarray = checkpoint.capture(sim.quad, sim.ctrl)
+    assert np.isnan(saved["step_size"])
+
+    data: bytes = checkpoint.to_bytes(saved)
+    assert len(data) == checkpoint.HEADER.size + checkpoint.CHECKPOINT.itemsize
+    assert checkpoint.from_bytes(data).tobytes() == saved.tobytes()
+
+    checkpoint.save(tmp_path / "run.ckpt", np.stack([saved, saved]))
+    assert len(checkpoint.load(tmp_path / "run.ckpt")) == 2
+
+    with pytest.raises(ValueError):
+        checkpoint.from_bytes(data[:-8])
+    with pytest.raises(ValueError):
+        checkpoint.from_bytes(b"XXXX" + data[4:])
+    with pytest.raises(ValueError):
+        checkpoint.from_bytes(data[:4] + b"\x02" + data[5:])
+
+
+def test_checkpoint_fork(quad_config: QuadConfig) -> None:
+    sim: Lockstep = make_sim(quad_config)
+    sim.run(200)
+    saved: np.ndarray = checkpoint.capture(sim.quad, sim.ctrl)
+
+    targets: np.ndarray = np.array([[1, 1, 1, 0], [2, 0, 1, 0], [0, -1, 2, 1]], dtype=float)
+    quad, ctrl = checkpoint.fork(saved, len(targets), quad_config, control_config())
+    ctrl.update_target(targets)
+    branches: Lockstep = Lockstep(quad, ctrl, t0=float(saved["time"]))
+    branches.run(300)
+
+    for target, state in zip(targets, quad.state):
+        single: Lockstep = make_sim(quad_config)
+        checkpoint.restore(saved, single.quad, single.ctrl, single)
+        single.ctrl.update_target(tuple(target))
+        single.run(300)
+        assert np.allclose(state, single.quad.state, atol=1e-6)
+    assert not np.allclose(ctrl.position.Ie[0], ctrl.position.Ie[1])
+
+
+def test_checkpoint_restore_lag(quad_config: QuadConfig) -> None:
+    quad_config.motors = MotorConfig(10, 2, tau=0.02)
+    sim: Lockstep = make_sim(quad_config)
+    sim.run(203)
+    saved: np.ndarray = checkpoint.capture(sim.quad, sim.ctrl)
+    assert not np.array_equal(saved["speeds"], saved["command"])
+    sim.run(300)
+
+    resumed: Lockstep = make_sim(quad_config)
+    checkpoint.restore(saved, resumed.quad, resumed.ctrl, resumed)
+    resumed.run(300)
+    assert np.array_equal(resumed.quad.state, sim.quad.state)
+
+
+def test_checkpoint_trajectory(quad_config: QuadConfig) -> None:
+    trajectory: Trajectory = Trajectory.from_waypoints([[0, 0, 1, 0], [2, 1, 2, 1]], speed=2.0)
+    sim: Lockstep = make_sim(quad_config)
+    sim.ctrl.follow(trajectory, t0=0.1)
+    sim.run(200)
+    saved: np.ndarray = checkpoint.capture(sim.quad, sim.ctrl)
+    assert saved["trajectory_t0"] == 0.1
+    saved = checkpoint.from_bytes(checkpoint.to_bytes(saved))[0]
+    sim.run(300)
+
+    resumed: Lockstep = make_sim(quad_config)
+    with pytest.raises(ValueError):
+        checkpoint.restore(saved, resumed.quad, resumed.ctrl, resumed)
+    checkpoint.restore(saved, resumed.quad, resumed.ctrl, resumed, trajectory)
+    resumed.run(300)
+    assert np.array_equal(resumed.quad.state, sim.quad.state)
+
+    quad, ctrl = checkpoint.fork(saved, 2, quad_config, control_config(), trajectory=trajectory)
+    Lockstep(quad, ctrl, t0=float(saved["time"])).run(300)
+    assert np.allclose(quad.state, sim.quad.state, atol=1e-6)
+
+
+if __name__ == "__main__":
+    pytest.main()
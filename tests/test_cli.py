@@ -0,0 +1,109 @@
+import os
+import sys
+import json
+import subprocess
+import pytest
+import numpy as np
+
+from quadcopter import load_json_config, load_config
+from quadcopter.cli import build, main
+
+
+@pytest.fixture
+def run_config(tmp_path) -> str:
+    with open(tmp_path / "quad.json", "w") as file:
+        json.dump({
+            "weight": 1.0, "length": 0.5, "radius": 0.2, "lift_const": 0.1,
+            "initial_states": {"position": [0, 0, 0], "attitude": [0, 0, 0]},
+            "motors": {"diameter": 10, "pitch": 2},
+        }, file)
+    with open(tmp_path / "control.json", "w") as file:
+        json.dump({"control": {
+            "position": {"Kp": [300, 300, 7000], "Ki": [0.04, 0.04, 4.5], "Kd": [450, 450, 5000]},
+            "attitude": {"Kp": [22000, 22000, 1500], "Ki": [0, 0, 1.2], "Kd": [12000, 12000, 0]},
+        }}, file)
+    with open(tmp_path / "run.json", "w") as file:
+        json.dump({
+            "extends": ["quad.json", "control.json"],
+            "initial_states": {"position": [0, 0, 1]},
+            "duration": 0.1,
+            "target": [1, 1, 1, 0],
+        }, file)
+    return str(tmp_path / "run.json")
+
+
+def test_cli_extends(run_config: str) -> None:
+    config: dict = load_json_config(run_config)
+    assert "extends" not in config
+    assert config["initial_states"] == {"position": [0, 0, 1], "attitude": [0, 0, 0]}
+    assert config["control"]["position"]["Kp"] == [300, 300, 7000]
+    assert load_config(run_config).states[0] == [0, 0, 1]
+
+
+def test_cli_build(run_config: str) -> None:
+    config: dict = load_json_config(run_config)
+    sim = build(config)
+    assert sim.ctrl.target[0].tolist() == [1, 1, 1]
+
+    config["trajectory"] = {"waypoints": [[0, 0, 1, 0], [1, 1, 1, 0]], "speed": 1.0}
+    assert build(config).ctrl.trajectory is not None
+
+    del config["target"], config["trajectory"]
+    with pytest.raises(ValueError):
+        build(config)
+
+
+def test_cli_run(run_config: str, tmp_path, capsys) -> None:
+    out: str = str(tmp_path / "telemetry.npy")
+    assert main(["run", run_config, "--out", out, "--every", "10"]) == 0
+    assert len(np.load(out)) == 10
+    assert "simulated 0.100s" in capsys.readouterr().out
+
+    assert main(["run", run_config, "--realtime", "10"]) == 0
+    output: str = capsys.readouterr().out
+    assert "simulated 0.100s" in output and "physics" in output
+
+    assert main([]) == 2
+    assert main(["unknown"]) == 2
+
+
+def test_cli_example(capsys) -> None:
+    ## the shipped run config flies its trajectory up to one meter
+    path: str = os.path.join(os.path.dirname(__file__), "..", "cfg", "run.json")
+    assert main(["run", path]) == 0
+    line: str = next(l for l in capsys.readouterr().out.splitlines() if l.startswith("position"))
+    position: np.ndarray = np.array(line.split("[")[1].rstrip("]").split(), dtype=float)
+    assert position[2] > 0.5
+    assert np.allclose(position, [1, 1, 1], atol=0.3)
+
+
+def test_cli_delegates_extends(run_config: str, tmp_path, capsys) -> None:
+    ## delegated commands read control configs through `extends` too
+    assert main(["montecarlo", run_config, "--config", run_config, "--n", "2",
+                 "--workers", "1", "--duration", "0.05"]) == 0
+    assert "episodes      : 2" in capsys.readouterr().out
+
+    out: str = str(tmp_path / "best.json")
+    assert main(["tune", run_config, "--config", run_config, "--out", out, "--generations", "1",
+                 "--population", "2", "--duration", "0.05", "--surrogate"]) == 0
+    assert "control" in load_json_config(out)
+
+    spec: str = str(tmp_path / "spec.json")
+    with open(spec, "w") as file:
+        json.dump({"extends": "run.json", "grid": {"position.Kp": [[300, 300, 7000]]}}, file)
+    assert main(["sweep", spec, "--config", run_config, "--out", str(tmp_path / "sweep.jsonl"),
+                 "--workers", "1", "--duration", "0.05"]) == 0
+
+
+def test_cli_lazy_imports() -> None:
+    code: str = (
+        "import sys, quadcopter, quadcopter.cli, quadcopter.lockstep, quadcopter.control;"
+        "from quadcopter import Quadcopter;"
+        "print(sorted(m for m in ('scipy', 'matplotlib') if m in sys.modules))"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    assert result.stdout.strip() == "[]"
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,80 @@
+import math
+import pytest
+import numpy as np
+
+from quadcopter import Quadcopter, QuadcopterBatch
+from quadcopter import QuadConfig, MotorConfig
+from quadcopter.quad.contact import crossing
+from quadcopter.profiling import Profiler
+
+
+def make_config(height: float) -> QuadConfig:
+    return QuadConfig(
+        weight=1.0,
+        length=0.5,
+        radius=0.2,
+        states=[[0, 0, height], [0, 0, 0]],
+        motors=MotorConfig(10, 2),
+        lift_const=0.1,
+    )
+
+
+def test_crossing() -> None:
+    ## free fall from 1 m, exact for a cubic
+    s, speed = crossing(1.0, 0.0, 1.0 - 9.81 / 2, -9.81, 1.0)
+    assert s == pytest.approx(math.sqrt(2 / 9.81))
+    assert speed == pytest.approx(-math.sqrt(2 * 9.81))
+
+
+@pytest.mark.parametrize("integrator", ["rk4", "rk45", "vode"])
+def test_touchdown(integrator: str) -> None:
+    quad: Quadcopter = Quadcopter(make_config(2.0), integrator)
+    quad.set_motor_speeds(np.zeros(4))
+    for _ in range(10):
+        quad.step(0.1)
+
+    assert quad.grounded
+    assert np.array_equal(quad.state, np.zeros(12))
+    assert quad.impact_speed == pytest.approx(math.sqrt(2 * 9.81 * 2.0), rel=1e-5)
+
+
+def test_resting_and_liftoff() -> None:
+    quad: Quadcopter = Quadcopter(make_config(0.0), "rk4")
+    quad.set_motor_speeds(np.zeros(4))
+    profiler: Profiler = Profiler().attach(quad)
+    for _ in range(100):
+        quad.step(1e-3)
+    assert quad.grounded
+    assert profiler.counters["quadcopter._fetch_state"] == 100
+
+    quad.set_motor_speeds(np.full(4, 3300.0))
+    quad.step(1e-3)
+    assert not quad.grounded and quad.state[2] > 0
+    assert quad.impact_speed == 0.0
+
+
+def test_batch_contact() -> None:
+    configs: list[QuadConfig] = [make_config(h) for h in (0.0, 1.0, 3.0)]
+    batch: QuadcopterBatch = QuadcopterBatch(configs)
+    batch.set_motor_speeds(np.zeros((3, 4)))
+    quads: list[Quadcopter] = [Quadcopter(config, "rk4") for config in configs]
+    for quad in quads:
+        quad.set_motor_speeds(np.zeros(4))
+
+    for _ in range(20):
+        batch.step(0.05)
+        for quad in quads:
+            quad.step(0.05)
+
+    assert batch.grounded.all()
+    assert np.allclose(batch.state, [quad.state for quad in quads])
+    assert np.allclose(batch.impact_speed, [quad.impact_speed for quad in quads], rtol=1e-3)
+
+    ## a fleet at rest is not integrated
+    batch.solver = None
+    batch.step(0.05)
+    assert batch.grounded.all()
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,72 @@
+import pytest
+import numpy as np
+
+from quadcopter import Quadcopter, QuadConfig, MotorConfig
+from quadcopter.quad.integrators import VODE, RK4, RK45, make_integrator
+
+
+def oscillator(t: float, y: np.ndarray, k: float, out: np.ndarray = None) -> np.ndarray:
+    if out is None:
+        out = np.empty_like(y)
+    out[0], out[1] = y[1], -k * y[0]
+    return out
+
+
+@pytest.mark.parametrize("integrator, atol", [(VODE(), 1e-3), (RK4(), 1e-6), (RK45(), 1e-6)])
+def test_integrator_oscillator(integrator, atol: float) -> None:
+    y: np.ndarray = np.array([1.0, 0.0])
+    t, dt = 0.0, 1e-2
+    for _ in range(100):
+        y = integrator.step(oscillator, t, y, dt, 4.0)
+        t += dt
+    expect: np.ndarray = np.array([np.cos(2 * t), -2 * np.sin(2 * t)])
+    assert np.allclose(y, expect, atol=atol)
+
+
+def test_integrator_in_place() -> None:
+    y: np.ndarray = np.array([1.0, 0.0])
+    assert RK4().step(oscillator, 0.0, y, 1e-2, 4.0) is y
+    assert RK45().step(oscillator, 0.0, y, 1e-2, 4.0) is y
+
+
+@pytest.mark.parametrize("integrator", [VODE(), RK4(), RK45()])
+def test_integrator_normalize(integrator) -> None:
+    ## project the oscillator back onto its orbit after every step
+    integrator.normalize = lambda y: np.divide(y, np.hypot(y[0], y[1] / 2), out=y)
+    y: np.ndarray = np.array([1.0, 0.0])
+    for _ in range(1000):
+        y = integrator.step(oscillator, 0.0, y, 1e-1, 4.0)
+    assert np.isclose(np.hypot(y[0], y[1] / 2), 1.0)
+
+
+def test_integrator_factory() -> None:
+    assert isinstance(make_integrator("rk4"), RK4)
+    integrator: RK45 = RK45()
+    assert make_integrator(integrator) is integrator
+    with pytest.raises(ValueError):
+        make_integrator("euler")
+
+
+def test_integrator_quadcopter() -> None:
+    config: QuadConfig = QuadConfig(
+        weight=1.0,
+        length=0.5,
+        radius=0.2,
+        states=[[0, 0, 1], [0, 0, 0]],
+        motors=MotorConfig(10, 2),
+        lift_const=0.1,
+    )
+    quads: list[Quadcopter] = [
+        Quadcopter(config, integrator) for integrator in ("vode", "rk4", "rk45")
+    ]
+    for quad in quads:
+        quad.set_motor_speeds(np.array([2800.0, 2750.0, 2800.0, 2700.0]))
+        for _ in range(100):
+            quad.step(1e-2)
+
+    assert np.allclose(quads[0].state, quads[1].state, atol=1e-4)
+    assert np.allclose(quads[0].state, quads[2].state, atol=1e-4)
+
+
+if __name__ == "__main__":
+    pytest.main()
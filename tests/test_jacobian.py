@@ -0,0 +1,76 @@
+import pytest
+import numpy as np
+
+from quadcopter import Quadcopter, QuadcopterBatch
+from quadcopter import QuadConfig, MotorConfig
+from quadcopter.profiling import Profiler
+
+
+def make_config(i: int) -> QuadConfig:
+    return QuadConfig(
+        weight=1.0 + 0.2 * i,
+        length=0.5 - 0.1 * i,
+        radius=0.2,
+        states=[[0, 0, 1], [0, 0, 0]],
+        motors=MotorConfig(10, 2),
+        lift_const=0.1 + 0.05 * i,
+    )
+
+
+def finite_difference(f, x: np.ndarray, eps: float = 1e-6) -> np.ndarray:
+    return np.stack(
+        [(f(x + eps * e) - f(x - eps * e)) / (2 * eps) for e in np.identity(len(x))], axis=1
+    )
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_jacobian_finite_difference(seed: int) -> None:
+    rng = np.random.default_rng(seed)
+    quad: Quadcopter = Quadcopter(make_config(seed % 3))
+    state: np.ndarray = rng.normal(scale=10, size=12)
+    thrust: np.ndarray = rng.uniform(0, 5, 4)
+
+    A, B = quad.linearize(state, thrust)
+    assert np.allclose(A, finite_difference(lambda x: quad._fetch_state(0, x, thrust), state), atol=1e-6)
+    assert np.allclose(B, finite_difference(lambda u: quad._fetch_state(0, state, u), thrust), atol=1e-6)
+
+
+def test_jacobian_batch() -> None:
+    configs: list[QuadConfig] = [make_config(i) for i in range(3)]
+    rng = np.random.default_rng(0)
+    states: np.ndarray = rng.normal(scale=10, size=(3, 12))
+    thrusts: np.ndarray = rng.uniform(0, 5, (3, 4))
+
+    A, B = QuadcopterBatch(configs).linearize(states, thrusts)
+    assert A.shape == (3, 12, 12) and B.shape == (3, 12, 4)
+    for i, config in enumerate(configs):
+        a, b = Quadcopter(config).linearize(states[i], thrusts[i])
+        assert np.allclose(A[i], a) and np.allclose(B[i], b)
+
+
+def test_jacobian_bdf() -> None:
+    quads: list[Quadcopter] = [Quadcopter(make_config(0), name) for name in ("bdf", "rk4")]
+    assert quads[0].solver.jacobian == quads[0]._jacobian
+    for quad in quads:
+        quad.set_motor_speeds(np.array([3200.0, 3100.0, 3200.0, 3300.0]))
+        for _ in range(50):
+            quad.step(1e-2)
+    assert np.allclose(quads[0].state, quads[1].state, atol=1e-3)
+
+
+def test_jacobian_evaluations() -> None:
+    evaluations: list[int] = []
+    for analytical in (False, True):
+        quad: Quadcopter = Quadcopter(make_config(0), "bdf")
+        if not analytical:
+            quad.solver.jacobian = None
+        quad.set_motor_speeds(np.array([3200.0, 3100.0, 3200.0, 3300.0]))
+        profiler: Profiler = Profiler().attach(quad)
+        for _ in range(20):
+            quad.step(1e-2)
+        evaluations.append(profiler.counters["quadcopter._fetch_state"])
+    assert evaluations[1] < evaluations[0]
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,79 @@
+import pytest
+import numpy as np
+
+from quadcopter import Lockstep
+from quadcopter import MotorConfig
+from quadcopter import Quadcopter, QuadConfig
+from quadcopter.control import CPID, PID, ControlConfig
+from quadcopter.scheduler import Scheduler
+
+
+def simulate(n_steps: int) -> tuple[Lockstep, np.ndarray]:
+    config: QuadConfig = QuadConfig(
+        weight=1.0,
+        length=0.5,
+        radius=0.2,
+        states=[[0, 0, 0], [0, 0, 0]],
+        motors=MotorConfig(10, 2),
+        lift_const=0.1,
+    )
+    quad: Quadcopter = Quadcopter(config)
+    ctrl: CPID = CPID(
+        ControlConfig(
+            position=PID(Kp=[300, 300, 7000], Ki=[0.04, 0.04, 4.5], Kd=[450, 450, 5000]),
+            attitude=PID(Kp=[22000, 22000, 1500], Ki=[0, 0, 1.2], Kd=[12000, 12000, 0]),
+        ),
+        quad,
+    )
+    ctrl.update_target((1, 1, 1, 0))
+
+    sim: Lockstep = Lockstep(quad, ctrl, dt=1e-3, ctrl_period=5e-3)
+    trajectory: np.ndarray = np.empty((n_steps, 12))
+    for i in range(n_steps):
+        sim.step()
+        trajectory[i] = quad.state
+    return sim, trajectory
+
+
+def test_lockstep_clock() -> None:
+    sim, _ = simulate(10)
+    assert sim.steps == 10
+    assert sim.time == pytest.approx(0.01)
+    assert sim.quad.time == sim.time
+
+    sim.run_until(0.05)
+    assert sim.steps == 50
+    sim.run_until(0.02)
+    assert sim.steps == 50
+
+
+def test_lockstep_deterministic() -> None:
+    _, first = simulate(200)
+    _, second = simulate(200)
+    assert np.array_equal(first, second)
+    assert not np.allclose(first[0], first[-1])
+
+
+def test_lockstep_scheduled() -> None:
+    ## the tasks of a scheduler run the same steps as the lockstep loop
+    _, expect = simulate(200)
+    sim, _ = simulate(0)
+    scheduler: Scheduler = Scheduler(factor=None, t0=sim.time)
+    sim.schedule(scheduler)
+    scheduler.run(0.2)
+    assert sim.steps == 200
+    assert scheduler.stats()["control"].runs == 40
+    assert np.array_equal(sim.quad.state, expect[-1])
+
+
+def test_lockstep_invalid_period() -> None:
+    sim, _ = simulate(0)
+    with pytest.raises(ValueError):
+        Lockstep(sim.quad, sim.ctrl, dt=1e-3, ctrl_period=2.5e-3)
+
+    with pytest.raises(ValueError):
+        Lockstep(sim.quad, sim.ctrl, dt=0.0)
+
+
+if __name__ == "__main__":
+    pytest.main()
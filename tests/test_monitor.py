@@ -0,0 +1,79 @@
+import pytest
+import numpy as np
+import matplotlib
+
+matplotlib.use("Agg")
+
+from quadcopter import Quadcopter, QuadConfig, MotorConfig
+import monitor.plot
+from monitor.plot import Monitor
+
+
+class Clock(object):
+    def __init__(self) -> None:
+        self.now: float = 0.0
+
+    def perf_counter(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def quad() -> Quadcopter:
+    config: QuadConfig = QuadConfig(
+        weight=1.0,
+        length=0.5,
+        radius=0.2,
+        states=[[0, 0, 1], [0, 0, 0]],
+        motors=MotorConfig(10, 2),
+        lift_const=0.1,
+    )
+    return Quadcopter(config)
+
+
+def test_monitor_render_rate(quad: Quadcopter, monkeypatch) -> None:
+    clock: Clock = Clock()
+    monkeypatch.setattr(monitor.plot, "time", clock)
+    view: Monitor = Monitor(quad, fps=30.0)
+
+    assert view.render()
+    ## frames within the display period are dropped, not queued
+    for now in (0.01, 0.02, 0.03):
+        clock.now = now
+        assert not view.render()
+    assert (view.frames, view.dropped) == (1, 3)
+
+    clock.now = 0.04
+    assert view.render()
+    clock.now = 0.05
+    assert not view.render()
+    assert (view.frames, view.dropped) == (2, 4)
+
+    ## the frame shows the state at the time it is rendered
+    x, y, z = view.model.node.get_data_3d()
+    assert np.allclose([x[0], y[0], z[0]], [0, 0, 1])
+
+
+def test_monitor_render_after_update(quad: Quadcopter, monkeypatch) -> None:
+    clock: Clock = Clock()
+    monkeypatch.setattr(monitor.plot, "time", clock)
+    monkeypatch.setattr(monitor.plot.plt, "pause", lambda interval: None)
+    view: Monitor = Monitor(quad, fps=30.0)
+
+    assert view.render()
+    assert all(artist.get_animated() for artist in view.artists)
+    background = view._background
+
+    ## full redraws show the artists, and are not mistaken for the background
+    view.update()
+    assert not any(artist.get_animated() for artist in view.artists)
+    assert view._background is None
+
+    clock.now = 0.04
+    assert view.render()
+    assert all(artist.get_animated() for artist in view.artists)
+    assert view._background is not None
+    assert view._background is not background
+
+
+if __name__ == "__main__":
+    pytest.main()
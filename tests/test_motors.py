@@ -2,6 +2,7 @@ import pytest
 import numpy as np
 
 from quadcopter import Motors, MotorConfig
+from quadcopter.quad.motors import ThrustTable
 
 
 @pytest.fixture
@@ -42,5 +43,60 @@ def test_motor_invalid_speeds(motors: Motors) -> None:
         motors.speeds = np.array([1000, 1500, 2000])
 
 
+def test_thrust_table(motors: Motors, tmp_path) -> None:
+    table: ThrustTable = ThrustTable.from_config(MotorConfig(d=10, pitch=2), top=10000)
+    speeds: np.ndarray = np.array([0.0, 1000.0, 4321.0, 9999.0, 12000.0])
+    exact: np.ndarray = motors.curve(speeds)
+    assert np.allclose(table(speeds)[:4], exact[:4], rtol=1e-4, atol=1e-6)
+    assert table(speeds)[4] == pytest.approx(exact[4], rel=0.05)
+
+    out: np.ndarray = np.empty((2, 2))
+    assert table(speeds[1:].reshape(2, 2), out=out) is out
+
+    path = tmp_path / "curve.csv"
+    path.write_text("speed,thrust\n# measured\n0,0\n500,1\n1000,3\n")
+    measured: ThrustTable = ThrustTable.load(str(path))
+    assert np.allclose(measured(np.array([250.0, 750.0, 1500.0])), [0.5, 2.0, 5.0], atol=1e-2)
+
+    with pytest.raises(ValueError):
+        ThrustTable(np.array([0.0, 2.0, 1.0]), np.zeros(3))
+
+
+def test_motor_lag() -> None:
+    motors: Motors = Motors(MotorConfig(d=10, pitch=2, tau=0.05))
+    motors.speeds = np.full(4, 1000.0)
+    assert np.array_equal(motors.speeds, np.zeros(4))
+    assert np.array_equal(motors.command, np.full(4, 1000.0))
+
+    ## the exact first-order response whatever the time step
+    thrust: np.ndarray = motors.advance(0.025)
+    assert np.all(thrust > 0) and np.all(thrust < motors.thrust)
+    motors.advance(0.025)
+    assert np.allclose(motors.speeds, 1000.0 * (1 - np.exp(-1)))
+
+    motors.reset(np.full(4, 500.0))
+    assert np.array_equal(motors.command, np.full(4, 500.0))
+    assert np.allclose(motors.advance(0.01), motors.curve(np.full(4, 500.0)))
+
+
+def test_motor_batch() -> None:
+    configs: list[MotorConfig] = [MotorConfig(d=10, pitch=2), MotorConfig(d=8, pitch=2, tau=0.02)]
+    speeds: np.ndarray = np.zeros((2, 4))
+    motors: Motors = Motors(configs, speeds=speeds)
+    motors.set(np.full((2, 4), 1000.0))
+    thrust: np.ndarray = motors.thrust
+    motors.advance(1e-3)
+    assert motors.speeds is speeds and motors.thrust is thrust
+    assert np.all(speeds[0] == 1000.0)
+    assert np.allclose(speeds[1], 1000.0 * (1 - np.exp(-1e-3 / 0.02)))
+    assert np.allclose(thrust[0], Motors(configs[0]).curve(np.full(4, 1000.0)))
+
+    with pytest.raises(ValueError):
+        motors.speeds = np.full(4, 1000.0)
+
+    with pytest.raises(ValueError):
+        Motors([MotorConfig(d=10, pitch=2), MotorConfig(d=10, pitch=2, curve="curve.csv")])
+
+
 if __name__ == "__main__":
     pytest.main()
@@ -0,0 +1,85 @@
+import json
+import time
+import pytest
+import numpy as np
+
+from quadcopter import Lockstep
+from quadcopter import Quadcopter, QuadConfig, MotorConfig
+from quadcopter.control import CPID, PID, ControlConfig
+from quadcopter.profiling import Histogram, Profiler
+
+
+@pytest.fixture
+def quad() -> Quadcopter:
+    config: QuadConfig = QuadConfig(
+        weight=1.0,
+        length=0.5,
+        radius=0.2,
+        states=[[0, 0, 1], [0, 0, 0]],
+        motors=MotorConfig(10, 2),
+        lift_const=0.1,
+    )
+    return Quadcopter(config, "rk4")
+
+
+@pytest.fixture
+def ctrl(quad: Quadcopter) -> CPID:
+    ctrl: CPID = CPID(
+        ControlConfig(
+            position=PID(Kp=[300, 300, 7000], Ki=[0.04, 0.04, 4.5], Kd=[450, 450, 5000]),
+            attitude=PID(Kp=[22000, 22000, 1500], Ki=[0, 0, 1.2], Kd=[12000, 12000, 0]),
+        ),
+        quad,
+    )
+    ctrl.update_target((1, 1, 1, 0))
+    return ctrl
+
+
+def test_histogram() -> None:
+    histogram: Histogram = Histogram(low=1e-6, decades=6, per_decade=10)
+    for value in np.linspace(1e-5, 1e-3, 1000):
+        histogram.add(value)
+    assert histogram.count == 1000
+    assert histogram.mean == pytest.approx(5.05e-4)
+    assert histogram.percentile(50) == pytest.approx(5e-4, rel=0.3)
+    assert histogram.percentile(100) == pytest.approx(1e-3)
+
+
+def test_profiler_lockstep(quad: Quadcopter, ctrl: CPID) -> None:
+    profiler: Profiler = Profiler().attach(quad, ctrl)
+    Lockstep(quad, ctrl).run(100)
+
+    query: dict = profiler.query()
+    assert query["histograms"]["quadcopter._update"]["count"] == 100
+    assert query["histograms"]["cpid._update"]["count"] == 20
+    assert query["counters"]["quadcopter._fetch_state"] == 400
+    assert query["histograms"]["quadcopter._fetch_state/step"]["mean"] == 4
+    assert "cpid._update" in profiler.report()
+
+    profiler.detach()
+    assert "_update" not in vars(quad) and "_update" not in vars(ctrl)
+    Lockstep(quad, ctrl).run(10)
+    assert profiler.query()["histograms"]["quadcopter._update"]["count"] == 100
+
+
+def test_profiler_chrome_trace(quad: Quadcopter, ctrl: CPID, tmp_path) -> None:
+    profiler: Profiler = Profiler().attach(quad, ctrl)
+    quad.start(dt=1e-3)
+    ctrl.start(dt=5e-3)
+    time.sleep(0.1)
+    ctrl.stop()
+    quad.stop()
+    profiler.detach()
+
+    path = tmp_path / "trace.json"
+    profiler.export(str(path))
+    trace: dict = json.loads(path.read_text())
+    spans: list[dict] = [e for e in trace["traceEvents"] if e["ph"] == "X"]
+    names: list[dict] = [e for e in trace["traceEvents"] if e["ph"] == "M"]
+    assert {e["name"] for e in spans} == {"quadcopter._update", "cpid._update"}
+    assert len({e["tid"] for e in spans}) == 2
+    assert len(names) == 2
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -44,7 +44,9 @@ def test_quad_getter_setter(quadcopter: Quadcopter) -> None:
 
 
 def test_quad_solver(quadcopter: Quadcopter) -> None:
-    state: np.ndarray = quadcopter.state
+    ## the thrust of these speeds cannot lift the quadcopter, drop it instead
+    quadcopter.state[2] = 10.0
+    state: np.ndarray = quadcopter.state.copy()
     quadcopter.start(dt=0.1)
 
     current_time = 0.0
@@ -62,5 +64,69 @@ def test_quad_solver(quadcopter: Quadcopter) -> None:
     assert not np.allclose(state, result)
 
 
+def test_quad_quaternion() -> None:
+    config: QuadConfig = QuadConfig(
+        weight=1.0,
+        length=0.5,
+        radius=0.2,
+        states=[[0, 0, 1], [0.5, -0.3, 1.0]],
+        motors=MotorConfig(10, 2),
+        lift_const=0.1,
+    )
+    quads: list[Quadcopter] = [Quadcopter(config, "rk4", a) for a in ("euler", "quaternion")]
+    for quad in quads:
+        quad.set_motor_speeds(np.array([2800.0, 2750.0, 2800.0, 2700.0]))
+        for _ in range(100):
+            quad.step(1e-2)
+    ## body rates and euler rates agree near level attitude
+    assert np.allclose(quads[0].state, quads[1].state, atol=1e-3)
+
+    with pytest.raises(ValueError):
+        Quadcopter(config, attitude="matrix")
+
+
+def test_quad_quaternion_gimbal_lock() -> None:
+    config: QuadConfig = QuadConfig(
+        weight=1.0,
+        length=0.5,
+        radius=0.2,
+        states=[[0, 0, 100], [0, 80, 0]],
+        motors=MotorConfig(10, 2),
+        lift_const=0.1,
+    )
+    quad: Quadcopter = Quadcopter(config, "rk4", "quaternion")
+    quad.state[10] = 20.0
+    quad.publish()
+    for _ in range(100):
+        quad.step(1e-2)
+
+    ## pitched through 90 degrees, to 100 degrees seen upside down
+    assert np.allclose(quad.state[6:9], [180.0, 80.0, 180.0])
+    assert np.isclose(np.linalg.norm(quad._y[6:10]), 1.0)
+
+
+def test_quad_quaternion_publish() -> None:
+    config: QuadConfig = QuadConfig(
+        weight=1.0,
+        length=0.5,
+        radius=0.2,
+        states=[[0, 0, 100], [170.0, 40.0, -120.0]],
+        motors=MotorConfig(10, 2),
+        lift_const=0.1,
+    )
+    quads: list[Quadcopter] = [Quadcopter(config, "rk4", "quaternion") for _ in range(2)]
+    for quad in quads:
+        quad.set_motor_speeds(np.array([3000.0, 2900.0, 3000.0, 3100.0]))
+        quad.step(1e-3)
+    assert np.allclose(quads[0].state[6:9], [170.0, 40.0, -120.0], atol=0.1)
+
+    ## publishing the state back keeps the simulated attitude
+    quads[0].publish()
+    for quad in quads:
+        for _ in range(100):
+            quad.step(1e-3)
+    assert np.allclose(quads[0].state, quads[1].state, atol=1e-9)
+
+
 if __name__ == "__main__":
     pytest.main()
@@ -0,0 +1,70 @@
+import pytest
+import numpy as np
+import matplotlib
+
+matplotlib.use("Agg")
+
+from quadcopter.telemetry import Recorder, load
+from monitor.replay import Levels, Replay
+
+
+@pytest.fixture
+def records(tmp_path) -> np.memmap:
+    path: str = str(tmp_path / "telemetry.npy")
+    t: np.ndarray = np.arange(10000) * 1e-3
+    with Recorder(path, n=3) as recorder:
+        for k, time in enumerate(t):
+            state: np.ndarray = np.zeros((3, 12))
+            state[:, 0] = time
+            state[:, 1] = np.arange(3)
+            state[:, 2] = k
+            state[:, 8] = 90.0
+            recorder.record(time, state, np.zeros(4), np.zeros(4))
+    return load(path)
+
+
+def test_levels(records: np.memmap) -> None:
+    levels: Levels = Levels(records, budget=100, cache=3 * 1000)
+    assert levels.index(-1.0) == 0
+    assert levels.index(2.0005) == 2000
+    assert levels.index(100.0) == 9999
+
+    assert levels.level(50) == 0
+    assert levels.level(1000) == 4
+    assert levels.level(50, stride=7.5) == 3
+    assert levels.level(10**9) == 14
+
+    ## fine levels are read for the window, coarse ones are cached
+    for level in (2, 4):
+        positions: np.ndarray = levels.positions(1001, 2001, level)
+        step: int = 1 << level
+        indices: np.ndarray = np.arange(1001, 2001)
+        indices = indices[indices % step == 0]
+        assert positions.shape == (len(indices), 3, 3)
+        assert np.array_equal(positions[:, 0, 2], indices)
+    assert list(levels._levels) == [4]
+
+    low, high = levels.bounds()
+    assert np.allclose(low[:2], 0) and high[1] == 2
+
+
+def test_replay(records: np.memmap) -> None:
+    viewer: Replay = Replay(records, length=0.5, trail=1.0, budget=300)
+    viewer.show(5.0)
+    assert viewer.time == 5.0
+    bodies: list = viewer.bodies._segments3d
+    assert len(bodies) == 6
+    trails: list = viewer.trails._segments3d
+    assert len(trails) == 3 and 50 <= len(trails[0]) <= 101
+
+    ## a yaw of 90 degrees turns the x arm onto the y axis
+    assert np.allclose(np.array(bodies[0])[:, 1], [-0.5, 0.5], atol=1e-9)
+
+    viewer.playing, viewer.speed = True, 100.0
+    viewer.show(6.0)
+    assert len(viewer.trails._segments3d[0]) <= 101
+    viewer.fig.canvas.draw()
+
+
+if __name__ == "__main__":
+    pytest.main()
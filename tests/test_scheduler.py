@@ -0,0 +1,95 @@
+import time
+import pytest
+import numpy as np
+
+from quadcopter import Quadcopter, QuadConfig, MotorConfig
+from quadcopter.control import CPID, PID, ControlConfig
+from quadcopter.scheduler import Scheduler
+
+
+def test_scheduler_rates() -> None:
+    calls: list[tuple[str, float]] = []
+    scheduler: Scheduler = Scheduler(factor=None)
+    scheduler.add("physics", lambda t: calls.append(("physics", t)), 1000)
+    scheduler.add("control", lambda t: calls.append(("control", t)), 200, priority=-1)
+    scheduler.add("monitor", lambda t: calls.append(("monitor", t)), 30)
+    scheduler.run(1.0)
+
+    stats = scheduler.stats()
+    assert stats["physics"].runs == 1000
+    assert stats["control"].runs == 200
+    assert stats["monitor"].runs == 30
+    assert calls[0] == ("control", 0.0)
+    assert calls[1] == ("physics", 0.0)
+    assert scheduler.time == 1.0
+
+    control: list[float] = [t for name, t in calls if name == "control"]
+    assert np.allclose(np.diff(control), 5e-3)
+
+
+def test_scheduler_every() -> None:
+    calls: list[tuple[str, float]] = []
+    scheduler: Scheduler = Scheduler(factor=None, t0=0.1)
+    scheduler.add("physics", lambda t: calls.append(("physics", t)), 1 / 3e-4)
+    scheduler.add("control", lambda t: calls.append(("control", t)), 1 / 3e-4, -1, every=7)
+    scheduler.run(0.3)
+
+    ## the ticks of the controller fall exactly on physics ticks, first
+    for i, (name, t) in enumerate(calls):
+        if name == "control":
+            assert calls[i + 1] == ("physics", t)
+    assert scheduler.stats()["control"].runs == 143
+
+    with pytest.raises(ValueError):
+        scheduler.add("task", lambda t: None, 100, every=0)
+
+
+def test_scheduler_real_time() -> None:
+    scheduler: Scheduler = Scheduler(factor=10.0)
+    scheduler.add("task", lambda t: None, 100)
+    start: float = time.perf_counter()
+    scheduler.run(0.5)
+    assert time.perf_counter() - start == pytest.approx(0.05, abs=0.03)
+    assert scheduler.stats()["task"].runs == 50
+    assert "task" in scheduler.report()
+
+
+def test_scheduler_overrun_and_stop() -> None:
+    scheduler: Scheduler = Scheduler(factor=1.0)
+    scheduler.add("slow", lambda t: time.sleep(0.02), 100)
+    scheduler.add("stop", lambda t: t >= 0.05 and scheduler.stop(), 100)
+    scheduler.run(10.0)
+    assert scheduler.time < 1.0
+    assert scheduler.stats()["slow"].overruns > 0
+
+
+def test_scheduler_closed_loop() -> None:
+    config: QuadConfig = QuadConfig(
+        weight=1.0,
+        length=0.5,
+        radius=0.2,
+        states=[[0, 0, 0], [0, 0, 0]],
+        motors=MotorConfig(10, 2),
+        lift_const=0.1,
+    )
+    quad: Quadcopter = Quadcopter(config, "rk4")
+    ctrl: CPID = CPID(
+        ControlConfig(
+            position=PID(Kp=[300, 300, 7000], Ki=[0.04, 0.04, 4.5], Kd=[450, 450, 5000]),
+            attitude=PID(Kp=[22000, 22000, 1500], Ki=[0, 0, 1.2], Kd=[12000, 12000, 0]),
+        ),
+        quad,
+    )
+    ctrl.update_target((1, 1, 1, 0))
+    quad.time = 0.0
+
+    scheduler: Scheduler = Scheduler(factor=None)
+    scheduler.add("physics", lambda t: quad.step(1e-3, t + 1e-3), 1000)
+    scheduler.add("control", lambda t: ctrl.step(), 200, priority=-1)
+    scheduler.run(0.1)
+    assert quad.time == pytest.approx(0.1)
+    assert quad.state[2] > 0
+
+
+if __name__ == "__main__":
+    pytest.main()
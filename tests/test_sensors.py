@@ -0,0 +1,122 @@
+import pytest
+import numpy as np
+
+from quadcopter import Quadcopter, QuadConfig, MotorConfig
+from quadcopter.quad import QuadcopterBatch
+from quadcopter.lockstep import Lockstep
+from quadcopter.control import CPID, PID, ControlConfig
+from quadcopter.sensors import Noise, Sensor, SensorConfig, Sensors, SensorsConfig
+from quadcopter.estimator import ComplementaryFilter
+from quadcopter.montecarlo import episode
+
+
+@pytest.fixture
+def config() -> QuadConfig:
+    return QuadConfig(
+        weight=1.0,
+        length=0.5,
+        radius=0.2,
+        states=[[0, 0, 0], [0, 0, 0]],
+        motors=MotorConfig(10, 2),
+        lift_const=0.1,
+    )
+
+
+def test_noise_blocks() -> None:
+    noise: Noise = Noise(np.random.default_rng(0), (2, 3), block=4)
+    samples: np.ndarray = np.array([noise.draw().copy() for _ in range(10)])
+    expect: np.ndarray = np.random.default_rng(0).standard_normal((3, 4, 2, 3))
+    assert np.array_equal(samples, expect.reshape(12, 2, 3)[:10])
+
+
+def test_sensor_rate_latency() -> None:
+    sensor: Sensor = Sensor(SensorConfig(100.0, latency=0.02), (1,), np.random.default_rng(0))
+    delivered: list[tuple[float, float]] = []
+    for k in range(1, 60):
+        t: float = k * 1e-3
+        if sensor.due(t):
+            sensor.sample(t, np.array([t]))
+        measurement = sensor.read(t)
+        if measurement is not None:
+            delivered.append((t, measurement[0]))
+
+    ## sampled every 10 steps, delivered 20 steps later without noise
+    assert [round(t, 3) for t, _ in delivered] == [0.021, 0.031, 0.041, 0.051]
+    assert all(np.isclose(t - stamp, 0.02) for t, stamp in delivered)
+
+    with pytest.raises(ValueError):
+        Sensor(SensorConfig(0.0), (1,), np.random.default_rng(0))
+
+
+def test_sensors_seeded(config: QuadConfig) -> None:
+    readings: list[dict] = []
+    for _ in range(2):
+        quad: Quadcopter = Quadcopter(config, "rk4")
+        sensors: Sensors = Sensors(quad, seed=7)
+        readings.append(sensors.update(1e-3, 1e-3))
+    assert readings[0].keys() == {"gyro", "accel", "baro"}
+    for name in readings[0]:
+        assert np.array_equal(readings[0][name][1], readings[1][name][1])
+
+    ## at rest the accelerometer measures the gravity
+    assert np.allclose(readings[0]["accel"][1], [[0, 0, 9.81]], atol=0.2)
+
+
+def test_filter_tracks_state(config: QuadConfig) -> None:
+    quad: Quadcopter = Quadcopter(config, "rk4")
+    quad.set_motor_speeds(np.array([3300.0, 3290.0, 3300.0, 3300.0]))
+    estimator: ComplementaryFilter = ComplementaryFilter(Sensors(quad, seed=0))
+    sim: Lockstep = Lockstep(quad, None, 1e-3, 5e-3, hooks=[estimator])
+    sim.run(3000)
+
+    assert quad.state[2] > 1.0
+    error: np.ndarray = np.abs(estimator.state - quad.state)
+    assert np.all(error[0:6] < 0.1)
+    assert np.all(error[6:9] < 0.5)
+
+
+def test_filter_batch(config: QuadConfig) -> None:
+    quad: QuadcopterBatch = QuadcopterBatch([config] * 3, "rk4")
+    quad.set_motor_speeds(np.full((3, 4), 3300.0))
+    sensors: Sensors = Sensors(quad, SensorsConfig(gps=SensorConfig(10.0)), seed=0)
+    estimator: ComplementaryFilter = ComplementaryFilter(sensors)
+    sim: Lockstep = Lockstep(quad, None, 1e-3, 5e-3, hooks=[estimator])
+    sim.run(1000)
+
+    assert estimator.state.shape == (3, 12)
+    assert np.all(np.abs(estimator.state[:, 0:6] - quad.state[:, 0:6]) < 0.1)
+    ## vehicles draw their own noise
+    assert not np.array_equal(sensors.accel.bias[0], sensors.accel.bias[1])
+
+
+def test_controller_feedback(config: QuadConfig) -> None:
+    quad: Quadcopter = Quadcopter(config, "rk4")
+    ctrl: CPID = CPID(
+        ControlConfig(
+            position=PID(Kp=[300, 300, 7000], Ki=[0.04, 0.04, 4.5], Kd=[-450, -450, -5000]),
+            attitude=PID(Kp=[22000, 22000, 1500], Ki=[0, 0, 1.2], Kd=[12000, 12000, 0]),
+            motor_limit=(0, 9000),
+        ),
+        quad,
+    )
+    assert ctrl.feedback() is quad.snapshot().state
+    ctrl.estimator = ComplementaryFilter(Sensors(quad, seed=0))
+    assert ctrl.feedback() is ctrl.estimator.state
+
+
+def test_episode_with_sensors(config: QuadConfig) -> None:
+    def control() -> ControlConfig:
+        return ControlConfig(
+            position=PID(Kp=[300, 300, 7000], Ki=[0.04, 0.04, 4.5], Kd=[450, 450, 5000]),
+            attitude=PID(Kp=[22000, 22000, 1500], Ki=[0, 0, 1.2], Kd=[12000, 12000, 0]),
+        )
+
+    options: dict = {"target": (0, 0, 1, 0), "duration": 0.05, "sensors": SensorsConfig()}
+    first: np.ndarray = episode(config, control(), noise_seed=1, **options)
+    again: np.ndarray = episode(config, control(), noise_seed=1, **options)
+    assert np.all(np.isfinite(first))
+    assert np.array_equal(first, again)
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,131 @@
+import asyncio
+import pytest
+import numpy as np
+
+from quadcopter import Lockstep
+from quadcopter import Quadcopter, QuadConfig, MotorConfig
+from quadcopter.control import CPID, PID, ControlConfig
+from quadcopter.server import Server, Session, Client, loadtest, read_frame
+from quadcopter.server import HEADER, PAYLOADS, MOTORS, PING, PONG, STATE, TARGET, encode
+
+
+def make_sim() -> Lockstep:
+    config: QuadConfig = QuadConfig(
+        weight=1.0,
+        length=0.5,
+        radius=0.2,
+        states=[[0, 0, 1], [0, 0, 0]],
+        motors=MotorConfig(10, 2),
+        lift_const=0.1,
+    )
+    quad: Quadcopter = Quadcopter(config, "rk4")
+    ctrl: CPID = CPID(
+        ControlConfig(
+            position=PID(Kp=[300, 300, 7000], Ki=[0.04, 0.04, 4.5], Kd=[450, 450, 5000]),
+            attitude=PID(Kp=[22000, 22000, 1500], Ki=[0, 0, 1.2], Kd=[12000, 12000, 0]),
+        ),
+        quad,
+    )
+    ctrl.update_target((0, 0, 1, 0))
+    return Lockstep(quad, ctrl)
+
+
+@pytest.fixture
+def server() -> Server:
+    return Server([make_sim(), make_sim()], factor=None)
+
+
+def test_frame_layout() -> None:
+    frame: bytes = encode(TARGET, 1, 1.0, 2.0, 3.0, 0.5)
+    assert len(frame) == HEADER.size + 32
+    assert HEADER.unpack_from(frame) == (TARGET, 1)
+    assert PAYLOADS[TARGET].unpack_from(frame, HEADER.size) == (1.0, 2.0, 3.0, 0.5)
+    assert PAYLOADS[STATE].size == 4 + 17 * 8
+
+
+def test_session_rate_and_conflation() -> None:
+    async def scenario() -> Session:
+        session: Session = Session(writer=None)
+        session.subscribe(0, 100.0)
+        assert session.due(0, 1.0) and not session.due(0, 1.005) and session.due(0, 1.01)
+        assert not session.due(1, 1.0)
+        session.offer(0, b"old")
+        session.offer(0, b"new")
+        return session
+
+    session: Session = asyncio.run(scenario())
+    assert session.pending == {0: b"new"}
+    assert session.dropped == 1
+
+
+def test_session_replies_bounded() -> None:
+    async def scenario() -> Session:
+        session: Session = Session(writer=None, max_replies=2)
+        session.reply(encode(PONG, 0, 1.0))
+        session.reply(encode(PONG, 0, 2.0))
+        with pytest.raises(asyncio.QueueFull):
+            session.reply(encode(PONG, 0, 3.0))
+        return session
+
+    assert asyncio.run(scenario()).replies.qsize() == 2
+
+
+def test_reject_non_finite() -> None:
+    async def decode(frame: bytes) -> tuple:
+        reader: asyncio.StreamReader = asyncio.StreamReader()
+        reader.feed_data(frame)
+        return await read_frame(reader)
+
+    assert asyncio.run(decode(encode(MOTORS, 0, 1.0, 2.0, 3.0, 4.0)))[2] == (1.0, 2.0, 3.0, 4.0)
+    for speeds in ((np.nan, 0.0, 0.0, 0.0), (0.0, np.inf, 0.0, 0.0)):
+        with pytest.raises(ValueError):
+            asyncio.run(decode(encode(MOTORS, 0, *speeds)))
+    with pytest.raises(ValueError):
+        asyncio.run(decode(encode(TARGET, 0, 0.0, 0.0, -np.inf, 0.0)))
+    assert asyncio.run(decode(encode(PING, 0, np.nan)))[0] == PING
+
+
+def test_serve(server: Server) -> None:
+    async def scenario() -> tuple[Client, float]:
+        await server.start()
+        runner: asyncio.Task = asyncio.create_task(server.run())
+        client: Client = await Client().connect(port=server.port)
+        client.subscribe(1, 1000.0)
+        client.target(0, (1.0, 1.0, 2.0, 0.0))
+        client.motors(1, (0.0, 0.0, 0.0, 0.0))
+        rtt: float = await client.ping()
+        await asyncio.sleep(0.2)
+        await client.close()
+        runner.cancel()
+        await server.close()
+        return client, rtt
+
+    client, rtt = asyncio.run(scenario())
+    assert rtt > 0
+    assert client.received > 0 and set(client.states) == {1}
+    ticks, time = client.states[1][:2]
+    assert time == pytest.approx(ticks * 5e-3)
+    assert server.sims[0].ctrl.target[0].tolist() == [1.0, 1.0, 2.0]
+    assert server.sims[1].ctrl is None
+    assert np.all(server.sims[1].quad.motors.speeds == 0)
+
+
+def test_loadtest(server: Server) -> None:
+    async def scenario() -> dict:
+        await server.start()
+        runner: asyncio.Task = asyncio.create_task(server.run())
+        result: dict = await loadtest(
+            port=server.port, clients=2, vehicles=2, duration=0.2, command_rate=200.0
+        )
+        runner.cancel()
+        await server.close()
+        return result
+
+    result: dict = asyncio.run(scenario())
+    assert result["frames_per_second"] > 0
+    assert result["commands_per_second"] > 0
+    assert result["rtt_ms"]["p50"] > 0
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,68 @@
+import threading
+import pytest
+import numpy as np
+
+from quadcopter import Quadcopter, QuadConfig, MotorConfig
+from quadcopter.snapshot import Snapshot, SnapshotBuffer
+
+
+def test_snapshot_publish() -> None:
+    buffer: SnapshotBuffer = SnapshotBuffer()
+    first: Snapshot = buffer.publish(0.1, np.full(12, 1.0), np.full(4, 2.0))
+    assert buffer.read() is first
+    assert first.seq == 0 and first.time == 0.1
+    assert np.array_equal(first.state, np.full(12, 1.0))
+    with pytest.raises(ValueError):
+        first.state[0] = 0.0
+
+    for i in range(2):
+        buffer.publish(0.2 + i, np.zeros(12), np.zeros(4))
+        assert buffer.valid(first)
+    buffer.publish(1.2, np.zeros(12), np.zeros(4))
+    assert not buffer.valid(first)
+
+
+def test_snapshot_consistent() -> None:
+    buffer: SnapshotBuffer = SnapshotBuffer((1000,), (4,))
+    done: threading.Event = threading.Event()
+    torn: list[int] = []
+
+    def read() -> None:
+        while not done.is_set():
+            snapshot: Snapshot = buffer.read()
+            consistent: bool = snapshot.state[0] == snapshot.state[-1] == snapshot.thrust[0]
+            if buffer.valid(snapshot) and not consistent:
+                torn.append(snapshot.seq)
+
+    reader: threading.Thread = threading.Thread(target=read)
+    reader.start()
+    for i in range(20000):
+        buffer.publish(i, np.full(1000, float(i)), np.full(4, float(i)))
+    done.set()
+    reader.join()
+    assert torn == []
+
+
+def test_quad_snapshot() -> None:
+    config: QuadConfig = QuadConfig(
+        weight=1.0,
+        length=0.5,
+        radius=0.2,
+        states=[[0, 0, 1], [0, 0, 0]],
+        motors=MotorConfig(10, 2),
+        lift_const=0.1,
+    )
+    quad: Quadcopter = Quadcopter(config, "rk4")
+    quad.time = 0.0
+    before: Snapshot = quad.snapshot()
+    quad.step(0.01)
+    after: Snapshot = quad.snapshot()
+    assert after.seq == before.seq + 1
+    assert after.time == pytest.approx(0.01)
+    assert before.state[2] == 1.0
+    assert np.array_equal(after.state, quad.state)
+    assert after.state is not quad.state
+
+
+if __name__ == "__main__":
+    pytest.main()
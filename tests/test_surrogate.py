@@ -0,0 +1,84 @@
+import pytest
+import numpy as np
+
+from quadcopter import Lockstep
+from quadcopter import Quadcopter, QuadConfig, MotorConfig
+from quadcopter.control import PID, ControlConfig, BatchCPID
+from quadcopter.surrogate import SurrogateBatch, discretize, hover, validate
+
+
+@pytest.fixture
+def quad_config() -> QuadConfig:
+    return QuadConfig(
+        weight=1.0,
+        length=0.5,
+        radius=0.2,
+        states=[[0, 0, 1], [0, 0, 0.3]],
+        motors=MotorConfig(10, 2),
+        lift_const=0.1,
+    )
+
+
+def control_config(scale: float = 1.0) -> ControlConfig:
+    return ControlConfig(
+        position=PID(Kp=[300, 300, 7000 * scale], Ki=[0.04, 0.04, 4.5], Kd=[450, 450, 5000]),
+        attitude=PID(Kp=[22000, 22000, 1500], Ki=[0, 0, 1.2], Kd=[12000, 12000, 0]),
+    )
+
+
+def test_discretize() -> None:
+    A_d, B_d = discretize(np.array([[-2.0]]), np.array([[1.0]]), 0.5)
+    assert A_d[0, 0] == pytest.approx(np.exp(-1.0))
+    assert B_d[0, 0] == pytest.approx((1 - np.exp(-1.0)) / 2)
+
+
+def test_surrogate_hover(quad_config: QuadConfig) -> None:
+    state, thrust = hover(Quadcopter(quad_config), quad_config)
+    assert np.allclose(thrust, quad_config.weight * 9.81 / 4)
+
+    quad: SurrogateBatch = SurrogateBatch(quad_config, 2)
+    assert quad.discretization(1e-2)[0] is SurrogateBatch(quad_config).discretization(1e-2)[0]
+    quad._motors._f = np.tile(thrust, (2, 1))
+    quad.state[:] = state
+    quad.step(1e-2)
+    assert np.allclose(quad.state, state)
+
+
+def test_surrogate_open_loop(quad_config: QuadConfig) -> None:
+    ## a small thrust imbalance around hover
+    state, thrust = hover(Quadcopter(quad_config), quad_config)
+    thrust = thrust * [1.05, 1.0, 0.95, 1.0]
+
+    quad: Quadcopter = Quadcopter(quad_config, "rk4")
+    quad._motors._f = thrust
+    surrogate: SurrogateBatch = SurrogateBatch(quad_config)
+    surrogate._motors._f = thrust[np.newaxis]
+    quad.state[:], surrogate.state[:] = state, state
+
+    for _ in range(20):
+        for _ in range(10):
+            quad.step(1e-3)
+        surrogate.step(1e-2)
+    assert np.abs(quad.state[6:9] - state[6:9]).max() > 1e-3
+    assert np.allclose(surrogate.state[0], quad.state, atol=1e-4)
+
+
+def test_surrogate_gain_sets(quad_config: QuadConfig) -> None:
+    configs: list[ControlConfig] = [control_config(scale) for scale in (0.5, 1.0, 2.0)]
+    quad: SurrogateBatch = SurrogateBatch(quad_config, len(configs))
+    ctrl: BatchCPID = BatchCPID(configs, quad)
+    ctrl.update_target((0, 0, 1.5, 0.3))
+    Lockstep(quad, ctrl, dt=5e-3, ctrl_period=5e-3).run(100)
+    assert np.isfinite(quad.state).all()
+    assert not np.allclose(quad.state[0], quad.state[2])
+
+
+def test_surrogate_validate(quad_config: QuadConfig) -> None:
+    report: dict = validate(quad_config, control_config(), (0, 0, 1.5, 0.3), 0.5)
+    assert report["max_attitude_deviation"] < 1e-2
+    assert report["position_max"] < 0.05
+    assert report["final_position"] <= report["position_max"]
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,79 @@
+import pytest
+import numpy as np
+
+from quadcopter import QuadcopterBatch, QuadConfig, MotorConfig
+from quadcopter.lockstep import Lockstep
+from quadcopter.control import BatchCPID, PID, ControlConfig
+from quadcopter.swarm import Swarm, partition
+
+
+@pytest.fixture
+def configs() -> list[QuadConfig]:
+    return [
+        QuadConfig(
+            weight=1.0 + 0.1 * i,
+            length=0.5,
+            radius=0.2,
+            states=[[0.1 * i, 0, 1], [0, 0, 0]],
+            motors=MotorConfig(10, 2),
+            lift_const=0.1,
+        )
+        for i in range(5)
+    ]
+
+
+@pytest.fixture
+def control() -> ControlConfig:
+    return ControlConfig(
+        position=PID(Kp=[300, 300, 7000], Ki=[0.04, 0.04, 4.5], Kd=[450, 450, 5000]),
+        attitude=PID(Kp=[22000, 22000, 1500], Ki=[0, 0, 1.2], Kd=[12000, 12000, 0]),
+    )
+
+
+def test_partition() -> None:
+    assert partition(10, 3) == [(0, 3), (3, 7), (7, 10)]
+    assert partition(2, 4) == [(0, 1), (1, 2)]
+
+
+def test_swarm_matches_batch(configs: list[QuadConfig], control: ControlConfig) -> None:
+    batch: QuadcopterBatch = QuadcopterBatch(configs)
+    ctrl: BatchCPID = BatchCPID(control, batch)
+    ctrl.update_target((1, 1, 2, 0))
+    Lockstep(batch, ctrl).run(50)
+
+    with Swarm(configs, control, workers=2) as swarm:
+        assert swarm.shards == [(0, 2), (2, 5)]
+        assert np.allclose(swarm.state[:, 0], [0.0, 0.1, 0.2, 0.3, 0.4])
+        swarm.update_target((1, 1, 2, 0))
+        swarm.run(4)
+        swarm.run_until(0.05)
+        assert swarm.ticks == 10 and swarm.time == pytest.approx(0.05)
+        assert np.allclose(swarm.state, batch.state)
+        assert np.allclose(swarm.speeds, batch.speeds)
+        assert np.allclose(swarm.integrators[:, 0:3], ctrl.position.Ie)
+        assert np.allclose(swarm.integrators[:, 3:6], ctrl.attitude.Ie)
+
+
+def test_swarm_teleport(configs: list[QuadConfig], control: ControlConfig) -> None:
+    batch: QuadcopterBatch = QuadcopterBatch(configs)
+    ctrl: BatchCPID = BatchCPID(control, batch)
+    sim: Lockstep = Lockstep(batch, ctrl)
+    ctrl.update_target((0, 0, 1, 0))
+
+    with Swarm(configs, control, workers=2) as swarm:
+        swarm.update_target((0, 0, 1, 0))
+        swarm.run(2)
+        sim.run(10)
+
+        ## a vehicle moved between runs is seen by the first command
+        swarm.state[3, 0:3] = batch.state[3, 0:3] = (2, -1, 3)
+        batch.publish()
+        swarm.run(1)
+        sim.run(5)
+        assert np.allclose(swarm.speeds, batch.speeds)
+        assert np.allclose(swarm.state, batch.state)
+        assert np.allclose(swarm.integrators[:, 0:3], ctrl.position.Ie)
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,91 @@
+import json
+import pytest
+import numpy as np
+
+from quadcopter import QuadConfig, MotorConfig
+from quadcopter.metrics import step_response
+from quadcopter.control import PID, ControlConfig
+from quadcopter.control import control_config_from_dict, control_config_to_dict
+from quadcopter.sweep import grid, random_samples, apply, sweep
+
+
+@pytest.fixture
+def base() -> ControlConfig:
+    return ControlConfig(
+        position=PID(Kp=[300, 300, 7000], Ki=[0.04, 0.04, 4.5], Kd=[450, 450, 5000]),
+        attitude=PID(Kp=[22000, 22000, 1500], Ki=[0, 0, 1.2], Kd=[12000, 12000, 0]),
+    )
+
+
+def test_control_config_dict(base: ControlConfig) -> None:
+    config: ControlConfig = control_config_from_dict(control_config_to_dict(base))
+    assert np.array_equal(config.position.Kp, base.position.Kp)
+    assert np.array_equal(config.attitude.Kd, base.attitude.Kd)
+    assert config.motor_limit == base.motor_limit
+
+
+def test_sweep_candidates(base: ControlConfig) -> None:
+    candidates: list[dict] = grid({"position.Kp": [[1, 1, 1], [2, 2, 2]], "attitude.Kd": [[3, 3, 3]] * 3})
+    assert len(candidates) == 6
+
+    config: ControlConfig = apply(control_config_to_dict(base), candidates[-1])
+    assert np.array_equal(config.position.Kp, [2, 2, 2])
+    assert np.array_equal(config.attitude.Kd, [3, 3, 3])
+    assert np.array_equal(config.position.Kd, base.position.Kd)
+
+    bounds: dict = {"attitude.Ki": [[0, 0, 0], [1, 1, 1]]}
+    assert random_samples(bounds, 4, seed=1) == random_samples(bounds, 4, seed=1)
+    with pytest.raises(ValueError):
+        grid({"position.Kx": [[1, 1, 1]]})
+
+
+def test_step_response() -> None:
+    t: np.ndarray = np.linspace(0, 10, 1001)
+    z: np.ndarray = 1 - np.exp(-t) * np.cos(2 * t)
+    position: np.ndarray = np.stack([np.zeros_like(t), np.zeros_like(t), z], axis=1)
+    commands: np.ndarray = np.array([[4000, 5000, 6000, 9000]] * 10)
+    metrics = step_response(t, position, np.array([0, 0, 1]), commands, (4000, 9000))
+
+    assert 0 < metrics.rise_time < 1
+    assert metrics.overshoot == pytest.approx(np.max(z) - 1)
+    assert 1 < metrics.settling_time < 5
+    assert metrics.steady_state_error < 1e-3
+    assert metrics.saturation == pytest.approx(0.5)
+
+
+def test_sweep_resume(base: ControlConfig, tmp_path) -> None:
+    quad_config: QuadConfig = QuadConfig(
+        weight=1.0,
+        length=0.5,
+        radius=0.2,
+        states=[[0, 0, 0], [0, 0, 0]],
+        motors=MotorConfig(10, 2),
+        lift_const=0.1,
+    )
+    candidates: list[dict] = grid({"position.Kp": [[300, 300, k] for k in (5000, 6000, 7000)]})
+    out_path = tmp_path / "sweep.jsonl"
+    options: dict = {"target": (0, 0, 1, 0), "duration": 0.1}
+
+    first: list[dict] = list(sweep(quad_config, base, candidates[:2], str(out_path), 2, **options))
+    second: list[dict] = list(sweep(quad_config, base, candidates, str(out_path), 2, **options))
+    assert sorted(result["index"] for result in first) == [0, 1]
+    assert [result["index"] for result in second] == [2]
+
+    lines: list[dict] = [json.loads(line) for line in out_path.read_text().splitlines()]
+    assert sorted(line["index"] for line in lines) == [0, 1, 2]
+    assert all("settling_time" in line for line in lines)
+
+    ## a record cut by an interruption is dropped and its candidate run again
+    text: str = out_path.read_text()
+    out_path.write_text(text[:text.rindex("\n", 0, -1) + 10])
+    third: list[dict] = list(sweep(quad_config, base, candidates, str(out_path), 2, **options))
+    assert len(third) == 1
+    lines = [json.loads(line) for line in out_path.read_text().splitlines()]
+    assert sorted(line["index"] for line in lines) == [0, 1, 2]
+
+    with pytest.raises(ValueError):
+        list(sweep(quad_config, base, candidates[::-1], str(out_path), 2, **options))
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,98 @@
+import pytest
+import numpy as np
+
+from quadcopter import Lockstep
+from quadcopter import Quadcopter, QuadcopterBatch
+from quadcopter import QuadConfig, MotorConfig
+from quadcopter.control import CPID, PID, ControlConfig
+from quadcopter.telemetry import Recorder, load
+
+
+@pytest.fixture
+def quad_config() -> QuadConfig:
+    return QuadConfig(
+        weight=1.0,
+        length=0.5,
+        radius=0.2,
+        states=[[0, 0, 0], [0, 0, 0]],
+        motors=MotorConfig(10, 2),
+        lift_const=0.1,
+    )
+
+
+def test_recorder_chunks(tmp_path) -> None:
+    path: str = str(tmp_path / "log.npy")
+    recorder: Recorder = Recorder(path, n=2, capacity=8, chunk=4)
+    for i in range(10):
+        recorder.record(i * 0.1, np.full((2, 12), i), np.full((2, 4), i), np.zeros((2, 4)))
+        assert len(load(path)) == (i + 1) // 4 * 4
+
+    assert len(recorder) == 10
+    assert np.allclose(recorder.latest(3)["time"], [0.7, 0.8, 0.9])
+    recorder.close()
+
+    log: np.memmap = load(path)
+    assert isinstance(log, np.memmap)
+    assert log.shape == (10,)
+    assert np.allclose(log["time"], np.arange(10) * 0.1)
+    assert np.array_equal(log["state"][5], np.full((2, 12), 5))
+
+
+def test_recorder_flush_wrap(tmp_path) -> None:
+    ## flushes within a chunk leave the pending records across the wrap
+    path: str = str(tmp_path / "log.npy")
+    recorder: Recorder = Recorder(path, capacity=8, chunk=4)
+    for i in range(20):
+        recorder.record(float(i), np.zeros(12), np.zeros(4), np.zeros(4))
+        if i % 3 == 0:
+            recorder.flush()
+    recorder.close()
+    assert np.array_equal(load(path)["time"], np.arange(20))
+
+
+def test_recorder_append(tmp_path) -> None:
+    path: str = str(tmp_path / "log.npy")
+    with Recorder(path, capacity=4, chunk=2) as recorder:
+        recorder.record(0.0, np.zeros(12), np.zeros(4), np.zeros(4))
+    with Recorder(path, capacity=4, chunk=2, append=True) as recorder:
+        recorder.record(1.0, np.ones(12), np.zeros(4), np.zeros(4))
+    assert np.array_equal(load(path)["time"], [0.0, 1.0])
+
+    with pytest.raises(ValueError):
+        Recorder(path, n=3, capacity=4, chunk=2, append=True)
+    with pytest.raises(ValueError):
+        Recorder(path, capacity=5, chunk=2)
+
+
+def test_recorder_lockstep(quad_config: QuadConfig, tmp_path) -> None:
+    path: str = str(tmp_path / "log.npy")
+    quad: Quadcopter = Quadcopter(quad_config, "rk4")
+    ctrl: CPID = CPID(
+        ControlConfig(
+            position=PID(Kp=[300, 300, 7000], Ki=[0.04, 0.04, 4.5], Kd=[450, 450, 5000]),
+            attitude=PID(Kp=[22000, 22000, 1500], Ki=[0, 0, 1.2], Kd=[12000, 12000, 0]),
+        ),
+        quad,
+    )
+    ctrl.update_target((1, 1, 1, 0))
+    with Recorder(path, capacity=64, chunk=16, every=5) as recorder:
+        Lockstep(quad, ctrl, hooks=[recorder]).run(500)
+
+    log: np.memmap = load(path)
+    assert len(log) == 100
+    assert np.allclose(log["time"][:3], [0.005, 0.010, 0.015])
+    assert np.array_equal(log["state"][-1, 0], quad.state)
+    assert np.array_equal(log["target"][-1, 0], [1, 1, 1, 0])
+    assert np.array_equal(log["error"][-1, 0], ctrl.error)
+    assert np.array_equal(log["speeds"][-1, 0], quad.motors.speeds)
+
+
+def test_recorder_batch(quad_config: QuadConfig, tmp_path) -> None:
+    batch: QuadcopterBatch = QuadcopterBatch([quad_config] * 3)
+    with Recorder(str(tmp_path / "log.npy"), n=3, capacity=4, chunk=4) as recorder:
+        recorder.sample(0.0, batch)
+        assert recorder.latest(1)["state"].shape == (1, 3, 12)
+
+
+if __name__ == "__main__":
+    pytest.main()
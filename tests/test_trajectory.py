@@ -0,0 +1,118 @@
+import pytest
+import numpy as np
+
+from quadcopter import Lockstep
+from quadcopter import MotorConfig
+from quadcopter import Quadcopter, QuadcopterBatch, QuadConfig
+from quadcopter.control import CPID, PID, ControlConfig, BatchCPID, Trajectory
+
+
+@pytest.fixture
+def quad_config() -> QuadConfig:
+    return QuadConfig(
+        weight=1.0,
+        length=0.5,
+        radius=0.2,
+        states=[[0, 0, 0], [0, 0, 0]],
+        motors=MotorConfig(10, 2),
+        lift_const=0.1,
+    )
+
+
+def control_config() -> ControlConfig:
+    return ControlConfig(
+        position=PID(Kp=[300, 300, 7000], Ki=[0.04, 0.04, 4.5], Kd=[450, 450, 5000]),
+        attitude=PID(Kp=[22000, 22000, 1500], Ki=[0, 0, 1.2], Kd=[12000, 12000, 0]),
+    )
+
+
+def test_trajectory_linear() -> None:
+    trajectory: Trajectory = Trajectory(
+        [0, 1, 3], [[0, 0, 0, 0], [1, 0, 0, 0], [1, 2, 0, 0]], rate=100
+    )
+    assert trajectory.duration == 3
+    assert np.allclose(trajectory.sample(0.5), [0.5, 0, 0, 0])
+    assert np.allclose(trajectory.sample(2.0), [1, 1, 0, 0])
+    assert np.allclose(trajectory.sample(-1.0), [0, 0, 0, 0])
+    assert np.allclose(trajectory.sample(10.0), [1, 2, 0, 0])
+    assert np.allclose(trajectory.samples([0.5, 2.0]), [[0.5, 0, 0, 0], [1, 1, 0, 0]])
+
+
+def test_trajectory_methods() -> None:
+    times, points = [0, 1, 2], [[0, 0, 0, 0], [1, 1, 1, 0], [0, 2, 0, 0]]
+    previous: Trajectory = Trajectory(times, points, rate=10, method="previous")
+    assert np.allclose(previous.sample(0.9), points[0])
+    assert np.allclose(previous.sample(2.0), points[2])
+
+    cubic: Trajectory = Trajectory(times, points, rate=10, method="cubic")
+    assert np.allclose(cubic.samples(times), points)
+
+    with pytest.raises(ValueError):
+        Trajectory(times, points, method="quintic")
+    with pytest.raises(ValueError):
+        Trajectory([0, 0, 1], points)
+
+
+def test_trajectory_yaw() -> None:
+    ## yaw goes the short way across the wrapping
+    trajectory: Trajectory = Trajectory([0, 1], [[0, 0, 0, 3.0], [0, 0, 0, -3.0]], rate=100)
+    yaw: np.ndarray = trajectory.table[:, 3]
+    assert np.all(np.abs(yaw) >= 3.0 - 1e-9)
+    assert np.all((yaw >= -np.pi) & (yaw < np.pi))
+
+
+def test_trajectory_waypoints() -> None:
+    trajectory: Trajectory = Trajectory.from_waypoints(
+        [[0, 0, 0, 0], [3, 4, 0, 0], [3, 4, 0, 1]], speed=2.5
+    )
+    assert trajectory.duration == pytest.approx(2.0 + 1e-3)
+    assert np.allclose(trajectory.sample(1.0), [1.5, 2, 0, 0])
+
+
+def test_follow_matches_targets(quad_config: QuadConfig) -> None:
+    ## a step trajectory gives the same run as updating the target by hand
+    trajectory: Trajectory = Trajectory(
+        [0, 0.5], [[0, 0, 1, 0], [1, 1, 1, 0.5]], rate=1000, method="previous"
+    )
+    states: list[np.ndarray] = []
+    for follow in (True, False):
+        quad: Quadcopter = Quadcopter(quad_config, "rk4")
+        ctrl: CPID = CPID(control_config(), quad)
+        sim: Lockstep = Lockstep(quad, ctrl)
+        if follow:
+            ctrl.follow(trajectory)
+            sim.run(1000)
+        else:
+            ctrl.update_target((0, 0, 1, 0))
+            sim.run(500)
+            ctrl.update_target((1, 1, 1, 0.5))
+            sim.run(500)
+        states.append(quad.state.copy())
+    assert np.array_equal(states[0], states[1])
+
+
+def test_follow_batch(quad_config: QuadConfig) -> None:
+    def circles(t: np.ndarray) -> np.ndarray:
+        t = np.outer(t, np.ones(3))
+        return np.stack([np.sin(t), np.cos(t), np.ones_like(t), t * np.arange(3)], axis=-1)
+
+    per_vehicle: Trajectory = Trajectory.from_function(circles, duration=1.0)
+    assert per_vehicle.shape == (3, 4)
+
+    quad: QuadcopterBatch = QuadcopterBatch([quad_config] * 3)
+    ctrl: BatchCPID = BatchCPID(control_config(), quad)
+    ctrl.follow(per_vehicle)
+    Lockstep(quad, ctrl).run(500)
+    t_pos, t_yaw = ctrl.target
+    assert np.allclose(t_pos[:, 0], np.sin(0.495))
+    assert np.allclose(t_yaw, [0, 0.495, 0.99])
+
+    shared: Trajectory = Trajectory.from_waypoints([[0, 0, 0, 0], [1, 1, 1, 0]], speed=1.0)
+    ctrl.follow(shared)
+    assert ctrl.target[0].shape == (3, 3)
+    with pytest.raises(ValueError):
+        ctrl.follow(Trajectory([0], np.zeros((1, 2, 4))))
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,108 @@
+import json
+import pytest
+import numpy as np
+
+from quadcopter import QuadConfig, MotorConfig, load_json_config
+from quadcopter.control import PID, ControlConfig, load_control_config
+from quadcopter.control import control_config_to_dict
+from quadcopter.tune import CrossEntropy, gains, scales, from_vector, rollout, tune, main
+
+
+@pytest.fixture
+def quad_config() -> QuadConfig:
+    return QuadConfig(
+        weight=1.0,
+        length=0.5,
+        radius=0.2,
+        states=[[0, 0, 0], [0, 0, 0]],
+        motors=MotorConfig(10, 2),
+        lift_const=0.1,
+    )
+
+
+@pytest.fixture
+def base() -> ControlConfig:
+    return ControlConfig(
+        position=PID(Kp=[300, 300, 7000], Ki=[0.04, 0.04, 4.5], Kd=[-450, -450, -5000]),
+        attitude=PID(Kp=[22000, 22000, 1500], Ki=[0, 0, 1.2], Kd=[12000, 12000, 0]),
+        motor_limit=(0, 9000),
+    )
+
+
+def test_tune_vector(base: ControlConfig) -> None:
+    scale: np.ndarray = scales(base)
+    assert scale[9:12].tolist() == [22000, 22000, 1500]
+    assert scale[12] == 1.0
+    config: ControlConfig = from_vector(gains(base) / scale, base, scale)
+    assert control_config_to_dict(config) == control_config_to_dict(base)
+
+
+def test_cross_entropy() -> None:
+    search: CrossEntropy = CrossEntropy(np.zeros(3), 1.0, population=32, seed=1)
+    for _ in range(30):
+        samples: np.ndarray = search.ask()
+        search.tell(samples, np.sum((samples - [1, -2, 3]) ** 2, axis=1))
+    assert np.allclose(search.mean, [1, -2, 3], atol=0.05)
+    assert search.best_cost < 1e-2
+
+    resumed: CrossEntropy = CrossEntropy.from_dict(json.loads(json.dumps(search.to_dict())))
+    assert np.array_equal(resumed.ask(), search.ask())
+
+
+def test_tune_rollout(quad_config: QuadConfig, base: ControlConfig) -> None:
+    ## a derivative term in phase with the error drives the height away
+    flipped: np.ndarray = gains(base) / scales(base)
+    flipped[6:9] *= -1
+    unstable: ControlConfig = from_vector(flipped, base, scales(base))
+    costs, diverged = rollout(quad_config, [base, unstable], (0, 0, 1, 0), 2.0)
+    assert diverged.tolist() == [False, True]
+    assert np.all(np.isfinite(costs)) and costs[0] < costs[1]
+
+    surrogate, _ = rollout(quad_config, [base, base], (0, 0, 1, 0), 1.0, surrogate=True)
+    assert surrogate[0] == surrogate[1]
+
+
+def test_tune_resume(quad_config: QuadConfig, base: ControlConfig, tmp_path) -> None:
+    options: dict = dict(target=(0, 0, 1, 0), duration=0.5, surrogate=True)
+    path: str = str(tmp_path / "state.json")
+    first: list = [summary for _, summary in tune(quad_config, base, 2, 8, state_path=path, **options)]
+    assert [summary["generation"] for summary in first] == [1, 2]
+
+    resumed: list = [summary for _, summary in tune(quad_config, base, 3, 8, state_path=path, **options)]
+    assert [summary["generation"] for summary in resumed] == [3]
+    assert resumed[0]["best_cost"] <= first[-1]["best_cost"]
+
+    ## settings differing from the saved search are refused
+    for settings in ({"population": 4}, {"sigma": 0.2}, {"seed": 1}):
+        with pytest.raises(ValueError):
+            next(tune(quad_config, base, 4, **{"population": 8, **settings}, state_path=path, **options))
+
+
+def test_tune_main(base: ControlConfig, tmp_path) -> None:
+    control: str = str(tmp_path / "control.json")
+    config: str = str(tmp_path / "quad.json")
+    out: str = str(tmp_path / "best.json")
+    with open(control, "w") as file:
+        json.dump({"control": control_config_to_dict(base)}, file)
+    with open(config, "w") as file:
+        json.dump({
+            "weight": 1.0, "length": 0.5, "radius": 0.2, "lift_const": 0.1,
+            "initial_states": {"position": [0, 0, 0], "attitude": [0, 0, 0]},
+            "motors": {"diameter": 10, "pitch": 2},
+        }, file)
+
+    main([control, "--config", config, "--out", out, "--generations", "2",
+          "--population", "4", "--duration", "0.2", "--surrogate"])
+    assert load_control_config(out).motor_limit == (0, 9000)
+
+    ## a finished search still writes its best gains when resumed
+    state: str = str(tmp_path / "state.json")
+    argv: list[str] = [control, "--config", config, "--state", state, "--generations", "1",
+                       "--population", "4", "--duration", "0.2", "--surrogate"]
+    main(argv + ["--out", out])
+    main(argv + ["--out", str(tmp_path / "again.json")])
+    assert load_json_config(str(tmp_path / "again.json")) == load_json_config(out)
+
+
+if __name__ == "__main__":
+    pytest.main()
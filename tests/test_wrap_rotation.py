@@ -1,5 +1,6 @@
 import numpy as np
 from quadcopter import wrap, rotation_matrix
+from quadcopter.utils import quaternion_from_euler, euler_from_quaternion, quaternion_rotation_matrix
 
 
 def test_wrap_angle() -> None:
@@ -38,3 +39,23 @@ def test_rotation_matrix() -> None:
     expect = np.dot(RZ, np.dot(RY, RX))
     result = rotation_matrix(np.array(angles))
     assert np.allclose(result, expect), f"expect: {expect}, get {result}"
+
+
+def test_batched_out() -> None:
+    angles: np.ndarray = np.random.default_rng(0).uniform(-180, 180, (5, 3))
+    out: np.ndarray = np.empty((5, 3, 3))
+    assert rotation_matrix(angles, out=out) is out
+    assert np.allclose(out, [rotation_matrix(a) for a in angles])
+
+    wrapped: np.ndarray = wrap(angles)
+    assert wrap(angles, out=angles) is angles
+    assert np.array_equal(angles, wrapped)
+
+
+def test_quaternion() -> None:
+    angles: np.ndarray = np.random.default_rng(1).uniform(-80, 80, (5, 3))
+    q: np.ndarray = quaternion_from_euler(angles)
+    assert np.allclose(np.linalg.norm(q, axis=1), 1.0)
+    assert np.allclose(quaternion_rotation_matrix(q), rotation_matrix(angles))
+    assert np.allclose(euler_from_quaternion(q), angles)
+    assert np.allclose(euler_from_quaternion(q[0]), angles[0])